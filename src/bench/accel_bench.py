@@ -0,0 +1,87 @@
+"""
+per class call cost, compiled control/control.py (control._control_accel,
+build_accel.py) against the pure python source, for every class. the used
+column marks control.control.COMPILED_CLASSES, the ones control.control
+takes from the extension. without the extension only the pure numbers print.
+
+run from src/:
+    python -m bench.accel_bench
+"""
+
+import sys
+import timeit
+
+import control.control as cc
+from build_accel import load_pure_python
+
+try:
+    from control import _control_accel as compiled
+except ImportError:
+    compiled = None
+
+
+NUMBER = 200_000
+REPEAT = 5
+
+
+def calls(mod) -> dict:
+    """
+    name -> zero argument callable doing one representative call
+    """
+    lowpass = mod.LowPassFilter(alpha=0.3)
+    lowpass.reset(20.0)
+
+    pi = mod.PIController(kp=0.02, ki=5.0, ff_gain=1.0)
+    pi.reset(0.5)
+    buck = mod.ConverterMode.BUCK
+
+    po = mod.PerturbObserve()
+    po.reset(20.0)
+
+    mm = mod.ModeManager()
+    mm.reset(buck)
+
+    transition = mod.DutyTransition(step=0.03)
+
+    checker = mod.SafetyChecker()
+    m = mod.build_measurements(25.0, 18.0, 4.0, 5.0)
+
+    return {
+        "LowPassFilter.update": lambda: lowpass.update(20.1),
+        "PIController.update": lambda: pi.update(20.0, 19.9, 30.0, buck),
+        "PerturbObserve.update": lambda: po.update(30.0, 2.0),
+        "ModeManager.update": lambda: mm.update(30.0, 20.0),
+        "DutyTransition.update": lambda: transition.update(),
+        "SafetyChecker.check_code": lambda: checker.check_code(m),
+    }
+
+
+def best_ns(fn) -> float:
+    return min(timeit.repeat(fn, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e9
+
+
+def main() -> int:
+    pure = calls(load_pure_python())
+    fast = calls(compiled) if compiled is not None else None
+
+    if fast is None:
+        print("control._control_accel is not built, run python build_accel.py for the compiled column")
+
+    print(f"{'call':26s} {'python ns':>10s} {'compiled ns':>12s} {'speedup':>8s}  used")
+
+    for name, fn in pure.items():
+        py_ns = best_ns(fn)
+
+        if fast is None:
+            print(f"{name:26s} {py_ns:10.1f}")
+            continue
+
+        c_ns = best_ns(fast[name])
+        used = "yes" if name.split(".")[0] in cc.COMPILED_CLASSES else ""
+        print(f"{name:26s} {py_ns:10.1f} {c_ns:12.1f} {py_ns / c_ns:7.2f}x  {used}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+parity between control.control with its compiled classes (build_accel.py,
+control.control.COMPILED_CLASSES) and the pure python source.
+
+feeds the same seeded random inputs to both of LowPassFilter, PIController,
+PerturbObserve, ModeManager, DutyTransition and SafetyChecker, every output
+and the final object state must be identical. classes control.control does
+not take from the extension are the same code on both sides and skipped.
+
+run from src/ after python build_accel.py:
+    python -m bench.accel_parity
+"""
+
+import math
+import random
+import sys
+
+import control.control as compiled
+from build_accel import is_compiled, load_pure_python
+
+
+CALLS = 100_000
+SEED = 2026
+
+
+def lowpass(mod, rng):
+    f = mod.LowPassFilter(alpha=0.3)
+    out = [f.update(rng.uniform(0.0, 50.0)) for _ in range(CALLS)]
+    return out, (f.value, f.initialized)
+
+
+def pi(mod, rng):
+    p = mod.PIController(kp=0.02, ki=5.0, ff_gain=1.0)
+    modes = list(mod.ConverterMode)
+    out = [
+        p.update(rng.uniform(15.0, 48.0), rng.uniform(0.0, 50.0), rng.uniform(5.0, 50.0), rng.choice(modes))
+        for _ in range(CALLS)
+    ]
+    return out, (p.integral, p.duty)
+
+
+def perturb_observe(mod, rng):
+    po = mod.PerturbObserve()
+    po.reset(20.0)
+    out = [po.update(rng.uniform(10.0, 50.0), rng.uniform(0.0, 10.0)) for _ in range(CALLS)]
+    return out, (po.vtarget, po.prev_power, po.direction)
+
+
+def mode_manager(mod, rng):
+    mm = mod.ModeManager()
+    out = [int(mm.update(rng.gauss(20.0, 3.0), 20.0)) for _ in range(CALLS)]
+    return out, (int(mm.mode), mm.changes, mm.suppressed)
+
+
+def duty_transition(mod, rng):
+    dt = mod.DutyTransition(step=0.03)
+    out = []
+    for k in range(CALLS):
+        if k % 50 == 0:
+            dt.reset(rng.random(), rng.random(), rng.random(), rng.random())
+        out.append(dt.update())
+    return out, (dt.duty1, dt.duty2, dt.active)
+
+
+def safety(mod, rng):
+    checker = mod.SafetyChecker()
+    out = []
+    for _ in range(CALLS):
+        m = mod.build_measurements(
+            rng.choice((rng.uniform(-5.0, 70.0), math.nan)),
+            rng.uniform(0.0, 70.0),
+            rng.uniform(-15.0, 15.0),
+            rng.uniform(-15.0, 15.0),
+        )
+        out.append((int(checker.check_code(m)), checker.check(m)))
+    return out, ()
+
+
+CASES = (
+    ("LowPassFilter", lowpass),
+    ("PIController", pi),
+    ("PerturbObserve", perturb_observe),
+    ("ModeManager", mode_manager),
+    ("DutyTransition", duty_transition),
+    ("SafetyChecker", safety),
+)
+
+
+def same(a, b) -> bool:
+    # nan == nan for this comparison
+    return a == b or repr(a) == repr(b)
+
+
+def main() -> int:
+    if not is_compiled(compiled):
+        print("control._control_accel is not built, run python build_accel.py first")
+        return 1
+
+    pure = load_pure_python()
+    failed = False
+
+    for name, case in CASES:
+        if name not in compiled.COMPILED_CLASSES:
+            print(f"{name:16s} pure python, skipped")
+            continue
+
+        out_c, state_c = case(compiled, random.Random(SEED))
+        out_p, state_p = case(pure, random.Random(SEED))
+
+        mismatches = sum(1 for a, b in zip(out_c, out_p) if not same(a, b))
+        ok = mismatches == 0 and len(out_c) == len(out_p) and same(state_c, state_p)
+        failed |= not ok
+
+        print(f"{name:16s} {len(out_c):7d} calls  mismatches {mismatches:5d}  {'PASS' if ok else 'FAIL'}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
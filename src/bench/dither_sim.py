@@ -0,0 +1,86 @@
+"""
+vout ripple and limit cycles from the hardware PWM resolution, in simulation.
+
+three plants per source voltage:
+- ideal:   the plant gets the exact duty the controller asks for
+- quant:   the plant gets the pigpio level (833 steps at 300 kHz)
+- dither:  quantized, with DutyQuantizer sigma-delta dithering
+
+P&O is frozen (po_step_v 0) so the loop sits at a fixed vtarget. after
+settling it prints vout peak to peak and std over 0.3 s, the peak to peak of
+vout averaged over 1 ms (the slow limit cycle, without tick rate dither
+ripple) and how many distinct duty levels pwm1 used.
+
+    python -m bench.dither_sim
+"""
+
+import statistics
+import sys
+
+from control.converter import ConverterConfig
+from hal.pwm import DutyQuantizer
+
+from sim.backend import SimRig
+from sim.plant import PlantParams
+
+
+SOURCES_V = (25.0, 30.0, 35.0, 40.0)
+SETTLE_S = 0.6
+MEASURE_S = 0.3
+AVERAGE_S = 0.001
+
+VARIANTS = {
+    "ideal": dict(quantize_pwm=False, pwm_dither=False),
+    "quant": dict(quantize_pwm=True, pwm_dither=False),
+    "dither": dict(quantize_pwm=True, pwm_dither=True),
+}
+
+
+def run(voc: float, quantize_pwm: bool, pwm_dither: bool) -> dict:
+    config = ConverterConfig(pi_kp=0.02, pi_ki=5.0, pi_ff_gain=1.0, po_step_v=0.0, pwm_dither=pwm_dither)
+    rig = SimRig(config, PlantParams(voc=voc), quantize_pwm=quantize_pwm)
+
+    rig.start()
+    rig.run(SETTLE_S)
+
+    vout = []
+    duty = set()
+    for _ in range(int(MEASURE_S / rig.dt)):
+        rig.step()
+        vout.append(rig.plant.vout)
+        duty.add(rig.plant.duty1)
+
+    n = max(1, int(AVERAGE_S / rig.dt))
+    averaged = [sum(vout[k:k + n]) / n for k in range(0, len(vout) - n, n)]
+
+    return {
+        "state": rig.converter.state.name,
+        "pp": max(vout) - min(vout),
+        "std": statistics.pstdev(vout),
+        "slow_pp": max(averaged) - min(averaged),
+        "levels": len(duty),
+    }
+
+
+def main() -> int:
+    config = ConverterConfig()
+    q = DutyQuantizer(config.pwm_freq, config.pwm_clock_hz, dither=True)
+    print(
+        f"{config.pwm_freq / 1e3:.0f} kHz pwm: {q.steps} steps ({q.step_duty * 100:.3f} % duty, {q.bits:.1f} bits), "
+        f"dithered over 10 ticks {q.effective_bits(10):.1f} bits"
+    )
+    print(f"{'voc':>5} {'variant':<8} {'state':<7} {'vout pp':>9} {'std':>8} {'1 ms pp':>9} {'levels':>7}")
+
+    for voc in SOURCES_V:
+        for name, variant in VARIANTS.items():
+            r = run(voc, **variant)
+            print(
+                f"{voc:5.1f} {name:<8} {r['state']:<7} {r['pp']:9.4f} {r['std']:8.4f} "
+                f"{r['slow_pp']:9.4f} {r['levels']:7d}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
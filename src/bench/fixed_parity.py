@@ -0,0 +1,164 @@
+"""
+checks the integer control path (control/fixed.py) against the float path.
+
+feeds the same raw code stream through LowPassFilter/PIController/SafetyChecker
+and their fixed point versions and reports the worst difference.
+
+run from src/:
+    python -m bench.fixed_parity
+    python -m bench.fixed_parity codes.csv      # vin,vout,iin,iout codes per line
+"""
+
+import csv
+import random
+import sys
+
+from drivers.mcp3208 import MCP3208Config
+from drivers.ina229 import INA229Config
+
+from control.control import (
+    ConverterMode,
+    LowPassFilter,
+    PIController,
+    SafetyChecker,
+    SafetyLimits,
+    build_measurements,
+)
+from control.fixed import (
+    Q_ONE,
+    RawScale,
+    FixedLowPassFilter,
+    FixedPIController,
+    RawSafetyChecker,
+)
+
+
+FILTER_TOL_CODES = 1.0 / 1024.0
+DUTY_TOL_COUNTS = 10
+
+TICKS = 200_000
+
+
+def synthetic_codes(ticks: int, seed: int = 1) -> list[tuple[int, int, int, int]]:
+    rng = random.Random(seed)
+    vin, vout, iin, iout = 2600.0, 1800.0, 40_000.0, 60_000.0
+    codes = []
+
+    for _ in range(ticks):
+        vin = min(4095.0, max(0.0, vin + rng.gauss(0.0, 6.0)))
+        vout = min(4095.0, max(0.0, vout + rng.gauss(0.0, 4.0)))
+        iin = iin + rng.gauss(0.0, 500.0)
+        iout = iout + rng.gauss(0.0, 500.0)
+        codes.append((int(vin), int(vout), int(iin), int(iout)))
+
+    return codes
+
+
+def load_codes(path: str) -> list[tuple[int, int, int, int]]:
+    with open(path, newline="") as f:
+        return [tuple(int(x) for x in row[:4]) for row in csv.reader(f) if row]
+
+
+def adc_volts(code: int, cfg: MCP3208Config) -> float:
+    # same expression as MCP3208.read_vin / read_vout
+    return ((code / 4095.0) * cfg.vref) * cfg.divider_ratio
+
+
+def run_control(codes, pi: PIController, scale: RawScale, adc_cfg: MCP3208Config) -> tuple[float, int]:
+    vin_f = LowPassFilter(alpha=0.3)
+    vout_f = LowPassFilter(alpha=0.3)
+    vin_q = FixedLowPassFilter.from_alpha(0.3)
+    vout_q = FixedLowPassFilter.from_alpha(0.3)
+    fixed_pi = FixedPIController.from_float(pi, scale)
+
+    worst_filter = 0.0
+    worst_duty = 0
+
+    for i, (vin, vout, _, _) in enumerate(codes):
+        vtarget = 16.0 + 8.0 * ((i // 5000) % 3)
+        vtarget_q = scale.volts_to_q(vtarget)
+
+        fin = vin_f.update(adc_volts(vin, adc_cfg))
+        fout = vout_f.update(adc_volts(vout, adc_cfg))
+        qin = vin_q.update(vin)
+        qout = vout_q.update(vout)
+
+        worst_filter = max(
+            worst_filter,
+            abs(qin / Q_ONE - fin / scale.volts_per_code),
+            abs(qout / Q_ONE - fout / scale.volts_per_code),
+        )
+
+        mode = ConverterMode.BUCK if fin > vtarget else ConverterMode.BOOST
+        duty = pi.update(vtarget, fout, fin, mode)
+        counts = fixed_pi.update(vtarget_q, qout, qin, mode)
+
+        worst_duty = max(worst_duty, abs(counts - scale.duty_to_counts(duty)))
+
+    return worst_filter, worst_duty
+
+
+def run_safety(scale: RawScale, adc_cfg: MCP3208Config) -> int:
+    # limits inside the sensor range so every threshold is actually crossed
+    limits = SafetyLimits(vin_min=5.0, vin_max=35.0, vout_max=30.0, iin_max=8.0, iout_max=9.0)
+    checker = SafetyChecker(limits=limits)
+    raw_checker = RawSafetyChecker.compile(limits, scale)
+
+    nominal = (2000, 1500, 0, 0)
+    mismatches = 0
+
+    def compare(vin, vout, iin, iout) -> int:
+        m = build_measurements(
+            adc_volts(vin, adc_cfg),
+            adc_volts(vout, adc_cfg),
+            scale.code_to_amps(iin),
+            scale.code_to_amps(iout),
+        )
+        return int(checker.check_code(m) != raw_checker.check(vin, vout, iin, iout))
+
+    for code in range(0, 4096):
+        mismatches += compare(code, nominal[1], nominal[2], nominal[3])
+        mismatches += compare(nominal[0], code, nominal[2], nominal[3])
+
+    for code in range(-(1 << 19), 1 << 19, 7):
+        mismatches += compare(nominal[0], nominal[1], code, nominal[3])
+        mismatches += compare(nominal[0], nominal[1], nominal[2], code)
+
+    return mismatches
+
+
+def main() -> int:
+    adc_cfg = MCP3208Config()
+    ina_cfg = INA229Config(rshunt_ohms=0.01, max_expected_current=14.0)
+    scale = RawScale.from_sensors(
+        vref=adc_cfg.vref,
+        divider_ratio=adc_cfg.divider_ratio,
+        adc_bits=adc_cfg.adc_bits,
+        current_lsb=ina_cfg.max_expected_current / (2 ** 19),
+    )
+
+    codes = load_codes(sys.argv[1]) if len(sys.argv) > 1 else synthetic_codes(TICKS)
+
+    ok = True
+
+    for name, pi in (
+        ("pi default", PIController(dt=1.0 / 30_000)),
+        ("pi with ki", PIController(dt=1.0 / 30_000, kp=0.02, ki=40.0)),
+    ):
+        worst_filter, worst_duty = run_control(codes, pi, scale, adc_cfg)
+        print(
+            f"{name:12s} filter max err {worst_filter:.6f} codes (tol {FILTER_TOL_CODES:.6f}), "
+            f"duty max err {worst_duty} counts (tol {DUTY_TOL_COUNTS})"
+        )
+        ok = ok and worst_filter <= FILTER_TOL_CODES and worst_duty <= DUTY_TOL_COUNTS
+
+    mismatches = run_safety(scale, adc_cfg)
+    print(f"safety fault code mismatches: {mismatches}")
+    ok = ok and mismatches == 0
+
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+per tick cost of channel names vs pre resolved handles in hal / drivers.
+
+one "tick" is the hardware calls of a NORMAL tick: 2 MCP3208 reads, 2 INA229
+current reads and 2 gate writes. names passes the strings every call like the
+old hot path did, handles passes the ints resolved once. the fake bus has no
+latency, zero answering devices and no chip select setup / hold sleeps, so
+what is left is the python cost of hal and drivers.
+
+    python -m bench.handle_bench
+"""
+
+import sys
+import timeit
+
+from sim import fake_hw
+
+BUS = fake_hw.install()
+
+from hal.gpio import PiGpio
+from hal.spi import PiSpi, SpiConfig
+
+from drivers.mcp3208 import MCP3208
+from drivers.ina229 import INA229, INA229Config, INA_IN, INA_OUT
+from drivers.si8274 import SI8274
+
+
+NUMBER = 20_000
+REPEAT = 7
+
+
+class ZeroDevice:
+    def xfer(self, tx: list[int], mode: int) -> list[int]:
+        return [0] * len(tx)
+
+
+def stack():
+    gpio = PiGpio()
+    gpio.init()
+    for pin in (gpio.pins.cs_ina_in, gpio.pins.cs_ina_out, gpio.pins.cs_mcp3208):
+        BUS.attach(pin, ZeroDevice())
+
+    spi = PiSpi(SpiConfig(cs_setup_s=0.0, cs_hold_s=0.0), gpio=gpio)
+    spi.init()
+
+    return gpio, spi, MCP3208(spi), INA229(spi, config=INA229Config(max_expected_current=14.0)), SI8274(gpio)
+
+
+def names_tick(spi, adc, ina, gate):
+    mcp_mode = spi.config.mode_mcp3208
+    vin_tx = bytes([0x06, 0x00, 0x00])
+    vout_tx = bytes([0x06, 0x40, 0x00])
+
+    def tick():
+        spi._transfer_manual("mcp3208", vin_tx, mcp_mode)
+        spi._transfer_manual("mcp3208", vout_tx, mcp_mode)
+        ina.read_current_raw("ina_in")
+        ina.read_current_raw("ina_out")
+        gate.enable("gd1")
+        gate.disable("gd2")
+
+    return tick
+
+
+def handles_tick(spi, adc, ina, gate):
+    gd1 = gate.handle("gd1")
+    gd2 = gate.handle("gd2")
+
+    def tick():
+        adc.read_vin_raw()
+        adc.read_vout_raw()
+        ina.read_current_raw(INA_IN)
+        ina.read_current_raw(INA_OUT)
+        gate.enable(gd1)
+        gate.disable(gd2)
+
+    return tick
+
+
+def main() -> int:
+    _, spi, adc, ina, gate = stack()
+    variants = {
+        "names": names_tick(spi, adc, ina, gate),
+        "handles": handles_tick(spi, adc, ina, gate),
+    }
+
+    best = {name: float("inf") for name in variants}
+    for _ in range(REPEAT):
+        # interleaved so drift hits both alike
+        for name, fn in variants.items():
+            best[name] = min(best[name], timeit.timeit(fn, number=NUMBER) / NUMBER)
+
+    for name, t in best.items():
+        print(f"{name:<8} {t * 1e9:8.0f} ns/tick")
+
+    saved = best["names"] - best["handles"]
+    print(f"saved    {saved * 1e9:8.0f} ns/tick ({saved / best['names']:.0%}), {saved * 30_000 * 100:.2f} % of a core at 30 kHz")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
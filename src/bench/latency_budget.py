@@ -0,0 +1,84 @@
+"""
+hardware call budget of one converter tick per state, on the fake bus.
+
+counts pigpio calls, SPI transfers and bytes per tick and turns them into
+modeled hardware time with a per call latency (account mode, so the numbers
+are deterministic). the defaults are assumptions for pigpiod over its local
+socket and spidev ioctl on a Pi 4, override them to match a measurement:
+
+    python -m bench.latency_budget [--pigpio-us 50] [--spi-us 20] [--spi-hz 1000000] [--ticks 1000]
+"""
+
+import argparse
+
+from bench.suite import BUS, converter_in
+from control.control import ConverterState
+from sim import fake_hw
+
+
+STATES = {
+    "standby": ({}, ConverterState.STANDBY),
+    "standby_full": ({"standby_rate": 0}, ConverterState.STANDBY),
+    "startup": ({}, ConverterState.STARTUP),
+    "normal": ({}, ConverterState.NORMAL),
+    "normal_fixed": ({"fixed_point": True}, ConverterState.NORMAL),
+    "fault": ({}, ConverterState.FAULT),
+}
+
+
+def budget(state: ConverterState, ticks: int, **config) -> dict:
+    converter = converter_in(state, **config)
+
+    if state == ConverterState.STANDBY:
+        # the standby poll runs off the clock, let it tick at pi_rate
+        now = [0.0]
+        converter.clock = lambda: now[0]
+    else:
+        now = None
+
+    BUS.reset_counters()
+    for _ in range(ticks):
+        converter.update_converter()
+        if now is not None:
+            now[0] += 1.0 / converter.config.pi_rate
+
+    return {
+        "pigpio_calls": BUS.pigpio_calls / ticks,
+        "transfers": BUS.transfers / ticks,
+        "bytes": BUS.bytes / ticks,
+        "hw_us": BUS.hw_time_s / ticks * 1e6,
+        "pi_rate": converter.config.pi_rate,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pigpio-us", type=float, default=50.0, help="latency per pigpio call")
+    parser.add_argument("--spi-us", type=float, default=20.0, help="latency per xfer2")
+    parser.add_argument("--spi-hz", type=int, default=0, help="wire time from this clock instead of SpiDev.max_speed_hz")
+    parser.add_argument("--ticks", type=int, default=1000)
+    args = parser.parse_args()
+
+    BUS.latency = fake_hw.Latency(
+        pigpio_call_s=args.pigpio_us * 1e-6,
+        spi_call_s=args.spi_us * 1e-6,
+        spi_byte_s=8.0 / args.spi_hz if args.spi_hz else None,
+        mode="account",
+    )
+
+    print(f"pigpio {args.pigpio_us:g} us/call, spi {args.spi_us:g} us/transfer")
+    print(f"{'state':<14} {'pigpio':>8} {'xfers':>7} {'bytes':>7} {'hw us':>9} {'of period':>10}")
+
+    for name, (config, state) in STATES.items():
+        r = budget(state, args.ticks, **config)
+        share = r["hw_us"] * 1e-6 * r["pi_rate"]
+        print(
+            f"{name:<14} {r['pigpio_calls']:>8.1f} {r['transfers']:>7.1f} {r['bytes']:>7.1f} "
+            f"{r['hw_us']:>9.1f} {share:>9.0%}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
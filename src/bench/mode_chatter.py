@@ -0,0 +1,113 @@
+"""
+ModeManager chatter on recorded Vin traces.
+
+replays (vin, vtarget) samples through a ModeManager set up like the old
+single threshold one (exit margin = margin, no dwell, no rate limit) and
+through the ConverterConfig defaults, and prints mode changes for each.
+
+traces are fault capture files (control/fault_capture.py, vin and vtarget
+columns). without arguments a trace is recorded from the sim plant with a
+swinging source and P&O moving vtarget, using the old style manager.
+
+run from src/:
+    python -m bench.mode_chatter [capture.bin ...]
+"""
+
+import math
+import sys
+
+from control.control import ConverterState, ModeManager
+from control.converter import ConverterConfig
+from control import fault_capture
+
+from sim.backend import SimRig
+from sim.plant import BuckBoostPlant, PlantParams
+
+
+SIM_SECONDS = 3.0
+
+# gains that hold NORMAL on the sim plant
+KP = 0.02
+KI = 5.0
+FF_GAIN = 1.0
+
+
+def legacy_config(config: ConverterConfig) -> ConverterConfig:
+    config.mode_exit_margin_v = config.mode_margin_v
+    config.mode_dwell_s = 0.0
+    config.mode_max_changes = 0
+    return config
+
+
+def manager_for(config: ConverterConfig) -> ModeManager:
+    return ModeManager(
+        margin_v=config.mode_margin_v,
+        exit_margin_v=config.mode_exit_margin_v,
+        dt=1.0 / config.pi_rate,
+        dwell_s=config.mode_dwell_s,
+        max_changes=config.mode_max_changes,
+        rate_window_s=config.mode_rate_window_s,
+    )
+
+
+def sim_trace() -> list[tuple[float, float]]:
+    def voc_profile(t: float) -> float:
+        return 22.0 + 8.0 * math.sin(2.0 * math.pi * t)
+
+    plant = BuckBoostPlant(PlantParams(r_load=40.0), voc_profile=voc_profile)
+    rig = SimRig(legacy_config(ConverterConfig()), plant=plant)
+    converter = rig.converter
+
+    converter.pi.kp = KP
+    converter.pi.ki = KI
+    converter.pi.ff_gain = FF_GAIN
+
+    rig.start()
+    rig.run(1.0, until=lambda r: r.converter.state == ConverterState.NORMAL)
+
+    trace = []
+    while rig.time() < SIM_SECONDS and converter.state == ConverterState.NORMAL:
+        rig.step()
+        trace.append((converter.vin_filter.value, converter.vtarget))
+
+    return trace
+
+
+def capture_trace(path: str) -> list[tuple[float, float]]:
+    capture = fault_capture.load(path)
+    vin = capture["fields"].index("vin")
+    vtarget = capture["fields"].index("vtarget")
+
+    return [(row[vin], row[vtarget]) for row in capture["samples"]]
+
+
+def replay(manager: ModeManager, trace: list[tuple[float, float]]) -> ModeManager:
+    manager.reset()
+    for vin, vtarget in trace:
+        manager.update(vin, vtarget)
+    return manager
+
+
+def main() -> int:
+    if len(sys.argv) > 1:
+        traces = [(path, capture_trace(path)) for path in sys.argv[1:]]
+    else:
+        traces = [("sim", sim_trace())]
+
+    config = ConverterConfig()
+    tick_s = 1.0 / config.pi_rate
+
+    for name, trace in traces:
+        seconds = len(trace) * tick_s
+        print(f"{name}: {len(trace)} samples, {seconds:.3f} s")
+
+        for label, cfg in (("single threshold", legacy_config(ConverterConfig())), ("hysteresis + dwell", config)):
+            manager = replay(manager_for(cfg), trace)
+            rate = manager.changes / seconds if seconds else 0.0
+            print(f"  {label:20s} changes {manager.changes:6d} ({rate:8.1f} /s)  suppressed ticks {manager.suppressed}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
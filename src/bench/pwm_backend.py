@@ -0,0 +1,130 @@
+"""
+PWM backends and the preloaded soft start ramp on the fake bus.
+
+- update cost: set_duties through pigpio (two hardware_PWM requests of
+  --pigpio-us spun latency each) vs MmapPwm storing DAT1 / DAT2 in the
+  FakePwmBlock registers. prints pigpio calls and the host side window per
+  update, and checks both leave the same levels in the registers.
+- ramp: runs the PiPwm ramp script through the fake interpreter and checks
+  the timeline the daemon would play against the SimPwm playback of the same
+  ramp: step times, step sizes and the final duty.
+
+    python -m bench.pwm_backend [--pigpio-us 50] [--updates 2000]
+"""
+
+import argparse
+import sys
+
+from bench.suite import BUS
+from sim import fake_hw
+
+from hal.gpio import PiGpio
+from hal.pwm import PiPwm, PwmConfig
+from hal.pwm_mmap import MmapPwm, REG_DAT1, REG_DAT2
+
+from sim.backend import SimPwm
+from sim.plant import BuckBoostPlant, PlantParams
+
+
+RAMP = (0.0, 0.45, 0.03, 1e-4)  # start, end, duration s, step s
+
+
+def make_pwm(backend: str):
+    gpio = PiGpio()
+    gpio.init()
+
+    config = PwmConfig(frequency_hz=300_000, max_duty=0.95)
+    pwm = MmapPwm(gpio, config, block=BUS.pwm_block) if backend == "mmap" else PiPwm(gpio, config)
+    pwm.init()
+    return pwm
+
+
+def run_updates(backend: str, updates: int) -> tuple[object, float, tuple[int, int]]:
+    pwm = make_pwm(backend)
+
+    BUS.reset_counters()
+    for k in range(updates):
+        pwm.set_duties(0.40 + 1e-4 * (k % 10), 0.20)
+
+    words = BUS.pwm_block.words
+    levels = (words[REG_DAT1 >> 2], words[REG_DAT2 >> 2])
+    calls = BUS.pigpio_calls / updates
+    pwm.deinit()
+    return pwm.skew, calls, levels
+
+
+def script_timeline() -> list[tuple[float, int]]:
+    pwm = make_pwm("pigpio")
+    pin = pwm.gpio.pins.pwm1
+
+    BUS.log_pwm = True
+    BUS.pwm_events.clear()
+    BUS.reset_counters()
+    started = pwm.start_ramp(*RAMP)
+    calls = BUS.pigpio_calls
+    BUS.log_pwm = False
+
+    pwm.deinit()
+    if not started:
+        raise RuntimeError("ramp script did not start")
+
+    print(f"ramp     {calls} pigpio call for the whole ramp")
+    return [(t, dc) for t, gpio, dc in BUS.pwm_events if gpio == pin]
+
+
+def sim_timeline() -> list[tuple[float, int]]:
+    plant = BuckBoostPlant(PlantParams())
+    pwm = SimPwm(plant)
+    pwm.start_ramp(*RAMP)
+
+    dt = RAMP[3] / 4
+    timeline = []
+    last = None
+    while True:
+        counts = int(round(plant.duty1 * 1_000_000))
+        if counts != last:
+            timeline.append((plant.t, counts))
+            last = counts
+        if not pwm.ramp_running:
+            return timeline
+        plant.t += dt
+        pwm.advance_ramp()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pigpio-us", type=float, default=50.0)
+    parser.add_argument("--updates", type=int, default=2000)
+    args = parser.parse_args()
+
+    BUS.latency = fake_hw.Latency(pigpio_call_s=args.pigpio_us * 1e-6, mode="spin")
+
+    levels = {}
+    for backend in ("pigpio", "mmap"):
+        skew, calls, levels[backend] = run_updates(backend, args.updates)
+        print(
+            f"{backend:<8} pigpio calls/update {calls:4.1f}  window mean {skew.mean_s * 1e6:7.2f} us  "
+            f"max {skew.max_s * 1e6:7.2f} us  dat {levels[backend]}"
+        )
+
+    BUS.latency = fake_hw.Latency()
+
+    script = script_timeline()
+    sim = sim_timeline()
+    # the script writes every step, the sim playback only shows changes
+    script = [e for k, e in enumerate(script) if k == 0 or e[1] != script[k - 1][1]]
+
+    same_steps = [dc for _, dc in script] == [dc for _, dc in sim]
+    max_dt = max((abs(a[0] - b[0]) for a, b in zip(script, sim)), default=0.0)
+    print(
+        f"ramp     {len(script)} levels, last {script[-1][1]} at {script[-1][0] * 1e3:.2f} ms, "
+        f"sim playback {'matches' if same_steps else 'DIFFERS'} (max step time error {max_dt * 1e6:.1f} us)"
+    )
+
+    ok = same_steps and max_dt <= RAMP[3] / 4 + 1e-9 and levels["pigpio"] == levels["mmap"]
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""
+pwm1 -> pwm2 window of set_duties: PiPwm (two hardware_PWM requests back to
+back) vs MmapPwm (two stores into the PWM data registers).
+
+runs on the fake bus with a spun per call pigpio latency (the daemon round
+trip, 50 us by default, an assumption for pigpiod over its local socket) and
+prints the PwmSkew window and pigpio calls per update for both.
+
+    python -m bench.pwm_skew [--pigpio-us 50] [--updates 2000]
+"""
+
+import argparse
+import sys
+
+from bench.suite import BUS, driver_stack
+from sim import fake_hw
+
+
+def run(backend: str, updates: int) -> tuple[object, float]:
+    _, _, pwm = driver_stack(pwm_backend=backend)
+
+    BUS.reset_counters()
+    for k in range(updates):
+        pwm.set_duties(0.40 + 1e-4 * (k % 10), 0.20)
+
+    return pwm.skew, BUS.pigpio_calls / updates
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pigpio-us", type=float, default=50.0)
+    parser.add_argument("--updates", type=int, default=2000)
+    args = parser.parse_args()
+
+    BUS.latency = fake_hw.Latency(pigpio_call_s=args.pigpio_us * 1e-6, mode="spin")
+
+    for backend in ("pigpio", "mmap"):
+        skew, calls = run(backend, args.updates)
+        print(
+            f"{backend:<6}  pigpio calls/update {calls:4.1f}  window mean {skew.mean_s * 1e6:8.2f} us  "
+            f"max {skew.max_s * 1e6:8.2f} us"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
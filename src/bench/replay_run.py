@@ -0,0 +1,175 @@
+"""
+records a sensor stream and replays it through Converter.
+
+    python -m bench.replay_run record run.rec [--seconds 0.5] [--voc 30]
+    python -m bench.replay_run play run.rec [--set name=value ...]
+    python -m bench.replay_run ab run.rec --a name=value ... --b name=value ...
+
+record runs the sim plant with the tuned gains and writes the recording
+(on the Pi, wrap the converter in sim.replay.Recorder instead). play replays
+it as fast as possible and prints ticks / s, a load test of the control loop.
+ab replays it under two settings and prints where the outputs first differ.
+
+settings are ConverterConfig fields, or pi.<attr> for PIController
+attributes set after construction, e.g. --b pi.kp=0.03 --b fixed_point=true.
+values are converted to the type of the field
+"""
+
+import argparse
+from dataclasses import fields
+import sys
+import time
+import types
+
+from control.control import ConverterState, PIController
+from control.converter import ConverterConfig
+
+from sim.backend import SimRig
+from sim.plant import PlantParams
+from sim.replay import Recorder, ReplayRig, Trace, compare, load
+
+
+# gains that hold NORMAL on the sim plant, settings override them
+TUNED = dict(pi_kp=0.02, pi_ki=5.0)
+
+CONFIG_FIELDS = {f.name: f.type for f in fields(ConverterConfig)}
+PI_FIELDS = {f.name: f.type for f in fields(PIController)}
+
+TRUE = ("1", "true", "yes", "on")
+FALSE = ("0", "false", "no", "off")
+
+
+def parse_value(name: str, kind, text: str):
+    """
+    text converted to the type of the dataclass field, X | None takes "none"
+    """
+    if isinstance(kind, types.UnionType):
+        options = [k for k in kind.__args__ if k is not type(None)]
+        if text.lower() == "none" and len(options) < len(kind.__args__):
+            return None
+        kind = options[0]
+
+    if kind is bool:
+        if text.lower() in TRUE:
+            return True
+        if text.lower() in FALSE:
+            return False
+        raise SystemExit(f"{name}: expected true or false, got {text!r}")
+
+    try:
+        return kind(text)
+    except ValueError:
+        raise SystemExit(f"{name}: expected {kind.__name__}, got {text!r}") from None
+
+
+def parse_settings(items: list[str]) -> tuple[dict, dict]:
+    config = {}
+    pi = {}
+
+    for item in items or ():
+        name, _, text = item.partition("=")
+
+        if name.startswith("pi.") and name[3:] in PI_FIELDS:
+            pi[name[3:]] = parse_value(name, PI_FIELDS[name[3:]], text)
+        elif name == "pi_rate":
+            raise SystemExit("pi_rate comes from the recording")
+        elif name in CONFIG_FIELDS:
+            config[name] = parse_value(name, CONFIG_FIELDS[name], text)
+        else:
+            raise SystemExit(f"unknown setting {name}")
+
+    return config, pi
+
+
+def replay_rig(recording, items: list[str]) -> ReplayRig:
+    config, pi = parse_settings(items)
+    rig = ReplayRig(recording, ConverterConfig(pi_rate=recording.pi_rate, **{**TUNED, **config}))
+
+    for name, value in pi.items():
+        setattr(rig.converter.pi, name, value)
+
+    return rig
+
+
+def record(args) -> int:
+    rig = SimRig(ConverterConfig(**TUNED), PlantParams(voc=args.voc))
+
+    recorder = Recorder(rig.converter)
+    rig.start()
+
+    plant = rig.plant
+    while plant.t < args.seconds:
+        plant.step(rig.dt)
+        status = recorder.update_converter()
+
+    recorder.save(args.path)
+    print(f"{len(recorder.recording)} frames, ends in {status.state.name} {status.mode.name}, wrote {args.path}")
+    return 0
+
+
+def play(args) -> int:
+    recording = load(args.path)
+    rig = replay_rig(recording, args.set)
+
+    start = time.perf_counter()
+    rig.run()
+    elapsed = time.perf_counter() - start
+
+    n = len(recording)
+    print(
+        f"{n} ticks in {elapsed:.3f} s, {n / elapsed:,.0f} ticks/s "
+        f"({n / elapsed / recording.pi_rate:.2f}x real time), ends in {rig.converter.state.name}"
+    )
+    return 0
+
+
+def ab(args) -> int:
+    recording = load(args.path)
+
+    a = replay_rig(recording, args.a).run(Trace())
+    b = replay_rig(recording, args.b).run(Trace())
+    diff = compare(a, b, tolerance=args.tolerance)
+
+    if diff.identical:
+        print(f"identical over {diff.ticks} ticks")
+        return 0
+
+    k = diff.first_tick
+    print(f"first difference at tick {k} ({k / recording.pi_rate * 1e3:.2f} ms)")
+    print(f"  a: {ConverterState(a.state[k]).name} d1 {a.duty1[k]:.4f} d2 {a.duty2[k]:.4f} vtarget {a.vtarget[k]:.3f}")
+    print(f"  b: {ConverterState(b.state[k]).name} d1 {b.duty1[k]:.4f} d2 {b.duty2[k]:.4f} vtarget {b.vtarget[k]:.3f}")
+    print(
+        f"state differs on {diff.state_ticks} ticks, mode on {diff.mode_ticks}, "
+        f"max duty diff {diff.max_duty_diff:.4f}, max vtarget diff {diff.max_vtarget_diff:.3f} V"
+    )
+    return 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("record", help="record the sim plant")
+    p.add_argument("path")
+    p.add_argument("--seconds", type=float, default=0.5)
+    p.add_argument("--voc", type=float, default=30.0)
+    p.set_defaults(func=record)
+
+    p = sub.add_parser("play", help="replay as fast as possible")
+    p.add_argument("path")
+    p.add_argument("--set", action="append", metavar="NAME=VALUE")
+    p.set_defaults(func=play)
+
+    p = sub.add_parser("ab", help="replay under two settings and compare")
+    p.add_argument("path")
+    p.add_argument("--a", action="append", metavar="NAME=VALUE")
+    p.add_argument("--b", action="append", metavar="NAME=VALUE")
+    p.add_argument("--tolerance", type=float, default=0.0)
+    p.set_defaults(func=ab)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+times the per tick safety check.
+
+- legacy:     SafetyChecker.check as it was before fault codes (list + isfinite loop)
+- check_code: float fast path on Measurements
+- raw:        RawSafetyChecker.check on raw codes
+
+run from src/:
+    python -m bench.safety_bench
+"""
+
+import math
+import sys
+import timeit
+
+from control.control import SafetyChecker, SafetyLimits, build_measurements
+from control.fixed import RawScale, RawSafetyChecker
+
+
+NUMBER = 200_000
+REPEAT = 5
+
+
+def legacy_check(limits: SafetyLimits, m) -> str | None:
+    values = [m.vin, m.vout, m.iin, m.iout, m.powin, m.powout]
+
+    for value in values:
+        if not math.isfinite(value):
+            return "non finite sensor value"
+
+    if m.vin < limits.vin_min:
+        return f"input undervoltage: {m.vin:.3f} V"
+
+    if m.vin > limits.vin_max:
+        return f"input overvoltage: {m.vin:.3f} V"
+
+    if m.vout > limits.vout_max:
+        return f"output overvoltage: {m.vout:.3f} V"
+
+    if abs(m.iin) > limits.iin_max:
+        return f"input overcurrent: {m.iin:.3f} A"
+
+    if abs(m.iout) > limits.iout_max:
+        return f"output overcurrent: {m.iout:.3f} A"
+
+    return None
+
+
+def best_ns(stmt) -> float:
+    return min(timeit.repeat(stmt, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e9
+
+
+def main() -> int:
+    limits = SafetyLimits()
+    checker = SafetyChecker(limits=limits)
+    scale = RawScale.from_sensors(vref=3.3, divider_ratio=12.5, adc_bits=12, current_lsb=14.0 / 2 ** 19)
+    raw_checker = RawSafetyChecker.compile(limits, scale)
+
+    m = build_measurements(25.0, 18.0, 4.0, 5.0)
+    vin, vout = 2482, 1787
+    iin, iout = 149_796, 187_245
+
+    results = {
+        "legacy": best_ns(lambda: legacy_check(limits, m)),
+        "check": best_ns(lambda: checker.check(m)),
+        "check_code": best_ns(lambda: checker.check_code(m)),
+        "raw": best_ns(lambda: raw_checker.check(vin, vout, iin, iout)),
+    }
+
+    base = results["legacy"]
+    for name, ns in results.items():
+        print(f"{name:12s} {ns:8.1f} ns/call  {base / ns:5.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+tick lateness of the control loop next to a busy telemetry consumer, in one
+process vs split (core.py / services.py).
+
+the loop is SimRig.step paced on the wall clock at --rate, pushing one
+telemetry frame per tick into a ShmRing. the consumer pops the frames and
+runs --work iterations of pure Python statistics on each, standing in for
+logging / analysis on the service side. modes:
+- alone: the loop without a consumer
+- thread: the consumer in a thread of the loop's process, the GIL is shared
+- split: the loop in its own (spawned) process, the consumer in this one;
+  --fifo makes the loop process SCHED_FIFO, --cpu pins it
+
+lateness is how long after its scheduled time each tick started. prints
+p50 / p99 / max and the count over --deadline-us per mode.
+
+run from src/:
+    python -m bench.split_jitter [--rate 2000] [--seconds 3] [--work 3000] [--fifo 50] [--cpu 1]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+from control.converter import ConverterConfig
+from control.shm_ring import TELEMETRY_FMT, ShmRing
+
+from core import isolate
+from sim.backend import SimRig
+from sim.plant import PlantParams
+
+
+MODES = ("alone", "thread", "split")
+
+
+def run_loop(rate: float, seconds: float, ring_name: str | None, cpu: int | None = None, fifo: int = 0) -> dict:
+    problems = isolate(cpu, fifo)
+
+    rig = SimRig(ConverterConfig(), PlantParams(voc=30.0))
+    rig.start()
+    ring = ShmRing.attach(ring_name, TELEMETRY_FMT) if ring_name else None
+
+    period_s = 1.0 / rate
+    ticks = int(seconds * rate)
+    late = [0.0] * ticks
+
+    next_s = time.monotonic() + period_s
+    for n in range(ticks):
+        sleep_s = next_s - time.monotonic()
+        if sleep_s > 0:
+            time.sleep(sleep_s)
+
+        now = time.monotonic()
+        late[n] = now - next_s
+        next_s += period_s
+        if now > next_s:
+            next_s = now + period_s  # no catch up bursts after an overrun
+
+        status = rig.step()
+        if ring is not None:
+            p = rig.plant
+            ring.push(now, n, status.state, status.mode, status.fault_code,
+                      p.vin, p.vout, p.iin, p.iout, status.duty1, status.duty2, status.vtarget)
+
+    if ring is not None:
+        ring.close()
+
+    return dict(late=late, problems=problems)
+
+
+def _run_loop_child(queue, rate, seconds, ring_name, cpu, fifo) -> None:
+    queue.put(run_loop(rate, seconds, ring_name, cpu, fifo))
+
+
+class Consumer:
+    def __init__(self, ring: ShmRing, work: int, window: int = 256):
+        self.ring = ring
+        self.work = work
+        self.window = [0.0] * window
+        self.frames = 0
+        self.stop = False
+
+    def analyse(self, frame: tuple) -> None:
+        window = self.window
+        window[self.frames % len(window)] = frame[6]
+        self.frames += 1
+
+        # mean and variance the slow way, on purpose
+        total = 0.0
+        total2 = 0.0
+        for k in range(self.work):
+            v = window[k % len(window)]
+            total += v
+            total2 += v * v
+
+    def run(self) -> None:
+        while not self.stop:
+            frames = self.ring.pop()
+            if not frames:
+                time.sleep(0.001)
+                continue
+            for frame in frames:
+                self.analyse(frame)
+
+        for frame in self.ring.pop():
+            self.analyse(frame)
+
+
+def summary(name: str, late: list[float], deadline_s: float, extra: str = "") -> str:
+    ordered = sorted(late)
+    n = len(ordered)
+    over = sum(1 for v in ordered if v > deadline_s)
+    return (
+        f"{name:7s} p50 {ordered[n // 2] * 1e6:7.1f} us  p99 {ordered[int(n * 0.99)] * 1e6:8.1f} us  "
+        f"max {ordered[-1] * 1e6:8.1f} us  over {deadline_s * 1e6:.0f} us {over:5d} / {n}{extra}"
+    )
+
+
+def run_mode(mode: str, args) -> str:
+    if mode == "alone":
+        result = run_loop(args.rate, args.seconds, None)
+        return summary(mode, result["late"], args.deadline_us * 1e-6)
+
+    ring = ShmRing.create(TELEMETRY_FMT, capacity=1 << 12)
+    consumer = Consumer(ring, args.work)
+
+    try:
+        if mode == "thread":
+            worker = threading.Thread(target=consumer.run, daemon=True)
+            worker.start()
+            result = run_loop(args.rate, args.seconds, ring.name)
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            queue = ctx.Queue()
+            child = ctx.Process(
+                target=_run_loop_child,
+                args=(queue, args.rate, args.seconds, ring.name, args.cpu, args.fifo),
+            )
+            worker = threading.Thread(target=consumer.run, daemon=True)
+            child.start()
+            worker.start()
+            result = queue.get()
+            child.join()
+
+        consumer.stop = True
+        worker.join()
+
+        extra = f"  frames {consumer.frames}, {ring.dropped} dropped"
+        for problem in result["problems"]:
+            extra += f"  (without {problem})"
+        return summary(mode, result["late"], args.deadline_us * 1e-6, extra)
+
+    finally:
+        ring.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=2000.0, help="loop rate in Hz")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--work", type=int, default=3000, help="consumer iterations per frame")
+    parser.add_argument("--deadline-us", type=float, default=500.0)
+    parser.add_argument("--fifo", type=int, default=0, help="SCHED_FIFO priority of the split loop")
+    parser.add_argument("--cpu", type=int, default=None, help="pin the split loop to this cpu")
+    parser.add_argument("--modes", default=",".join(MODES))
+    args = parser.parse_args()
+
+    print(f"{args.rate:.0f} Hz for {args.seconds:.1f} s, consumer work {args.work}, cpus {len(os.sched_getaffinity(0))}")
+    for mode in args.modes.split(","):
+        print(run_mode(mode, args))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
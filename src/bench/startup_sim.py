@@ -0,0 +1,67 @@
+"""
+soft start duration and inrush in simulation.
+
+starts the converter on the sim plant over a range of source voltages with
+- legacy: fixed 0.05 s ramp to 0.25 duty, no inrush limit (old 1500 tick ramp)
+- current: ConverterConfig soft start defaults
+- script: the defaults with the ramp preloaded as a pigpio script
+  (startup_ramp_script), SimPwm plays it against plant time
+and prints time to NORMAL, peak input current and the StartupStats summary.
+
+run from src/:
+    python -m bench.startup_sim
+"""
+
+import math
+import sys
+
+from control.control import ConverterState
+from control.converter import ConverterConfig
+
+from sim.backend import SimRig
+from sim.plant import PlantParams
+
+
+SOURCES_V = (20.0, 25.0, 30.0, 35.0, 40.0)
+
+LEGACY = dict(
+    startup_time_s=0.05,
+    startup_end_duty=0.25,
+    startup_vout_target=0.0,
+    startup_inrush_limit=math.inf,
+)
+
+
+def run(config: ConverterConfig, voc: float) -> tuple[float, float, object]:
+    rig = SimRig(config, PlantParams(voc=voc))
+    rig.start()
+
+    rig.run(1.0, until=lambda r: r.converter.state != ConverterState.STANDBY)
+    started = rig.time()
+    rig.run(1.0, until=lambda r: r.converter.state != ConverterState.STARTUP)
+
+    stats = rig.converter.soft_start.stats
+    return rig.time() - started, stats.peak_iin, rig.converter.state
+
+
+def main() -> int:
+    for name, overrides in (("legacy", LEGACY), ("current", {}), ("script", dict(startup_ramp_script=True))):
+        config = ConverterConfig(**overrides)
+        durations = []
+
+        print(name)
+        for voc in SOURCES_V:
+            duration, peak, state = run(config, voc)
+            durations.append(duration)
+            print(f"  voc {voc:5.1f} V  time to {state.name:6s} {duration * 1e3:6.1f} ms  peak iin {peak:5.2f} A")
+
+        print(
+            f"  min {min(durations) * 1e3:.1f} ms  mean {sum(durations) / len(durations) * 1e3:.1f} ms  "
+            f"max {max(durations) * 1e3:.1f} ms"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
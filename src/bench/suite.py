@@ -0,0 +1,435 @@
+"""
+benchmark suite for the control and driver layers.
+
+runs offline: pigpio and spidev are replaced by sim/fake_hw.py, so the real
+PiGpio / PiSpi / PiPwm / MCP3208 / INA229 code paths are timed, only the
+bottom pigpio / spidev calls are fakes.
+
+    python -m bench.suite run [-o results.json] [-k filter] [--quick]
+    python -m bench.suite compare base.json new.json [--threshold 0.10]
+
+run writes ns per call for every benchmark as json (default
+bench/results/<time>.json). compare prints the ratio new / base per
+benchmark and exits 1 when any of them is slower than base by more than
+threshold, so a baseline taken before a hot path change can be checked
+after it.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+
+from sim import fake_hw
+
+BUS = fake_hw.install()
+
+from hal.gpio import GpioPins, PiGpio
+from hal.spi import PiSpi
+from hal.pwm import PiPwm, PwmConfig
+from hal.pwm_mmap import MmapPwm
+
+from drivers.mcp3208 import MCP3208
+from drivers.ina229 import INA229, INA229Config
+
+import control.control as cc
+from control.control import ConverterMode, ConverterState
+from control.converter import Converter, ConverterConfig
+from control.fault_capture import FaultCapture
+from control.fixed import FixedLowPassFilter, FixedPIController, RawSafetyChecker, RawScale
+from control.protection import ProtectionEngine
+
+from build_accel import is_compiled
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+REPEAT = 5
+MIN_TIME_S = 0.2
+QUICK_MIN_TIME_S = 0.02
+
+# what the fake hardware sees: 30 V in (10 V while parked in standby), 20 V out, 2 A
+VIN = 30.0
+VIN_LOW = 10.0
+VOUT = 20.0
+CURRENT = 2.0
+
+# the same values as codes, for the raw / fixed point benchmarks
+VOLTS_PER_CODE = 3.3 * 12.5 / 4095
+CURRENT_LSB = 14.0 / 2 ** 19
+VIN_CODE = int(VIN / VOLTS_PER_CODE)
+VOUT_CODE = int(VOUT / VOLTS_PER_CODE)
+CURRENT_CODE = int(CURRENT / CURRENT_LSB)
+
+PINS = GpioPins()
+
+
+# -------------- fake hardware --------------
+
+def attach_devices(vin: float = VIN) -> list[float]:
+    """
+    register models on the bus, returns [vin] so callers can move the input
+    """
+    source = [vin]
+    fake_hw.attach_default_devices(BUS, vin=lambda: source[0], vout=VOUT, iin=CURRENT, iout=CURRENT)
+    return source
+
+
+def driver_stack(pwm_backend: str = "pigpio"):
+    attach_devices()
+
+    gpio = PiGpio()
+    gpio.init()
+    spi = PiSpi(gpio=gpio)
+    spi.init()
+
+    config = PwmConfig(frequency_hz=300_000, max_duty=0.95)
+    if pwm_backend == "mmap":
+        pwm = MmapPwm(gpio, config, block=BUS.pwm_block)
+    else:
+        pwm = PiPwm(gpio=gpio, config=config)
+    pwm.init()
+
+    adc = MCP3208(spi)
+    ina = INA229(spi, config=INA229Config(max_expected_current=14.0))
+    ina.initialize_all_ina()
+
+    return adc, ina, pwm
+
+
+# -------------- benchmarks --------------
+# each returns a zero argument callable doing one call / tick
+
+def bench_mcp3208_read_raw():
+    adc, _, _ = driver_stack()
+    return lambda: adc.read_raw(0)
+
+
+def bench_ina229_read_current():
+    _, ina, _ = driver_stack()
+    return lambda: ina.read_current("ina_in")
+
+
+def bench_pwm_set_duty():
+    _, _, pwm = driver_stack()
+    return lambda: pwm.set_duty("pwm1", 0.4)
+
+
+def bench_pwm_set_duty_counts():
+    _, _, pwm = driver_stack()
+    return lambda: pwm.set_duty_counts("pwm1", 400_000)
+
+
+def bench_pwm_set_duties():
+    _, _, pwm = driver_stack()
+    return lambda: pwm.set_duties(0.4, 0.2)
+
+
+def bench_pwm_set_duties_mmap():
+    _, _, pwm = driver_stack(pwm_backend="mmap")
+    return lambda: pwm.set_duties(0.4, 0.2)
+
+
+def bench_gpio_force_safe_outputs():
+    _, _, pwm = driver_stack()
+    return pwm.gpio.force_safe_outputs
+
+
+def bench_safety_check():
+    checker = cc.SafetyChecker()
+    m = cc.build_measurements(30.0, 20.0, 2.0, 2.0)
+    return lambda: checker.check(m)
+
+
+def bench_safety_check_code():
+    checker = cc.SafetyChecker()
+    m = cc.build_measurements(30.0, 20.0, 2.0, 2.0)
+    return lambda: checker.check_code(m)
+
+
+def bench_lowpass():
+    f = cc.LowPassFilter(alpha=0.3)
+    f.reset(20.0)
+    return lambda: f.update(20.1)
+
+
+def bench_debounce():
+    d = cc.Debounce()
+    return lambda: d.update(10.0)
+
+
+def bench_soft_start():
+    s = cc.SoftStartController(vout_target=15.0)
+    s.reset(0.0)
+    return lambda: s.update(0.0, 30.0, 5.0, 1.0)
+
+
+def bench_pi():
+    pi = cc.PIController(kp=0.02, ki=5.0, ff_gain=1.0)
+    pi.reset(0.5)
+    return lambda: pi.update(20.0, 19.9, 30.0, ConverterMode.BUCK)
+
+
+def bench_perturb_observe():
+    po = cc.PerturbObserve()
+    po.reset(20.0)
+    return lambda: po.update(30.0, 2.0)
+
+
+def bench_mode_manager():
+    mm = cc.ModeManager()
+    mm.reset(ConverterMode.BUCK)
+    return lambda: mm.update(30.0, 20.0)
+
+
+def bench_duty_transition():
+    t = cc.DutyTransition(step=0.03)
+    return lambda: t.update()
+
+
+def bench_mode_transition():
+    t = cc.ModeTransition(duration_s=1e9)
+    t.reset(0.0, 0.5, 0.0, ConverterMode.BOOST)
+    return lambda: t.update(1.0, 0.3)
+
+
+def bench_fixed_lowpass():
+    f = FixedLowPassFilter.from_alpha(0.3)
+    f.reset(VOUT_CODE << 16)
+    return lambda: f.update(VOUT_CODE + 1)
+
+
+def bench_fixed_pi():
+    scale = RawScale(VOLTS_PER_CODE, CURRENT_LSB)
+    pi = FixedPIController.from_float(cc.PIController(kp=0.02, ki=5.0, ff_gain=1.0), scale)
+    pi.reset(500_000)
+    vtarget_q = scale.volts_to_q(20.0)
+    vout_q = scale.volts_to_q(19.9)
+    vin_q = scale.volts_to_q(30.0)
+    return lambda: pi.update(vtarget_q, vout_q, vin_q, ConverterMode.BUCK)
+
+
+def bench_raw_safety():
+    checker = RawSafetyChecker.compile(cc.SafetyLimits(), RawScale(VOLTS_PER_CODE, CURRENT_LSB))
+    return lambda: checker.check(VIN_CODE, VOUT_CODE, CURRENT_CODE, CURRENT_CODE)
+
+
+def bench_protection():
+    p = ProtectionEngine()
+    return lambda: p.update(30.0, 20.0, 2.0, 2.0)
+
+
+def bench_fault_capture_record():
+    capture = FaultCapture()
+    return lambda: capture.record(0.0, 1, 3, 0, 30.0, 20.0, 2.0, 2.0, 0.6, 0.0, 20.0, 10.0, 5.0)
+
+
+def converter_in(state: ConverterState, **config):
+    """
+    Converter on the fake hardware, driven into state. the clock is frozen
+    so STARTUP holds, NORMAL is reached by jumping it past the ramp.
+    """
+    vin = attach_devices(vin=VIN_LOW)
+
+    converter = Converter(ConverterConfig(**config))
+    now = [0.0]
+    converter.clock = lambda: now[0]
+
+    converter.enter_standby()
+    if state == ConverterState.STANDBY:
+        return converter
+
+    vin[0] = VIN
+    while converter.state == ConverterState.STANDBY:
+        converter.update_converter()
+    if state == ConverterState.STARTUP:
+        return converter
+
+    now[0] = 1.0
+    while converter.state == ConverterState.STARTUP:
+        converter.update_converter()
+    if state == ConverterState.NORMAL:
+        return converter
+
+    converter.fault_stop("bench")
+    return converter
+
+
+def converter_tick(state: ConverterState, **config):
+    def factory():
+        converter = converter_in(state, **config)
+        if converter.state != state:
+            raise RuntimeError(f"converter reached {converter.state.name}, wanted {state.name}: {converter.fault_reason}")
+        return converter.update_converter
+    return factory
+
+
+BENCHMARKS = {
+    "driver.mcp3208.read_raw": bench_mcp3208_read_raw,
+    "driver.ina229.read_current": bench_ina229_read_current,
+    "driver.pwm.set_duty": bench_pwm_set_duty,
+    "driver.pwm.set_duty_counts": bench_pwm_set_duty_counts,
+    "driver.pwm.set_duties": bench_pwm_set_duties,
+    "driver.pwm.set_duties_mmap": bench_pwm_set_duties_mmap,
+    "driver.gpio.force_safe_outputs": bench_gpio_force_safe_outputs,
+
+    "control.SafetyChecker.check": bench_safety_check,
+    "control.SafetyChecker.check_code": bench_safety_check_code,
+    "control.LowPassFilter.update": bench_lowpass,
+    "control.Debounce.update": bench_debounce,
+    "control.SoftStartController.update": bench_soft_start,
+    "control.PIController.update": bench_pi,
+    "control.PerturbObserve.update": bench_perturb_observe,
+    "control.ModeManager.update": bench_mode_manager,
+    "control.DutyTransition.update": bench_duty_transition,
+    "control.ModeTransition.update": bench_mode_transition,
+    "control.FixedLowPassFilter.update": bench_fixed_lowpass,
+    "control.FixedPIController.update": bench_fixed_pi,
+    "control.RawSafetyChecker.check": bench_raw_safety,
+    "control.ProtectionEngine.update": bench_protection,
+    "control.FaultCapture.record": bench_fault_capture_record,
+
+    "converter.tick.standby": converter_tick(ConverterState.STANDBY),
+    "converter.tick.startup": converter_tick(ConverterState.STARTUP),
+    "converter.tick.normal": converter_tick(ConverterState.NORMAL),
+    "converter.tick.normal_fixed": converter_tick(ConverterState.NORMAL, fixed_point=True),
+    "converter.tick.fault": converter_tick(ConverterState.FAULT),
+}
+
+
+# -------------- run --------------
+
+def measure(fn, min_time_s: float) -> dict:
+    timer = timeit.Timer(fn)
+
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time_s or number >= 10_000_000:
+            break
+        number *= 4
+
+    runs = [t / number * 1e9 for t in timer.repeat(repeat=REPEAT, number=number)]
+
+    return {
+        "best_ns": min(runs),
+        "median_ns": statistics.median(runs),
+        "number": number,
+        "repeat": REPEAT,
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> int:
+    min_time_s = QUICK_MIN_TIME_S if args.quick else MIN_TIME_S
+    results = {}
+
+    for name, factory in BENCHMARKS.items():
+        if args.filter and args.filter not in name:
+            continue
+
+        results[name] = measure(factory(), min_time_s)
+        print(f"{name:38s} {results[name]['best_ns']:12.1f} ns")
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d_%H%M%S") + ".json")
+
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "meta": {
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "git": git_revision(),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "platform": platform.platform(),
+                    "compiled_control": is_compiled(cc),
+                    "quick": args.quick,
+                },
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+
+    print(f"wrote {output}")
+    return 0
+
+
+# -------------- compare --------------
+
+def compare(args) -> int:
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    base_results = base["results"]
+    new_results = new["results"]
+    regressions = 0
+
+    print(f"base {args.base} ({base['meta'].get('git')})  new {args.new} ({new['meta'].get('git')})")
+    print(f"{'benchmark':38s} {'base ns':>12s} {'new ns':>12s} {'ratio':>7s}")
+
+    for name in sorted(set(base_results) | set(new_results)):
+        if name not in base_results or name not in new_results:
+            print(f"{name:38s} only in {'new' if name not in base_results else 'base'}")
+            continue
+
+        b = base_results[name][args.metric]
+        n = new_results[name][args.metric]
+        ratio = n / b if b else float("inf")
+
+        flag = ""
+        if ratio > 1.0 + args.threshold:
+            flag = "REGRESSION"
+            regressions += 1
+        elif ratio < 1.0 - args.threshold:
+            flag = "faster"
+
+        print(f"{name:38s} {b:12.1f} {n:12.1f} {ratio:7.2f} {flag}")
+
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and write json")
+    run_parser.add_argument("-o", "--output", help="result file, default bench/results/<time>.json")
+    run_parser.add_argument("-k", "--filter", help="only benchmarks whose name contains this")
+    run_parser.add_argument("--quick", action="store_true", help="shorter timing runs")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, 0.10 = 10 %%")
+    compare_parser.add_argument("--metric", choices=("best_ns", "median_ns"), default="best_ns")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Converter.update_converter ticks per second on the sim backend.
+
+the converter is brought to NORMAL on the sim plant, then the plant is
+frozen and only update_converter runs, so the number is the converter's own
+tick cost (sensor reads through the sim drivers, control, duty writes)
+without the plant integration.
+
+run from src/:
+    python -m bench.tick_bench
+"""
+
+import sys
+import time
+
+from control.control import ConverterState
+from control.converter import ConverterConfig
+
+from sim.backend import SimRig
+
+
+TICKS = 50_000
+REPEATS = 10
+
+# gains that hold NORMAL on the sim plant
+KP = 0.02
+KI = 5.0
+FF_GAIN = 1.0
+
+VARIANTS = (
+    ("float", ConverterConfig()),
+    ("fixed point", ConverterConfig(fixed_point=True)),
+)
+
+
+def normal_converter(config: ConverterConfig):
+    rig = SimRig(config)
+    converter = rig.converter
+
+    converter.pi.kp = KP
+    converter.pi.ki = KI
+    converter.pi.ff_gain = FF_GAIN
+
+    rig.start()
+    rig.run(1.0, until=lambda r: r.converter.state == ConverterState.NORMAL)
+    rig.run(0.2)
+
+    if converter.state != ConverterState.NORMAL:
+        raise RuntimeError(f"converter not in NORMAL: {converter.fault_reason}")
+
+    return converter
+
+
+def main() -> int:
+    updates = [normal_converter(config).update_converter for _, config in VARIANTS]
+    best = [0.0] * len(VARIANTS)
+
+    # interleaved so machine noise hits every variant alike, best run counts
+    for _ in range(REPEATS):
+        for i, update in enumerate(updates):
+            t0 = time.perf_counter()
+            for _ in range(TICKS):
+                update()
+            best[i] = max(best[i], TICKS / (time.perf_counter() - t0))
+
+    for (name, _), rate in zip(VARIANTS, best):
+        print(f"{name:12s} {rate:10.0f} ticks/s  {1e6 / rate:6.2f} us/tick")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+BUCK <-> BOOST handover in simulation.
+
+holds vtarget at VTARGET and swings the source voltage around it so the
+converter keeps crossing between buck and boost, once with the old fixed
+step DutyTransition (PI paused) and once with the bumpless ModeTransition.
+per handover it reports
+- transition time: mode change until both legs are at the new mode's duties
+- Vout disturbance: peak |Vout - Vout at the mode change| within WINDOW_S
+
+run from src/:
+    python -m bench.transition_sim
+"""
+
+import math
+import sys
+
+from control.control import ConverterMode, ConverterState
+from control.converter import ConverterConfig
+
+from sim.backend import SimRig
+from sim.plant import BuckBoostPlant, PlantParams
+
+
+SIM_SECONDS = 4.0
+VTARGET = 20.0
+WINDOW_S = 0.010
+
+# source swings between 14 and 30 V with a 1 s period
+VOC_MEAN = 22.0
+VOC_SWING = 8.0
+VOC_PERIOD_S = 1.0
+
+# gains that hold NORMAL on the sim plant
+KP = 0.02
+KI = 5.0
+FF_GAIN = 1.0
+
+REGULATED = (ConverterMode.BUCK, ConverterMode.BOOST)
+
+
+def voc_profile(t: float) -> float:
+    return VOC_MEAN + VOC_SWING * math.sin(2.0 * math.pi * t / VOC_PERIOD_S)
+
+
+def run(bumpless: bool) -> tuple[dict, str | None]:
+    """
+    returns {label: [(transition time s, peak dVout V), ...]} and the fault
+    reason if the converter left NORMAL. a handover cut short by the next
+    mode change is recorded with a nan time.
+    """
+    plant = BuckBoostPlant(PlantParams(r_load=40.0), voc_profile=voc_profile)
+    rig = SimRig(ConverterConfig(bumpless_transition=bumpless), plant=plant)
+    converter = rig.converter
+
+    converter.pi.kp = KP
+    converter.pi.ki = KI
+    converter.pi.ff_gain = FF_GAIN
+    converter.po.step_v = 0.0
+
+    rig.start()
+    rig.run(1.0, until=lambda r: r.converter.state == ConverterState.NORMAL)
+    converter.po.vtarget = VTARGET
+
+    results = {}
+    current = None
+    mode = converter.mode
+
+    def close(h):
+        results.setdefault(h[0], []).append((h[3] if h[3] is not None else math.nan, h[4]))
+
+    while rig.time() < SIM_SECONDS and converter.state == ConverterState.NORMAL:
+        rig.step()
+        now = rig.time()
+        vout = plant.vout
+
+        if converter.mode != mode:
+            if current is not None:
+                close(current)
+            # label, t0, vout0, done time, peak dVout
+            current = [f"{mode.name}->{converter.mode.name}", now, vout, None, 0.0]
+            mode = converter.mode
+
+        if current is None:
+            continue
+
+        busy = converter.handover.active if bumpless else converter.transition.active
+        if current[3] is None and not busy:
+            current[3] = now - current[1]
+
+        if now - current[1] <= WINDOW_S:
+            current[4] = max(current[4], abs(vout - current[2]))
+        elif current[3] is not None:
+            close(current)
+            current = None
+
+    fault = None
+    if converter.state != ConverterState.NORMAL:
+        fault = f"{rig.time():.3f} s {converter.fault_reason}"
+
+    return results, fault
+
+
+def main() -> int:
+    for name, bumpless in (("step DutyTransition", False), ("bumpless ModeTransition", True)):
+        results, fault = run(bumpless)
+        print(name)
+
+        for label, rows in sorted(results.items()):
+            done = [t for t, _ in rows if not math.isnan(t)]
+            peaks = [p for _, p in rows]
+            mean_ms = sum(done) / len(done) * 1e3 if done else math.nan
+
+            print(
+                f"  {label:22s} n {len(rows):3d}  interrupted {len(rows) - len(done):3d}  "
+                f"time {mean_ms:6.2f} ms  dVout mean {sum(peaks) / len(peaks):6.3f} V  worst {max(peaks):6.3f} V"
+            )
+
+        if fault is not None:
+            print(f"  left NORMAL at {fault}")
+        print()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
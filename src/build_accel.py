@@ -0,0 +1,93 @@
+"""
+optional compiled build of control/control.py.
+
+    pip install cython
+    python build_accel.py          (from src/)
+    python build_accel.py clean
+
+cythonizes the unchanged control/control.py into the extension module
+control._control_accel (control/_control_accel.*.so). control.control stays
+the pure python module and, when the extension is there, takes the classes
+in control.control.COMPILED_CLASSES from it (PIController, PerturbObserve).
+the small classes (LowPassFilter, DutyTransition, SafetyChecker, ...) run
+slower compiled and are not swapped. without the .so (not built, clean, or a
+fresh checkout) everything is pure python, nothing else changes.
+
+bench/accel_bench.py compares per class call cost of every class, so a
+change to COMPILED_CLASSES can be checked, bench/accel_parity.py checks the
+swapped classes give identical results.
+"""
+
+import glob
+import importlib.util
+import os
+import shutil
+import sys
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODULES = {
+    "control._control_accel": "control/control.py",
+}
+
+
+def build() -> None:
+    from setuptools import Extension, setup
+    from Cython.Build import cythonize
+
+    extensions = [Extension(name, [path]) for name, path in MODULES.items()]
+
+    setup(
+        name="utwind-accel",
+        ext_modules=cythonize(extensions, language_level=3),
+        script_args=["build_ext", "--inplace"],
+    )
+
+
+def clean() -> None:
+    for name, path in MODULES.items():
+        source = os.path.join(HERE, os.path.splitext(path)[0])
+        module = os.path.join(HERE, *name.split("."))
+        # source.*.so: a build of the whole module under its own name
+        for built in glob.glob(module + ".*.so") + glob.glob(source + ".*.so") + glob.glob(source + ".c"):
+            os.remove(built)
+            print(f"removed {os.path.relpath(built, HERE)}")
+
+    shutil.rmtree(os.path.join(HERE, "build"), ignore_errors=True)
+
+
+def is_compiled(module) -> bool:
+    """
+    True when control.control took its COMPILED_CLASSES from the extension
+    """
+    return getattr(module, "_control_accel", None) is not None
+
+
+def load_pure_python(name: str = "control.control"):
+    """
+    imports the .py source of a module under <name>_py, it never takes
+    classes from the extension
+    """
+    spec = importlib.util.spec_from_file_location(
+        name.replace(".", "_") + "_py",
+        os.path.join(HERE, name.replace(".", "/") + ".py"),
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # dataclasses looks the module up by name
+    spec.loader.exec_module(module)
+    return module
+
+
+def main() -> int:
+    os.chdir(HERE)
+
+    if sys.argv[1:] == ["clean"]:
+        clean()
+    else:
+        build()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
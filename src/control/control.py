@@ -1,3 +1,4 @@
+from collections import deque
 from dataclasses import dataclass, field
 from enum import IntEnum
 import math
@@ -19,6 +20,21 @@ class ConverterState(IntEnum):
     STOPPING = 5
 
 
+class FaultCode(IntEnum):
+    NONE = 0
+    NON_FINITE = 1
+    VIN_UNDER = 2
+    VIN_OVER = 3
+    VOUT_OVER = 4
+    IIN_OVER = 5
+    IOUT_OVER = 6
+    OTHER = 7
+    I2T = 8
+    OVERPOWER = 9
+    VOUT_SLEW = 10
+    OVERTEMP = 11
+
+
 # -------------- Helpers --------------
 
 def clamp(x: float, lo: float, hi: float) -> float:
@@ -29,7 +45,7 @@ def calculate_power(voltage: float, current: float) -> float:
     return voltage * current
 
 
-@dataclass
+@dataclass(slots=True)
 class Measurements:
     vin: float = 0.0
     vout: float = 0.0
@@ -38,6 +54,18 @@ class Measurements:
     powin: float = 0.0
     powout: float = 0.0
 
+    def set(self, vin: float, vout: float, iin: float, iout: float) -> "Measurements":
+        """
+        build_measurements in place, for the per tick sample
+        """
+        self.vin = vin
+        self.vout = vout
+        self.iin = iin
+        self.iout = iout
+        self.powin = vin * iin
+        self.powout = vout * iout
+        return self
+
 
 def build_measurements(vin: float, vout: float, iin: float, iout: float) -> Measurements:
     return Measurements(
@@ -52,7 +80,7 @@ def build_measurements(vin: float, vout: float, iin: float, iout: float) -> Meas
 
 # -------------- low pass filter --------------
 
-@dataclass
+@dataclass(slots=True)
 class LowPassFilter:
     alpha: float = 0.3
     value: float = 0.0
@@ -73,7 +101,7 @@ class LowPassFilter:
 
 # ------------- debounce --------------
 
-@dataclass
+@dataclass(slots=True)
 class Debounce:
     cut_in_voltage: float = 15.0
     required_count: int = 20
@@ -93,47 +121,129 @@ class Debounce:
 
 # -------------- soft start --------------
 
-@dataclass
+@dataclass(slots=True)
+class StartupStats:
+    count: int = 0
+    last_s: float = 0.0
+    min_s: float = math.inf
+    max_s: float = 0.0
+    total_s: float = 0.0
+    peak_iin: float = 0.0
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.count if self.count else 0.0
+
+    def add(self, duration_s: float, peak_iin: float) -> None:
+        self.count += 1
+        self.last_s = duration_s
+        self.min_s = min(self.min_s, duration_s)
+        self.max_s = max(self.max_s, duration_s)
+        self.total_s += duration_s
+        self.peak_iin = peak_iin
+
+
+@dataclass(slots=True)
 class SoftStartController:
+    """
+    buck duty ramp driven by elapsed time, not by tick count.
+
+    the ramp heads for the feedforward duty vout_target / vin (end_duty when
+    vout_target is 0) at a slope that would get there in duration_s. above
+    half of inrush_limit the slope is scaled down, at inrush_limit it holds.
+    it finishes when the duty reaches the target, when vout is within
+    vout_band of the output that target gives (target * vin, vout_target
+    unless end_duty caps it), or after timeout_s.
+
+    plan(vin) fixes the target at the start so the ramp is a known straight
+    line a PWM backend can play on its own (PiPwm.start_ramp). update then
+    follows that line until iin passes half of inrush_limit, where it falls
+    back to the adaptive ramp from the current duty (planned goes False).
+    """
     start_duty: float = 0.0
     end_duty: float = 0.40
-    steps: int = 1000
+    duration_s: float = 0.05
+
+    vout_target: float = 0.0
+    vout_band: float = 0.5
+    inrush_limit: float = 4.0
+    timeout_s: float = 0.5
 
     duty: float = 0.0
-    step_index: int = 0
     done: bool = False
+    started_s: float = 0.0
+    last_s: float = 0.0
+    peak_iin: float = 0.0
 
-    def reset(self) -> None:
+    planned: bool = False
+    plan_target: float = 0.0
+
+    stats: StartupStats = field(default_factory=StartupStats)
+
+    def reset(self, now: float = 0.0) -> None:
         self.duty = self.start_duty
-        self.step_index = 0
         self.done = False
-    
-    def update(self) -> tuple[float, bool]:
+        self.started_s = now
+        self.last_s = now
+        self.peak_iin = 0.0
+        self.planned = False
+
+    def plan(self, vin: float) -> float:
+        """
+        fixes the target for a preloaded ramp, returns it
+        """
+        self.plan_target = self.target_duty(vin)
+        self.planned = True
+        return self.plan_target
+
+    def target_duty(self, vin: float) -> float:
+        if self.vout_target <= 0.0:
+            return self.end_duty
+
+        return clamp(self.vout_target / max(vin, 1e-6), self.start_duty, self.end_duty)
+
+    def update(self, now: float, vin: float, vout: float, iin: float) -> tuple[float, bool]:
         if self.done:
             return self.duty, True
-        
-        if self.steps <= 0:
-            self.duty = self.end_duty
-            self.done = True
-            return self.duty, True
-        
-        step_size = (self.end_duty - self.start_duty) / self.steps
 
-        self.duty = self.start_duty + step_size * self.step_index
-        self.duty = clamp(self.duty, min(self.start_duty, self.end_duty), max(self.start_duty, self.end_duty))
+        dt = now - self.last_s
+        self.last_s = now
+        self.peak_iin = max(self.peak_iin, abs(iin))
 
-        self.step_index += 1
+        if self.planned and 2.0 * abs(iin) > self.inrush_limit:
+            self.planned = False
 
-        if self.step_index > self.steps:
-            self.duty = self.end_duty
+        if self.planned:
+            target = self.plan_target
+        else:
+            target = self.target_duty(vin)
+
+        if self.duration_s <= 0:
+            self.duty = target
+        elif self.planned:
+            slope = (target - self.start_duty) / self.duration_s
+            self.duty = min(self.start_duty + slope * (now - self.started_s), target)
+        else:
+            slope = (target - self.start_duty) / self.duration_s
+            scale = clamp(2.0 - 2.0 * abs(iin) / self.inrush_limit, 0.0, 1.0)
+            self.duty = min(self.duty + slope * scale * dt, target)
+
+        elapsed = now - self.started_s
+
+        if (
+            self.duty >= target
+            or (self.vout_target > 0.0 and abs(vout - target * vin) <= self.vout_band)
+            or elapsed >= self.timeout_s
+        ):
             self.done = True
-        
+            self.stats.add(elapsed, self.peak_iin)
+
         return self.duty, self.done
 
 
 # -------------- PI --------------
 
-@dataclass
+@dataclass(slots=True)
 class PIController:
     kp: float = 0.01
     ki: float = 0.0
@@ -188,10 +298,33 @@ class PIController:
 
         return self.duty
 
+    def preload(self, duty: float, vtarget: float, vout: float, vin: float, mode: ConverterMode) -> float:
+        """
+        bumpless transfer into mode: sets the integrator so the next update()
+        starts from duty instead of from the old mode's integral.
+        """
+        if mode == ConverterMode.BUCK:
+            duty_max = self.duty_max_buck
+            feedforward = vtarget / max(vin, 1e-6)
+
+        elif mode == ConverterMode.BOOST:
+            duty_max = self.duty_max_boost
+            feedforward = 1.0 - (vin / max(vtarget, 1e-6))
+
+        else:
+            return self.duty
+
+        feedforward = clamp(feedforward, self.duty_min, duty_max)
+
+        self.duty = clamp(duty, self.duty_min, duty_max)
+        self.integral = self.duty - self.ff_gain * feedforward - self.kp * (vtarget - vout)
+
+        return self.duty
+
 
 # -------------- P&O --------------
 
-@dataclass
+@dataclass(slots=True)
 class PerturbObserve:
     step_v: float = 1
     vtarget_min: float = 15.0
@@ -228,33 +361,103 @@ class PerturbObserve:
 
 # -------------- mode manager --------------
 
-@dataclass
+@dataclass(slots=True)
 class ModeManager:
+    """
+    picks BUCK / BOOST / pass through from vin - vtarget.
+
+    pass through is entered inside margin_v and only left outside
+    exit_margin_v, BUCK <-> BOOST also needs exit_margin_v. after a change
+    the mode is held for dwell_s and at most max_changes changes are allowed
+    per rate_window_s (0 disables the rate limit). update() is called once
+    per tick, dt is the tick period.
+
+    changes counts mode changes, suppressed counts ticks where a change was
+    held back by the dwell or the rate limit. reset() keeps both.
+    """
     margin_v: float = 1.5
+    exit_margin_v: float = 2.5
+    dt: float = 1.0/30_000.0
+    dwell_s: float = 0.005
+    max_changes: int = 20
+    rate_window_s: float = 1.0
+
     mode: ConverterMode = ConverterMode.PASS_BUCK
+    changes: int = 0
+    suppressed: int = 0
+
+    _ticks: int = field(default=0, init=False)
+    _last_change: int = field(default=0, init=False)
+    _recent: deque = field(default_factory=deque, init=False)
+    _dwell_ticks: int = field(default=0, init=False)
+    _window_ticks: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        self._dwell_ticks = int(round(self.dwell_s / self.dt))
+        self._window_ticks = int(round(self.rate_window_s / self.dt))
+        self._last_change = -self._dwell_ticks
 
     def reset(self, mode: ConverterMode = ConverterMode.PASS_BUCK) -> None:
         self.mode = mode
+        self._ticks = 0
+        self._last_change = -self._dwell_ticks
+        self._recent.clear()
 
     def update(self, vin: float, vtarget: float) -> ConverterMode:
-        if abs(vin-vtarget) <= self.margin_v:
-            if self.mode in (ConverterMode.BUCK, ConverterMode.PASS_BUCK):
-                self.mode = ConverterMode.PASS_BUCK
+        self._ticks += 1
+
+        mode = self.mode
+        diff = vin - vtarget
+        exit_margin = self.exit_margin_v
+
+        if mode == ConverterMode.PASS_BUCK or mode == ConverterMode.PASS_BOOST:
+            if diff > exit_margin:
+                requested = ConverterMode.BUCK
+            elif diff < -exit_margin:
+                requested = ConverterMode.BOOST
             else:
-                self.mode = ConverterMode.PASS_BOOST
+                return mode
 
-        elif vin > vtarget + self.margin_v:
-            self.mode = ConverterMode.BUCK
-        
-        elif vin < vtarget - self.margin_v:
-            self.mode = ConverterMode.BOOST
+        elif -self.margin_v <= diff <= self.margin_v:
+            requested = ConverterMode.PASS_BUCK if mode == ConverterMode.BUCK else ConverterMode.PASS_BOOST
+
+        elif mode == ConverterMode.BUCK and diff < -exit_margin:
+            requested = ConverterMode.BOOST
+
+        elif mode == ConverterMode.BOOST and diff > exit_margin:
+            requested = ConverterMode.BUCK
+
+        else:
+            return mode
+
+        return self._change(requested)
+
+    def _change(self, requested: ConverterMode) -> ConverterMode:
+        ticks = self._ticks
+
+        if ticks - self._last_change < self._dwell_ticks:
+            self.suppressed += 1
+            return self.mode
+
+        recent = self._recent
+        while recent and ticks - recent[0] >= self._window_ticks:
+            recent.popleft()
+
+        if self.max_changes and len(recent) >= self.max_changes:
+            self.suppressed += 1
+            return self.mode
 
-        return self.mode
+        recent.append(ticks)
+        self._last_change = ticks
+        self.changes += 1
+        self.mode = requested
+
+        return requested
 
 
 # -------------- duty transitions --------------
 
-@dataclass
+@dataclass(slots=True)
 class DutyTransition:
     step: float = 0.03
     active: bool = False
@@ -295,36 +498,103 @@ class DutyTransition:
         return current
 
 
+@dataclass(slots=True)
+class ModeTransition:
+    """
+    bumpless BUCK <-> BOOST handover.
+
+    the caller preloads the PI for the new mode (PIController.preload) and
+    keeps running it every tick. update() blends the leg duties from where
+    they were at the mode change to what the PI asks for in the new mode,
+    linearly over duration_s, so regulation never stops during the handover.
+    """
+    duration_s: float = 0.002
+    pass_duty: float = 0.85
+
+    active: bool = False
+    mode: ConverterMode = ConverterMode.BUCK
+    started_s: float = 0.0
+    duty1_from: float = 0.0
+    duty2_from: float = 0.0
+    count: int = 0
+
+    def reset(self, now: float, duty1: float, duty2: float, mode: ConverterMode) -> None:
+        self.started_s = now
+        self.duty1_from = duty1
+        self.duty2_from = duty2
+        self.mode = mode
+        self.active = True
+        self.count += 1
+
+    def update(self, now: float, duty: float) -> tuple[float, float, bool]:
+        target1, target2 = map_mode_to_duties(self.mode, duty, self.pass_duty)
+
+        if not self.active:
+            return target1, target2, True
+
+        elapsed = now - self.started_s
+        if elapsed >= self.duration_s:
+            self.active = False
+            return target1, target2, True
+
+        frac = elapsed / self.duration_s
+
+        return (
+            self.duty1_from + (target1 - self.duty1_from) * frac,
+            self.duty2_from + (target2 - self.duty2_from) * frac,
+            False,
+        )
+
+
+def handover_duty(mode: ConverterMode, vin: float, vtarget: float, pass_duty: float = 0.85) -> float:
+    """
+    steady state duty of the new mode at vin -> vtarget, boost accounts for
+    the buck leg sitting at pass_duty
+    """
+    if mode == ConverterMode.BUCK:
+        return vtarget / max(vin, 1e-6)
+
+    if mode == ConverterMode.BOOST:
+        return 1.0 - pass_duty * vin / max(vtarget, 1e-6)
+
+    return 0.0
+
+
 # -------------- duty mapping --------------
 
-def map_mode_to_duties(mode: ConverterMode, duty: float) -> tuple[float, float]:
+def map_mode_to_duties(mode: ConverterMode, duty: float, pass_duty: float = 0.85) -> tuple[float, float]:
     if mode == ConverterMode.BUCK:
         return duty, 0.0
     
     if mode == ConverterMode.BOOST:
-        return 0.85, duty
+        return pass_duty, duty
     
     if mode in (ConverterMode.PASS_BUCK, ConverterMode.PASS_BOOST):
-        return 0.85, 0.0
+        return pass_duty, 0.0
     
     return 0.0, 0.0
 
-def transition_targets(mode_from: ConverterMode, mode_to: ConverterMode, duty: float) -> tuple[float, float]:
+def transition_targets(
+    mode_from: ConverterMode,
+    mode_to: ConverterMode,
+    duty: float,
+    pass_duty: float = 0.85,
+) -> tuple[float, float]:
     if mode_to == ConverterMode.BUCK:
         return duty, 0.0
     
     if mode_to == ConverterMode.BOOST:
-        return 0.85, duty
+        return pass_duty, duty
     
     if mode_to in (ConverterMode.PASS_BUCK, ConverterMode.PASS_BOOST):
-        return 0.85, 0.0
+        return pass_duty, 0.0
     
     return 0.0, 0.0
 
 
 # -------------- safety limiter --------------
 
-@dataclass
+@dataclass(slots=True)
 class SafetyLimits:
     vin_min: float = 0.0
     vin_max: float = 60
@@ -333,30 +603,98 @@ class SafetyLimits:
     iout_max: float = 11.0
 
 
-@dataclass
+@dataclass(slots=True)
 class SafetyChecker:
     limits: SafetyLimits = field(default_factory=SafetyLimits)
 
     def check(self, m: Measurements) -> str | None:
-        values = [m.vin, m.vout, m.iin, m.iout, m.powin, m.powout]
+        code = self.check_code(m)
+
+        if code == FaultCode.NONE:
+            return None
+
+        return self.describe(code, m)
+
+    def check_code(self, m: Measurements) -> FaultCode:
+        """
+        per tick check. one chained comparison per channel, NaN fails every
+        comparison so it also covers the non finite case. only a failing
+        sample goes through the full classification.
+        """
+        limits = self.limits
 
-        for value in values:
+        if (
+            limits.vin_min <= m.vin <= limits.vin_max
+            and -math.inf < m.vout <= limits.vout_max
+            and -limits.iin_max <= m.iin <= limits.iin_max
+            and -limits.iout_max <= m.iout <= limits.iout_max
+        ):
+            return FaultCode.NONE
+
+        return self._classify(m)
+
+    def _classify(self, m: Measurements) -> FaultCode:
+        for value in (m.vin, m.vout, m.iin, m.iout, m.powin, m.powout):
             if not math.isfinite(value):
-                return "non finite sensor value"
-        
+                return FaultCode.NON_FINITE
+
         if m.vin < self.limits.vin_min:
-            return f"input undervoltage: {m.vin:.3f} V"
+            return FaultCode.VIN_UNDER
 
         if m.vin > self.limits.vin_max:
-            return f"input overvoltage: {m.vin:.3f} V"
+            return FaultCode.VIN_OVER
 
         if m.vout > self.limits.vout_max:
-            return f"output overvoltage: {m.vout:.3f} V"
+            return FaultCode.VOUT_OVER
 
         if abs(m.iin) > self.limits.iin_max:
-            return f"input overcurrent: {m.iin:.3f} A"
+            return FaultCode.IIN_OVER
 
         if abs(m.iout) > self.limits.iout_max:
+            return FaultCode.IOUT_OVER
+
+        return FaultCode.NONE
+
+    @staticmethod
+    def describe(code: FaultCode, m: Measurements) -> str:
+        """
+        human readable reason, only built once a fault latches
+        """
+        if code == FaultCode.NON_FINITE:
+            return "non finite sensor value"
+
+        if code == FaultCode.VIN_UNDER:
+            return f"input undervoltage: {m.vin:.3f} V"
+
+        if code == FaultCode.VIN_OVER:
+            return f"input overvoltage: {m.vin:.3f} V"
+
+        if code == FaultCode.VOUT_OVER:
+            return f"output overvoltage: {m.vout:.3f} V"
+
+        if code == FaultCode.IIN_OVER:
+            return f"input overcurrent: {m.iin:.3f} A"
+
+        if code == FaultCode.IOUT_OVER:
             return f"output overcurrent: {m.iout:.3f} A"
 
-        return None
+        return f"fault {code.name.lower()}"
+
+
+# -------------- compiled classes --------------
+# build_accel.py compiles this file into control._control_accel. only the
+# classes that run faster compiled (bench/accel_bench.py) are taken from it,
+# the small ones stay pure python, where the interpreter's attribute access
+# beats the compiled module's.
+
+COMPILED_CLASSES = ("PIController", "PerturbObserve")
+
+if __name__ == "control.control":
+    try:
+        from control import _control_accel
+    except ImportError:
+        _control_accel = None
+
+    if _control_accel is not None:
+        PIController = _control_accel.PIController
+        PerturbObserve = _control_accel.PerturbObserve
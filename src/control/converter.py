@@ -1,16 +1,20 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+import os
+import time
+import warnings
 
 from hal.gpio import PiGpio
 from hal.spi import PiSpi
 from hal.pwm import PiPwm, PwmConfig
 
 from drivers.mcp3208 import MCP3208
-from drivers.ina229 import INA229, INA229Config
+from drivers.ina229 import INA229, INA229Config, INA_IN, INA_OUT
 from drivers.si8274 import SI8274
 
 from control.control import (
     ConverterMode,
     ConverterState,
+    FaultCode,
     Measurements,
     build_measurements,
     LowPassFilter,
@@ -20,10 +24,23 @@ from control.control import (
     PerturbObserve,
     ModeManager,
     DutyTransition,
+    ModeTransition,
     SafetyChecker,
+    handover_duty,
     map_mode_to_duties,
     transition_targets,
 )
+from control.protection import ProtectionEngine
+from control.fault_capture import FaultCapture
+from control.startup import StartupProfile, load_warm_hashes, save_warm_hash
+from control.status_segment import StatusPublisher, encode_reason
+from control.fixed import (
+    DUTY_SCALE,
+    RawScale,
+    RawSafetyChecker,
+    FixedLowPassFilter,
+    FixedPIController,
+)
 
 
 class ConverterError(RuntimeError):
@@ -39,13 +56,89 @@ class ConverterConfig:
     cut_in_voltage: float = 15.0
     cut_in_debounce_count: int = 20
 
-    startup_steps: int = 1_500
+    # STANDBY reads only vin, standby_rate times a second, until vin reaches
+    # cut_in_voltage, the debounce then runs at pi_rate. 0 polls every tick
+    standby_rate: int = 100
+
+    # soft start, see SoftStartController. startup_end_duty caps the ramp
+    # below the feedforward duty startup_vout_target / vin, the vout band is
+    # around the output the capped duty reaches
+    startup_time_s: float = 0.03
     startup_end_duty: float = 0.25
+    startup_vout_target: float = 15.0
+    startup_vout_band: float = 0.5
+    startup_inrush_limit: float = 4.0
+    startup_timeout_s: float = 0.5
+    # deprecated: the ramp runs on time now, not ticks. when set it still
+    # sets the ramp length to startup_steps / pi_rate, use startup_time_s
+    startup_steps: int | None = None
 
     pwm_max_duty: float = 0.95
 
-
-@dataclass
+    # hardware PWM resolution and sigma-delta dithering, see DutyQuantizer
+    pwm_clock_hz: int = 250_000_000
+    pwm_dither: bool = False
+
+    # "pigpio" sends every duty update to the daemon, "mmap" writes the PWM
+    # data registers directly (root, see hal/pwm_mmap.py)
+    pwm_backend: str = "pigpio"
+
+    # play the soft start ramp as a pigpio script instead of one pwm1 write
+    # per tick, see PiPwm.start_ramp
+    startup_ramp_script: bool = False
+    startup_ramp_step_s: float = 1e-4
+
+    # controller tuning, see PIController, PerturbObserve and LowPassFilter
+    pi_kp: float = 0.01
+    pi_ki: float = 0.0
+    pi_ff_gain: float = 0.2
+    pi_max_duty_step: float = 0.01
+    po_step_v: float = 1.0
+    filter_alpha: float = 0.3
+
+    # buck leg duty while boosting or passing through
+    pass_duty: float = 0.85
+
+    # mode selection hysteresis, dwell and rate limit, see ModeManager
+    mode_margin_v: float = 1.5
+    mode_exit_margin_v: float = 2.5
+    mode_dwell_s: float = 0.005
+    mode_max_changes: int = 20
+    mode_rate_window_s: float = 1.0
+
+    # BUCK <-> BOOST handover, see ModeTransition. bumpless_transition False
+    # keeps the old fixed step DutyTransition with PI paused
+    bumpless_transition: bool = True
+    mode_transition_s: float = 0.002
+
+    # slow protection tier (I2t, sustained power, dVout/dt), see control/protection.py
+    protection_rate: int = 1_000
+
+    # INA229 die temperature protection, read at temp_rate
+    die_temp_protection: bool = False
+    temp_rate: int = 10
+
+    # run NORMAL on raw sensor codes, see control/fixed.py
+    fixed_point: bool = False
+
+    # pre/post trigger history around a fault, see control/fault_capture.py
+    # depth 0 disables it, with a dir set Converter.save_capture writes every
+    # frozen capture there
+    fault_capture_depth: int = 2_048
+    fault_capture_post: int = 256
+    fault_capture_dir: str | None = None
+
+    # warm start: with a path, enter_standby keeps INA229s that still hold
+    # the configuration of the last cold start, see control/startup.py
+    warm_start_path: str | None = None
+
+    # live status segment for monitor.py and other readers, see
+    # control/status_segment.py. written every status_every ticks
+    status_path: str | None = None
+    status_every: int = 30
+
+
+@dataclass(slots=True)
 class ConverterStatus:
     state: ConverterState
     mode: ConverterMode
@@ -54,19 +147,36 @@ class ConverterStatus:
     duty2: float
     vtarget: float
     fault_reason: str | None
+    fault_code: FaultCode = FaultCode.NONE
 
 
 class Converter:
     def __init__(self, config: ConverterConfig = ConverterConfig()):
         self.config = config
 
+        # monotonic time source for time based control, the sim swaps it
+        self.clock = time.monotonic
+
+        # bring up stage timings, enter_standby fills them in
+        self.startup_profile = StartupProfile()
+
         self.gpio = PiGpio()
         self.spi = PiSpi(gpio=self.gpio)
-        self.pwm = PiPwm(
+        if self.config.pwm_backend not in ("pigpio", "mmap"):
+            raise ConverterError(f"unknown pwm backend: {self.config.pwm_backend}")
+
+        if self.config.pwm_backend == "mmap":
+            from hal.pwm_mmap import MmapPwm as pwm_class
+        else:
+            pwm_class = PiPwm
+
+        self.pwm = pwm_class(
             gpio=self.gpio,
             config=PwmConfig(
                 frequency_hz=self.config.pwm_freq,
                 max_duty=self.config.pwm_max_duty,
+                pwm_clock_hz=self.config.pwm_clock_hz,
+                dither=self.config.pwm_dither,
             ),
         )
 
@@ -77,32 +187,83 @@ class Converter:
                 rshunt_ohms=0.01,
                 max_expected_current=14.0,
                 use_low_shunt_range=False,
+                measure_die_temp=self.config.die_temp_protection,
             ),
         )
         self.gate = SI8274(self.gpio)
 
-        self.vin_filter = LowPassFilter(alpha=0.3)
-        self.vout_filter = LowPassFilter(alpha=0.3)
+        # gate driver handles, names until enter_standby resolves them
+        self._gd1 = "gd1"
+        self._gd2 = "gd2"
+
+        # soft start ramp running in the pigpio daemon, see _start_ramp
+        self._ramp = False
+
+        # low rate standby polling, see _poll_standby
+        self._tick_period_s = 1.0 / self.config.pi_rate
+        self._standby_period_s = 1.0 / self.config.standby_rate if self.config.standby_rate > 0 else 0.0
+        self._next_poll_s = 0.0
+
+        self.vin_filter = LowPassFilter(alpha=self.config.filter_alpha)
+        self.vout_filter = LowPassFilter(alpha=self.config.filter_alpha)
 
         self.cut_in = Debounce(
             cut_in_voltage=self.config.cut_in_voltage,
             required_count=self.config.cut_in_debounce_count,
         )
 
+        startup_time_s = self.config.startup_time_s
+        if self.config.startup_steps is not None:
+            warnings.warn(
+                "ConverterConfig.startup_steps is deprecated, use startup_time_s",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+            startup_time_s = self.config.startup_steps / self.config.pi_rate
+
         self.soft_start = SoftStartController(
             start_duty=0.0,
             end_duty=self.config.startup_end_duty,
-            steps=self.config.startup_steps,
+            duration_s=startup_time_s,
+            vout_target=self.config.startup_vout_target,
+            vout_band=self.config.startup_vout_band,
+            inrush_limit=self.config.startup_inrush_limit,
+            timeout_s=self.config.startup_timeout_s,
         )
 
         self.pi = PIController(
-            dt=1.0 / self.config.pi_rate
+            kp=self.config.pi_kp,
+            ki=self.config.pi_ki,
+            dt=1.0 / self.config.pi_rate,
+            ff_gain=self.config.pi_ff_gain,
+            max_duty_step=self.config.pi_max_duty_step,
         )
 
-        self.po = PerturbObserve()
-        self.mode_manager = ModeManager()
+        self.po = PerturbObserve(step_v=self.config.po_step_v)
+        self.mode_manager = ModeManager(
+            margin_v=self.config.mode_margin_v,
+            exit_margin_v=self.config.mode_exit_margin_v,
+            dt=1.0 / self.config.pi_rate,
+            dwell_s=self.config.mode_dwell_s,
+            max_changes=self.config.mode_max_changes,
+            rate_window_s=self.config.mode_rate_window_s,
+        )
         self.transition = DutyTransition(step=0.03)
+        self.handover = ModeTransition(
+            duration_s=self.config.mode_transition_s,
+            pass_duty=self.config.pass_duty,
+        )
         self.safety = SafetyChecker()
+        self.protection = ProtectionEngine(
+            dt=1.0 / self.config.pi_rate,
+            slow_divider=max(1, int(self.config.pi_rate / self.config.protection_rate)),
+        )
+        self.temp_divider = max(1, int(self.config.pi_rate / self.config.temp_rate))
+
+        # derating scales these, see _apply_derate
+        self._duty_max_buck = self.pi.duty_max_buck
+        self._duty_max_boost = self.pi.duty_max_boost
+        self.derate = 1.0
 
         self.state = ConverterState.OFF
         self.mode = ConverterMode.BUCK
@@ -116,9 +277,64 @@ class Converter:
 
         self.vtarget = 0.0
         self.fault_reason = None
+        self.fault_code = FaultCode.NONE
+        self.fault_count = 0
 
+        # per tick sample, filled in place by _read_measurements
         self.last_measurements = Measurements()
 
+        # one status object, get_status updates it in place.
+        # copy it (dataclasses.replace) to keep a snapshot across ticks
+        self.status = ConverterStatus(
+            state=self.state,
+            mode=self.mode,
+            duty=0.0,
+            duty1=0.0,
+            duty2=0.0,
+            vtarget=0.0,
+            fault_reason=None,
+        )
+
+        # config switches read every tick, cached as plain attributes
+        self._fixed_point = self.config.fixed_point
+        self._die_temp_protection = self.config.die_temp_protection
+        self._bumpless = self.config.bumpless_transition
+        self._pass_duty = self.config.pass_duty
+
+        self.capture = None
+        if self.config.fault_capture_depth > 0:
+            self.capture = FaultCapture(
+                depth=self.config.fault_capture_depth,
+                post=self.config.fault_capture_post,
+            )
+        self.capture_path = None
+        self._capture_saved = 0  # trigger_count of the last capture written
+
+        # shared memory status, opened in enter_standby
+        self.status_segment = None
+        if self.config.status_path is not None:
+            self.status_segment = StatusPublisher(self.config.status_path)
+        self._status_every = max(1, self.config.status_every)
+        self._status_countdown = self._status_every
+        self._status_ticks = 0
+
+        # integer control path, configured in enter_standby
+        self.scale = RawScale.from_sensors(
+            vref=self.adc.config.vref,
+            divider_ratio=self.adc.config.divider_ratio,
+            adc_bits=self.adc.config.adc_bits,
+            current_lsb=self.ina.current_lsb,
+        )
+        self.raw_safety = None
+        self.fixed_vin_filter = None
+        self.fixed_vout_filter = None
+        self.fixed_pi = None
+        self.fixed_mode_manager = None
+        self.vtarget_q = 0
+        self._pass_counts = 0
+        self.last_raw = (0, 0, 0, 0)
+        self._raw_sample = False
+
     
     def create_hardware(self) -> None:
         """
@@ -132,16 +348,28 @@ class Converter:
         initialized hardware and force safe outputs.
         no switching yet.
         """
-        self.gpio.init()
-        self.spi.init()
-        self.pwm.init()
+        profile = self.startup_profile
+
+        with profile.stage("gpio"):
+            self.gpio.init()
+        with profile.stage("spi"):
+            self.spi.init()
+        with profile.stage("pwm"):
+            self.pwm.init()
+
+        self._gd1 = self.gate.handle("gd1")
+        self._gd2 = self.gate.handle("gd2")
 
         self.gate.disable_all()
         self.pwm.stop_pwm("pwm1")
         self.pwm.stop_pwm("pwm2")
         self.force_safe_outputs()
 
-        self.ina.initialize_all_ina(check_id=True)
+        with profile.stage("ina229"):
+            self._init_ina()
+
+        if self.config.fixed_point:
+            self._configure_fixed_point()
 
         self.cut_in.reset()
         self.pi.reset()
@@ -154,9 +382,45 @@ class Converter:
         self.duty2 = 0.0
         self.vtarget = 0.0
         self.fault_reason = None
+        self.fault_code = FaultCode.NONE
 
         self.state = ConverterState.STANDBY
+
+        if self.status_segment is not None:
+            self.status_segment.open()
+            self._publish_status()
     
+    def _init_ina(self) -> None:
+        """
+        cold: reset, id check and configure both INA229s, then store the
+        config hash. warm: the stored hash matches and both chips read back
+        the expected registers, they are left running as they are
+        """
+        ina = self.ina
+        path = self.config.warm_start_path
+
+        if path is None:
+            ina.initialize_all_ina(check_id=True)
+            return
+
+        key = ina.config_hash()
+        warm = (
+            load_warm_hashes(path).get("ina229") == key
+            and ina.is_configured(INA_IN)
+            and ina.is_configured(INA_OUT)
+        )
+
+        self.startup_profile.warm = warm
+        if warm:
+            return
+
+        ina.initialize_all_ina(check_id=True)
+
+        try:
+            save_warm_hash(path, "ina229", key)
+        except OSError:
+            pass  # next start is cold again
+
     def start_converter(self) -> None:
         if self.state == ConverterState.OFF:
             self.enter_standby()
@@ -164,8 +428,12 @@ class Converter:
         if self.state not in (ConverterState.STANDBY,):
             raise ConverterError(f"cannot start from state {self.state}")
         
-        self.soft_start.reset()
+        self.soft_start.reset(self.clock())
         self.pi.reset(0.0)
+        self.handover.active = False
+        self.protection.reset()
+        self.protection.set_units(1.0, 1.0)
+        self._apply_derate(1.0)
         self.mode = ConverterMode.BUCK
         self.duty = 0.0
 
@@ -174,8 +442,33 @@ class Converter:
         self.pwm.set_duty("pwm1", 0.0)
         self.pwm.stop_pwm("pwm2")
 
+        if self.config.startup_ramp_script:
+            self._start_ramp()
+
         self.state = ConverterState.STARTUP
 
+    def _start_ramp(self) -> None:
+        """
+        hands the planned soft start line to the daemon. _update_startup then
+        only watches it and takes pwm1 back when the ramp ends or leaves the
+        line (inrush)
+        """
+        soft_start = self.soft_start
+        target = soft_start.plan(self.latest_measurements().vin)
+
+        self._ramp = self.pwm.start_ramp(
+            soft_start.start_duty,
+            target,
+            soft_start.duration_s,
+            self.config.startup_ramp_step_s,
+        )
+        if not self._ramp:
+            soft_start.planned = False
+
+    def _stop_ramp(self) -> None:
+        self._ramp = False
+        self.pwm.stop_ramp()
+
     def stop_converter(self) -> None:
         if self.state in (ConverterState.OFF, ConverterState.STANDBY,):
             self.force_safe_outputs()
@@ -201,42 +494,111 @@ class Converter:
             self.gpio.deinit()
         
         self.state = ConverterState.OFF
+
+        if self.status_segment is not None:
+            self.status_segment.close()
     
     # -------------- update converter --------------
     
     def update_converter(self) -> ConverterStatus:
-        if self.state == ConverterState.OFF:
+        """
+        one control tick. the returned status is the converter's single
+        ConverterStatus, updated in place every call.
+        """
+        state = self.state
+        if state == ConverterState.OFF:
             return self.get_status()
 
+        if state == ConverterState.STANDBY and self._standby_period_s and not self.cut_in.count:
+            return self._poll_standby()
+
+        t_start = time.perf_counter_ns()
+        t_read = t_start
+
+        raw_sample = self._raw_sample = state == ConverterState.NORMAL and self._fixed_point
+
         try:
-            m = self._read_measurements()
-            self.last_measurements = m
+            if raw_sample:
+                raw = self.last_raw = self._read_raw_measurements()
+                t_read = time.perf_counter_ns()
 
-            if self.state == ConverterState.STANDBY:
-                self._update_standby(m)
+                self._update_normal_fixed(raw)
 
-            elif self.state == ConverterState.STARTUP:
-                self._update_startup(m)
+            else:
+                m = self._read_measurements()
+                t_read = time.perf_counter_ns()
 
-            elif self.state == ConverterState.NORMAL:
-                self._update_normal(m)
+                if state == ConverterState.NORMAL:
+                    self._update_normal(m)
 
-            elif self.state == ConverterState.STOPPING:
-                self._update_stopping()
+                elif state == ConverterState.STANDBY:
+                    self._update_standby(m)
 
-            elif self.state == ConverterState.FAULT:
-                self.force_safe_outputs()
+                elif state == ConverterState.STARTUP:
+                    self._update_startup(m)
 
-            else:
-                self.fault_stop(f"unknown converter state: {self.state}")
+                elif state == ConverterState.STOPPING:
+                    self._update_stopping()
+
+                elif state == ConverterState.FAULT:
+                    self.force_safe_outputs()
+
+                else:
+                    self.fault_stop(f"unknown converter state: {state}")
 
         except Exception as exc:
             self.fault_stop(str(exc))
 
+        if self.capture is not None:
+            self._record_capture(t_start, t_read, time.perf_counter_ns())
+
+        if self.status_segment is not None:
+            self._status_countdown -= 1
+            if self._status_countdown <= 0:
+                self._publish_status()
+
         return self.get_status()
 
+    @property
+    def tick_period_s(self) -> float:
+        """
+        how long the caller can wait before the next update_converter call:
+        the standby poll period while vin is below cut in, else 1 / pi_rate
+        """
+        if self.state == ConverterState.STANDBY and self._standby_period_s and not self.cut_in.count:
+            return self._standby_period_s
+        return self._tick_period_s
+
     # -------------- update handlers --------------
 
+    def _poll_standby(self) -> ConverterStatus:
+        """
+        standby below cut in: every standby period re-assert the safe outputs
+        and read vin alone. calls in between return at once, a vin at cut in
+        starts the debounce and update_converter goes back to full ticks
+        """
+        now = self.clock()
+        if now < self._next_poll_s:
+            return self.get_status()
+        self._next_poll_s = now + self._standby_period_s
+
+        try:
+            self.force_safe_outputs()
+
+            vin = self.last_measurements.vin = self.adc.read_vin()
+            if self.cut_in.update(vin):
+                self.start_converter()
+
+        except Exception as exc:
+            self.fault_stop(str(exc))
+
+        if self.status_segment is not None:
+            self._status_countdown -= 1
+            if self._status_countdown <= 0:
+                self._publish_status()
+
+        return self.get_status()
+
     def _update_standby(self, m: Measurements) -> None:
         """
         wait for cut in voltage
@@ -247,15 +609,26 @@ class Converter:
             self.start_converter()
 
     def _update_startup(self, m: Measurements) -> None:
-        reason = self.safety.check(m)
-        if reason is not None:
-            self.fault_stop(reason)
+        code = self.safety.check_code(m)
+        if code:
+            self.fault_stop(self.safety.describe(code, m), code)
+            return
+
+        if not self._update_protection(m.vin, m.vout, m.iin, m.iout):
             return
         
-        duty, done = self.soft_start.update()
+        duty, done = self.soft_start.update(self.clock(), m.vin, m.vout, m.iin)
 
         self.mode = ConverterMode.BUCK
         self.duty = duty
+
+        if self._ramp:
+            if self.soft_start.planned and not done:
+                # the daemon is playing this duty, nothing to write
+                self.duty1 = duty
+                return
+            self._stop_ramp()
+
         self._apply_mode_and_duty(self.mode, self.duty)
 
         if done:
@@ -270,31 +643,175 @@ class Converter:
             self.mode = ConverterMode.BUCK
             self.mode_manager.reset(self.mode)
 
-            self.duty = self.soft_start.end_duty
-            self._apply_mode_and_duty(self.mode, self.duty)
+            if self.config.fixed_point:
+                self._seed_fixed_point(m)
 
             self.state = ConverterState.NORMAL
 
     def _update_normal(self, m: Measurements) -> None:
-        reason = self.safety.check(m)
-        if reason is not None:
-            self.fault_stop(reason)
+        # hot path: sample fields and repeated attributes are read once into locals
+        vin = m.vin
+        vout = m.vout
+        iin = m.iin
+
+        safety = self.safety
+        code = safety.check_code(m)
+        if code:
+            self.fault_stop(safety.describe(code, m), code)
+            return
+
+        if not self._update_protection(vin, vout, iin, m.iout):
             return
         
+        tick = self.tick = self.tick + 1
+
+        if self._die_temp_protection and tick % self.temp_divider == 0:
+            self._update_die_temp()
+
+        vin_f = self.vin_filter.update(vin)
+        vout_f = self.vout_filter.update(vout)
+
+        vtarget = self.vtarget
+        if tick % self.po_divider == 0:
+            vtarget = self.vtarget = self.po.update(vin_f, iin)
+        
+        requested_mode = self.mode_manager.update(vin_f, vtarget)
+
+        if self._bumpless:
+            if requested_mode != self.mode:
+                self._start_handover(requested_mode, vin_f, vout_f)
+
+        elif self._update_transition(requested_mode):
+            return
+        
+        # normal PI update, also while a handover is blending the legs
+        mode = self.mode
+        duty = self.duty = self.pi.update(vtarget, vout_f, vin_f, mode)
+
+        if self.handover.active:
+            self._apply_handover(duty)
+        else:
+            self._apply_mode_and_duty(mode, duty)
+
+    def _update_normal_fixed(self, raw: tuple[int, int, int, int]) -> None:
+        """
+        integer version of _update_normal, voltages stay in codes and the
+        duty in pigpio counts. P&O still runs in volts at po_rate.
+        """
+        vin, vout, iin, iout = raw
+
+        code = self.raw_safety.check(vin, vout, iin, iout)
+        if code:
+            self.fault_stop(self.raw_safety.describe(code, vin, vout, iin, iout), code)
+            return
+
+        if not self._update_protection(vin, vout, iin, iout):
+            return
+
         self.tick += 1
 
-        vin_f = self.vin_filter.update(m.vin)
-        vout_f = self.vout_filter.update(m.vout)
+        if self._die_temp_protection and self.tick % self.temp_divider == 0:
+            self._update_die_temp()
+
+        vin_q = self.fixed_vin_filter.update(vin)
+        vout_q = self.fixed_vout_filter.update(vout)
 
         if self.tick % self.po_divider == 0:
-            self.vtarget =  self.po.update(vin_f, m.iin)
-        
-        requested_mode = self.mode_manager.update(vin_f, self.vtarget)
+            self.vtarget = self.po.update(
+                self.scale.q_to_volts(vin_q),
+                self.scale.code_to_amps(iin),
+            )
+            self.vtarget_q = self.scale.volts_to_q(self.vtarget)
+
+        requested_mode = self.fixed_mode_manager.update(vin_q, self.vtarget_q)
+
+        if self._bumpless:
+            if requested_mode != self.mode:
+                self._start_handover_fixed(requested_mode, vin_q, vout_q)
+
+        elif self._update_transition(requested_mode):
+            return
+
+        counts = self.fixed_pi.update(
+            vtarget_q=self.vtarget_q,
+            vout_q=vout_q,
+            vin_q=vin_q,
+            mode=self.mode,
+        )
+
+        if self.handover.active:
+            self.duty = counts / DUTY_SCALE
+            self._apply_handover(self.duty)
+        else:
+            self._apply_mode_and_counts(self.mode, counts)
+
+    def _update_protection(self, vin, vout, iin, iout) -> bool:
+        """
+        slow protection tier. returns False when it tripped the converter.
+        """
+        protection = self.protection
+
+        code = protection.update(vin, vout, iin, iout)
+        if code:
+            self.fault_stop(protection.describe(code), code)
+            return False
+
+        if protection.derate != self.derate:
+            self._apply_derate(protection.derate)
 
+        return True
+
+    def _update_die_temp(self) -> None:
+        self.protection.update_temperature(max(
+            self.ina.read_die_temp(INA_IN),
+            self.ina.read_die_temp(INA_OUT),
+        ))
+
+    def _apply_derate(self, derate: float) -> None:
+        """
+        scales the PI duty ceilings, the integrator anti windup follows them
+        """
+        self.derate = derate
+        self.pi.duty_max_buck = self._duty_max_buck * derate
+        self.pi.duty_max_boost = self._duty_max_boost * derate
+
+        if self.fixed_pi is not None:
+            self.fixed_pi.duty_max_buck = self.scale.duty_to_counts(self.pi.duty_max_buck)
+            self.fixed_pi.duty_max_boost = self.scale.duty_to_counts(self.pi.duty_max_boost)
+
+    def _start_handover(self, mode: ConverterMode, vin: float, vout: float) -> None:
+        """
+        bumpless mode change: preload the PI at the new mode's steady state
+        duty and blend the legs over mode_transition_s
+        """
+        duty = handover_duty(mode, vin, self.vtarget, self.config.pass_duty)
+        self.pi.preload(duty, self.vtarget, vout, vin, mode)
+
+        self.handover.reset(self.clock(), self.duty1, self.duty2, mode)
+        self.mode = mode
+
+    def _start_handover_fixed(self, mode: ConverterMode, vin_q: int, vout_q: int) -> None:
+        scale = self.scale
+        duty = handover_duty(mode, scale.q_to_volts(vin_q), self.vtarget, self.config.pass_duty)
+        self.fixed_pi.preload(scale.duty_to_counts(duty), self.vtarget_q, vout_q, vin_q, mode)
+
+        self.handover.reset(self.clock(), self.duty1, self.duty2, mode)
+        self.mode = mode
+
+    def _apply_handover(self, duty: float) -> None:
+        duty1, duty2, _ = self.handover.update(self.clock(), duty)
+        self._apply_raw_duties(duty1, duty2)
+
+    def _update_transition(self, requested_mode: ConverterMode) -> bool:
+        """
+        legacy handover (bumpless_transition False): runs an active duty
+        transition or starts one on a mode change.
+        returns True when the duties were handled here and PI must be skipped.
+        """
         if self.transition.active:
             self.duty1, self.duty2, done = self.transition.update()
             self._apply_raw_duties(self.duty1, self.duty2)
-            return
+            return True
 
         # if mode changed start a duty transition
         if requested_mode != self.mode:
@@ -302,6 +819,7 @@ class Converter:
                 mode_from = self.mode,
                 mode_to=requested_mode,
                 duty = self.duty,
+                pass_duty=self.config.pass_duty,
             )
 
             self.transition.reset(
@@ -314,17 +832,9 @@ class Converter:
             self.mode = requested_mode
             self.duty1, self.duty2, done = self.transition.update()
             self._apply_raw_duties(self.duty1, self.duty2)
-            return
-        
-        # normal PI update
-        self.duty = self.pi.update(
-            vtarget=self.vtarget,
-            vout=vout_f,
-            vin=vin_f,
-            mode=self.mode,
-        )
+            return True
 
-        self._apply_mode_and_duty(self.mode, self.duty)
+        return False
 
     def _update_stopping(self) -> None:
         self.duty1, self.duty2, done = self.transition.update()
@@ -337,28 +847,52 @@ class Converter:
     # -------------- mode and duty --------------
 
     def _apply_mode_and_duty(self, mode: ConverterMode, duty: float) -> None:
-        duty1, duty2 = map_mode_to_duties(mode, duty)
+        duty1, duty2 = map_mode_to_duties(mode, duty, self._pass_duty)
         self._apply_raw_duties(duty1, duty2)
 
     def _apply_raw_duties(self, duty1: float, duty2: float) -> None:
         self.duty1 = duty1
         self.duty2 = duty2
+        self._enable_gates(duty1 > 0, duty2 > 0)
+        self.pwm.set_duties(duty1, duty2)
+        self._disable_gates(duty1 > 0, duty2 > 0)
 
-        if duty1 > 0:
-            self.gate.enable("gd1")
-            self.pwm.set_duty("pwm1", duty1)
-        else:
-            self.pwm.stop_pwm("pwm1")
-            self.gate.disable("gd1")
-        
-        if duty2 > 0:
-            self.gate.enable("gd2")
-            self.pwm.set_duty("pwm2", duty2)
-        else:
-            self.pwm.stop_pwm("pwm2")
-            self.gate.disable("gd2")
+    def _enable_gates(self, on1: bool, on2: bool) -> None:
+        """
+        gates of running legs are enabled before both pwm channels are
+        updated together, stopped legs are disabled after it (_disable_gates)
+        """
+        if on1:
+            self.gate.enable(self._gd1)
+        if on2:
+            self.gate.enable(self._gd2)
+
+    def _disable_gates(self, on1: bool, on2: bool) -> None:
+        if not on1:
+            self.gate.disable(self._gd1)
+        if not on2:
+            self.gate.disable(self._gd2)
     
+    def _apply_mode_and_counts(self, mode: ConverterMode, counts: int) -> None:
+        if mode == ConverterMode.BUCK:
+            counts1, counts2 = counts, 0
+        elif mode == ConverterMode.BOOST:
+            counts1, counts2 = self._pass_counts, counts
+        else:
+            counts1, counts2 = self._pass_counts, 0
+
+        self.duty = counts / DUTY_SCALE
+        self.duty1 = counts1 / DUTY_SCALE
+        self.duty2 = counts2 / DUTY_SCALE
+
+        self._enable_gates(counts1 > 0, counts2 > 0)
+        self.pwm.set_duties_counts(counts1, counts2)
+        self._disable_gates(counts1 > 0, counts2 > 0)
+
     def force_safe_outputs(self) -> None:
+        if self._ramp:
+            self._stop_ramp()
+
         try:
             self.gpio.force_safe_outputs()
         except Exception:
@@ -370,46 +904,208 @@ class Converter:
     
     # -------------- fault handling --------------
 
-    def fault_stop(self, reason: str) -> None:
+    def fault_stop(self, reason: str, code: FaultCode = FaultCode.OTHER) -> None:
         self.fault_reason = reason
+        self.fault_code = code
+        self.fault_count += 1
+
+        if self.capture is not None:
+            self.capture.trigger(reason, code)
         self.force_safe_outputs()
         self.state = ConverterState.FAULT
+
+        # a fault goes out at once, not at the next status_every tick
+        if self.status_segment is not None and self.status_segment.is_open:
+            self._publish_status()
     
     def clear_fault(self) -> None:
         if self.state != ConverterState.FAULT:
             return
         
         self.fault_reason = None
+        self.fault_code = FaultCode.NONE
+
+        if self.capture is not None:
+            self.save_capture()
+            self.capture.rearm()
+
         self.cut_in.reset()
         self.pi.reset()
         self.soft_start.reset()
         self.mode_manager.reset()
+        self.transition.active = False
+        self.handover.active = False
         self.state = ConverterState.STANDBY
 
-    # -------------- measurements / status --------------
+    def _record_capture(self, t_start: int, t_read: int, t_end: int) -> None:
+        capture = self.capture
 
-    def _read_measurements(self) -> Measurements:
-        vin = self.adc.read_vin()
-        vout = self.adc.read_vout()
-        iin = self.ina.read_ina_in()
-        iout = self.ina.read_ina_out()
+        if capture.frozen:
+            return
 
-        return build_measurements(vin, vout, iin, iout)
-    
-    def get_status(self) -> ConverterStatus:
-        return ConverterStatus(
-            state=self.state,
-            mode=self.mode,
-            duty=self.duty,
-            duty1=self.duty1,
-            duty2=self.duty2,
-            vtarget=self.vtarget,
-            fault_reason=self.fault_reason,
+        if self._raw_sample:
+            vin, vout, iin, iout = self.last_raw
+            scale = self.scale
+            vin = scale.code_to_volts(vin)
+            vout = scale.code_to_volts(vout)
+            iin = scale.code_to_amps(iin)
+            iout = scale.code_to_amps(iout)
+        else:
+            m = self.last_measurements
+            vin, vout, iin, iout = m.vin, m.vout, m.iin, m.iout
+
+        capture.record(
+            t_start * 1e-9,
+            self.tick,
+            self.state,
+            self.mode,
+            vin,
+            vout,
+            iin,
+            iout,
+            self.duty1,
+            self.duty2,
+            self.vtarget,
+            (t_read - t_start) * 1e-3,
+            (t_end - t_read) * 1e-3,
         )
 
+    def save_capture(self) -> str | None:
+        """
+        writes a frozen capture to fault_capture_dir once, returns the path
+        or None when there is nothing new. this is file I/O, call it between
+        ticks (the run loop does while faulted, clear_fault before rearming),
+        never from inside update_converter
+        """
+        capture = self.capture
+        if (
+            capture is None
+            or not capture.frozen
+            or self.config.fault_capture_dir is None
+            or capture.trigger_count == self._capture_saved
+        ):
+            return None
+
+        self._capture_saved = capture.trigger_count
+        self.capture_path = os.path.join(
+            self.config.fault_capture_dir,
+            f"fault_{time.strftime('%Y%m%d_%H%M%S')}_{capture.trigger_count}.bin",
+        )
+        capture.dump(self.capture_path)
+        return self.capture_path
+
+    # -------------- integer control path --------------
+
+    def _configure_fixed_point(self) -> None:
+        """
+        converts limits and gains to raw code units once, before any switching
+        """
+        self.raw_safety = RawSafetyChecker.compile(self.safety.limits, self.scale)
+        self.fixed_pi = FixedPIController.from_float(self.pi, self.scale)
+
+        self.fixed_vin_filter = FixedLowPassFilter.from_alpha(self.vin_filter.alpha)
+        self.fixed_vout_filter = FixedLowPassFilter.from_alpha(self.vout_filter.alpha)
+
+        self.fixed_mode_manager = replace(
+            self.mode_manager,
+            margin_v=self.scale.volts_to_q(self.mode_manager.margin_v),
+            exit_margin_v=self.scale.volts_to_q(self.mode_manager.exit_margin_v),
+            changes=0,
+            suppressed=0,
+        )
+
+        self._pass_counts = self.scale.duty_to_counts(self.config.pass_duty)
 
+    def _seed_fixed_point(self, m: Measurements) -> None:
+        self.fixed_vin_filter.reset(self.scale.volts_to_q(m.vin))
+        self.fixed_vout_filter.reset(self.scale.volts_to_q(m.vout))
 
+        self.vtarget_q = self.scale.volts_to_q(self.vtarget)
+        self.fixed_pi.reset(self.scale.duty_to_counts(self.duty))
+        self.fixed_mode_manager.reset(self.mode)
 
+        self.protection.set_units(self.scale.volts_per_code, self.scale.amps_per_code)
 
+    # -------------- measurements / status --------------
 
+    def _read_measurements(self) -> Measurements:
+        adc = self.adc
+        ina = self.ina
+
+        return self.last_measurements.set(
+            adc.read_vin(),
+            adc.read_vout(),
+            ina.read_ina_in(),
+            ina.read_ina_out(),
+        )
 
+    def _read_raw_measurements(self) -> tuple[int, int, int, int]:
+        return (
+            self.adc.read_vin_raw(),
+            self.adc.read_vout_raw(),
+            self.ina.read_ina_in_raw(),
+            self.ina.read_ina_out_raw(),
+        )
+
+    def latest_measurements(self) -> Measurements:
+        """
+        last sample in engineering units. the integer path only keeps raw
+        codes per tick, they are converted here on demand.
+        """
+        if self._raw_sample:
+            vin, vout, iin, iout = self.last_raw
+            return build_measurements(
+                self.scale.code_to_volts(vin),
+                self.scale.code_to_volts(vout),
+                self.scale.code_to_amps(iin),
+                self.scale.code_to_amps(iout),
+            )
+
+        return self.last_measurements
+    
+    def _publish_status(self) -> None:
+        """
+        writes the status segment. ticks counts update_converter calls that
+        did work: full ticks and standby polls
+        """
+        self._status_ticks += self._status_every - self._status_countdown
+        self._status_countdown = self._status_every
+
+        m = self.latest_measurements()
+        modes = self.fixed_mode_manager if self._fixed_point and self.fixed_mode_manager is not None else self.mode_manager
+
+        self.status_segment.publish(
+            time.monotonic(),
+            self._status_ticks,
+            self.state,
+            self.mode,
+            self.fault_code,
+            self.duty,
+            self.duty1,
+            self.duty2,
+            self.vtarget,
+            self.derate,
+            m.vin,
+            m.vout,
+            m.iin,
+            m.iout,
+            m.powin,
+            m.powout,
+            self.fault_count,
+            modes.changes,
+            modes.suppressed,
+            self.capture.trigger_count if self.capture is not None else 0,
+            encode_reason(self.fault_reason),
+        )
+
+    def get_status(self) -> ConverterStatus:
+        status = self.status
+        status.state = self.state
+        status.mode = self.mode
+        status.duty = self.duty
+        status.duty1 = self.duty1
+        status.duty2 = self.duty2
+        status.vtarget = self.vtarget
+        status.fault_reason = self.fault_reason
+        status.fault_code = self.fault_code
+        return status
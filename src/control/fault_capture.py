@@ -0,0 +1,246 @@
+"""
+oscilloscope style capture around a fault.
+
+FaultCapture keeps the last `depth` ticks in a preallocated flat array.
+trigger() is called from Converter.fault_stop, recording then continues for
+`post` more ticks and the buffer freezes. nothing is allocated per tick,
+record() only stores into the existing array. dump() writes a file and is
+not for the tick, Converter.save_capture calls it from the run loop.
+
+dump() writes a small binary file:
+    header  struct HEADER_FMT (magic, version, fields, samples, trigger index, fault code)
+    reason  utf-8, REASON_BYTES zero padded
+    names   comma separated field names, u16 length prefix
+    rows    float64 little endian, samples * fields
+
+python -m control.fault_capture capture.bin   prints it as csv
+"""
+
+from array import array
+import struct
+import sys
+
+
+MAGIC = b"UTFC"
+VERSION = 1
+
+HEADER_FMT = "<4sHHIIH"
+REASON_BYTES = 96
+
+FIELDS = (
+    "t",
+    "tick",
+    "state",
+    "mode",
+    "vin",
+    "vout",
+    "iin",
+    "iout",
+    "duty1",
+    "duty2",
+    "vtarget",
+    "read_us",
+    "control_us",
+)
+N_FIELDS = len(FIELDS)
+
+
+class FaultCaptureError(RuntimeError):
+    pass
+
+
+class FaultCapture:
+    def __init__(self, depth: int = 2048, post: int = 256):
+        if depth <= 0 or not 0 <= post < depth:
+            raise FaultCaptureError("need depth > 0 and 0 <= post < depth")
+
+        self.depth = depth
+        self.post = post
+
+        self._buf = array("d", bytes(8 * depth * N_FIELDS))
+        self._index = 0
+        self._count = 0
+
+        self.triggered = False
+        self.frozen = False
+        self.trigger_count = 0
+        self.reason = ""
+        self.fault_code = 0
+
+        self._post_left = 0
+        self._trigger_slot = 0
+
+    def rearm(self) -> None:
+        self._index = 0
+        self._count = 0
+        self.triggered = False
+        self.frozen = False
+        self.reason = ""
+        self.fault_code = 0
+        self._post_left = 0
+
+    # -------------- per tick --------------
+
+    def record(
+        self,
+        t: float,
+        tick: int,
+        state: int,
+        mode: int,
+        vin: float,
+        vout: float,
+        iin: float,
+        iout: float,
+        duty1: float,
+        duty2: float,
+        vtarget: float,
+        read_us: float,
+        control_us: float,
+    ) -> None:
+        if self.frozen:
+            return
+
+        buf = self._buf
+        i = self._index * N_FIELDS
+
+        buf[i] = t
+        buf[i + 1] = tick
+        buf[i + 2] = state
+        buf[i + 3] = mode
+        buf[i + 4] = vin
+        buf[i + 5] = vout
+        buf[i + 6] = iin
+        buf[i + 7] = iout
+        buf[i + 8] = duty1
+        buf[i + 9] = duty2
+        buf[i + 10] = vtarget
+        buf[i + 11] = read_us
+        buf[i + 12] = control_us
+
+        self._index += 1
+        if self._index == self.depth:
+            self._index = 0
+
+        if self._count < self.depth:
+            self._count += 1
+
+        if self.triggered:
+            self._post_left -= 1
+            if self._post_left <= 0:
+                self.frozen = True
+
+    def trigger(self, reason: str, fault_code: int = 0) -> None:
+        """
+        marks the next recorded sample as the trigger point, ignored once triggered
+        """
+        if self.triggered:
+            return
+
+        self.triggered = True
+        self.trigger_count += 1
+        self.reason = reason
+        self.fault_code = int(fault_code)
+
+        self._trigger_slot = self._index
+        # the trigger tick itself plus `post` ticks after it
+        self._post_left = self.post + 1
+
+    # -------------- readout --------------
+
+    def _order(self) -> list[int]:
+        start = (self._index - self._count) % self.depth
+        return [(start + k) % self.depth for k in range(self._count)]
+
+    def samples(self) -> list[tuple[float, ...]]:
+        buf = self._buf
+        return [
+            tuple(buf[slot * N_FIELDS:(slot + 1) * N_FIELDS])
+            for slot in self._order()
+        ]
+
+    def trigger_index(self) -> int:
+        if not self.triggered:
+            return 0
+        order = self._order()
+        return order.index(self._trigger_slot) if self._trigger_slot in order else 0
+
+    def dump(self, path: str) -> None:
+        order = self._order()
+        rows = array("d")
+        for slot in order:
+            rows.extend(self._buf[slot * N_FIELDS:(slot + 1) * N_FIELDS])
+
+        if sys.byteorder != "little":
+            rows.byteswap()
+
+        names = ",".join(FIELDS).encode("ascii")
+        # cut on a character boundary, a split multibyte character would not decode
+        reason = self.reason.encode("utf-8")[:REASON_BYTES].decode("utf-8", "ignore").encode("utf-8")
+        reason = reason.ljust(REASON_BYTES, b"\0")
+
+        with open(path, "wb") as f:
+            f.write(struct.pack(
+                HEADER_FMT,
+                MAGIC,
+                VERSION,
+                N_FIELDS,
+                len(order),
+                self.trigger_index(),
+                self.fault_code,
+            ))
+            f.write(reason)
+            f.write(struct.pack("<H", len(names)))
+            f.write(names)
+            rows.tofile(f)
+
+
+def load(path: str) -> dict:
+    with open(path, "rb") as f:
+        data = f.read()
+
+    header_size = struct.calcsize(HEADER_FMT)
+    magic, version, n_fields, n_samples, trigger_index, fault_code = struct.unpack_from(HEADER_FMT, data)
+
+    if magic != MAGIC or version != VERSION:
+        raise FaultCaptureError(f"{path} is not a fault capture v{VERSION} file")
+
+    pos = header_size
+    reason = data[pos:pos + REASON_BYTES].rstrip(b"\0").decode("utf-8", "replace")
+    pos += REASON_BYTES
+
+    (names_len,) = struct.unpack_from("<H", data, pos)
+    pos += 2
+    fields = data[pos:pos + names_len].decode("ascii").split(",")
+    pos += names_len
+
+    rows = array("d")
+    rows.frombytes(data[pos:pos + 8 * n_fields * n_samples])
+    if sys.byteorder != "little":
+        rows.byteswap()
+
+    return {
+        "fields": fields,
+        "reason": reason,
+        "fault_code": fault_code,
+        "trigger_index": trigger_index,
+        "samples": [tuple(rows[k * n_fields:(k + 1) * n_fields]) for k in range(n_samples)],
+    }
+
+
+def main() -> int:
+    if len(sys.argv) != 2:
+        print("usage: python -m control.fault_capture <capture.bin>")
+        return 1
+
+    capture = load(sys.argv[1])
+    print(f"# reason={capture['reason']} code={capture['fault_code']} trigger_index={capture['trigger_index']}")
+    print(",".join(capture["fields"]))
+
+    for row in capture["samples"]:
+        print(",".join(f"{v:.6g}" for v in row))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
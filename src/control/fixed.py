@@ -0,0 +1,327 @@
+"""
+integer domain control path.
+
+runs the filters, PI and safety thresholds directly on raw sensor codes:
+- voltages are MCP3208 codes (0-4095)
+- currents are INA229 CURRENT register codes (20 bit signed)
+- duties are pigpio hardware_PWM counts (0-1_000_000)
+
+filter outputs and vtarget are kept in Q16 (code << 16) so the filter keeps
+sub-code resolution. every float gain and limit is converted once through
+RawScale, the per tick control math stays in integers. P&O still
+runs in volts, it only runs at po_rate.
+
+tolerance against the float path (checked by bench/fixed_parity.py):
+- filtered voltage: within 1/1024 of an ADC code
+- PI duty: within 10 pigpio counts (0.001 %)
+- safety fault codes: identical
+"""
+
+from dataclasses import dataclass
+import math
+
+from control.control import (
+    ConverterMode,
+    FaultCode,
+    PIController,
+    SafetyChecker,
+    SafetyLimits,
+    build_measurements,
+)
+
+
+DUTY_SCALE = 1_000_000
+
+Q_BITS = 16
+Q_ONE = 1 << Q_BITS
+
+_FAULT_NONE = FaultCode.NONE
+
+
+# -------------- scale factors --------------
+
+@dataclass(frozen=True)
+class RawScale:
+    """
+    conversion factors between raw codes and engineering units.
+    only used at configure time and for status/logging, never per tick.
+    """
+    volts_per_code: float
+    amps_per_code: float
+
+    @classmethod
+    def from_sensors(
+        cls,
+        vref: float,
+        divider_ratio: float,
+        adc_bits: int,
+        current_lsb: float,
+    ) -> "RawScale":
+        return cls(
+            volts_per_code=vref * divider_ratio / ((1 << adc_bits) - 1),
+            amps_per_code=current_lsb,
+        )
+
+    def volts_to_q(self, volts: float) -> int:
+        return int(round(volts / self.volts_per_code * Q_ONE))
+
+    def q_to_volts(self, value_q: int) -> float:
+        return value_q * self.volts_per_code / Q_ONE
+
+    def code_to_volts(self, code: int) -> float:
+        return code * self.volts_per_code
+
+    def code_to_amps(self, code: int) -> float:
+        return code * self.amps_per_code
+
+    @staticmethod
+    def duty_to_counts(duty: float) -> int:
+        return int(round(duty * DUTY_SCALE))
+
+    @staticmethod
+    def counts_to_duty(counts: int) -> float:
+        return counts / DUTY_SCALE
+
+
+# -------------- raw safety windows --------------
+
+@dataclass(frozen=True)
+class RawSafetyWindows:
+    """
+    per channel [lo, hi] code windows, a sample is safe when every code is inside
+    """
+    vin_lo: int
+    vin_hi: int
+    vout_lo: int
+    vout_hi: int
+    iin_lo: int
+    iin_hi: int
+    iout_lo: int
+    iout_hi: int
+
+
+@dataclass
+class RawSafetyChecker:
+    """
+    SafetyChecker on raw codes. limits are compiled into code windows once,
+    check() is four chained integer comparisons returning a FaultCode and the
+    reason string is only built by describe() once a fault latches.
+    codes are always finite so there is no non finite case.
+    """
+    windows: RawSafetyWindows
+    scale: RawScale
+
+    def __post_init__(self) -> None:
+        # flat tuple so the tick check is one attribute load and an unpack
+        w = self.windows
+        self._bounds = (
+            w.vin_lo, w.vin_hi,
+            w.vout_lo, w.vout_hi,
+            w.iin_lo, w.iin_hi,
+            w.iout_lo, w.iout_hi,
+        )
+
+    @classmethod
+    def compile(cls, limits: SafetyLimits, scale: RawScale) -> "RawSafetyChecker":
+        """
+        max limits round down and min limits round up, so
+        code > vin_hi is the same decision as volts > limits.vin_max.
+        """
+        iin_max = math.floor(limits.iin_max / scale.amps_per_code)
+        iout_max = math.floor(limits.iout_max / scale.amps_per_code)
+
+        return cls(
+            windows=RawSafetyWindows(
+                vin_lo=math.ceil(limits.vin_min / scale.volts_per_code),
+                vin_hi=math.floor(limits.vin_max / scale.volts_per_code),
+                vout_lo=0,  # MCP3208 codes are unsigned, no lower output limit
+                vout_hi=math.floor(limits.vout_max / scale.volts_per_code),
+                iin_lo=-iin_max,
+                iin_hi=iin_max,
+                iout_lo=-iout_max,
+                iout_hi=iout_max,
+            ),
+            scale=scale,
+        )
+
+    def check(self, vin: int, vout: int, iin: int, iout: int) -> FaultCode:
+        vin_lo, vin_hi, vout_lo, vout_hi, iin_lo, iin_hi, iout_lo, iout_hi = self._bounds
+
+        if (
+            vin_lo <= vin <= vin_hi
+            and vout_lo <= vout <= vout_hi
+            and iin_lo <= iin <= iin_hi
+            and iout_lo <= iout <= iout_hi
+        ):
+            return _FAULT_NONE
+
+        return self._classify(vin, vout, iin, iout)
+
+    def _classify(self, vin: int, vout: int, iin: int, iout: int) -> FaultCode:
+        w = self.windows
+
+        if vin < w.vin_lo:
+            return FaultCode.VIN_UNDER
+
+        if vin > w.vin_hi:
+            return FaultCode.VIN_OVER
+
+        if vout > w.vout_hi:
+            return FaultCode.VOUT_OVER
+
+        if not w.iin_lo <= iin <= w.iin_hi:
+            return FaultCode.IIN_OVER
+
+        if not w.iout_lo <= iout <= w.iout_hi:
+            return FaultCode.IOUT_OVER
+
+        return FaultCode.NONE
+
+    def describe(self, code: FaultCode, vin: int, vout: int, iin: int, iout: int) -> str:
+        return SafetyChecker.describe(
+            code,
+            build_measurements(
+                self.scale.code_to_volts(vin),
+                self.scale.code_to_volts(vout),
+                self.scale.code_to_amps(iin),
+                self.scale.code_to_amps(iout),
+            ),
+        )
+
+
+# -------------- low pass filter --------------
+
+@dataclass
+class FixedLowPassFilter:
+    """
+    LowPassFilter on raw codes. alpha_q is alpha in Q16, value_q is code in Q16.
+    """
+    alpha_q: int = int(round(0.3 * Q_ONE))
+    value_q: int = 0
+    initialized: bool = False
+
+    @classmethod
+    def from_alpha(cls, alpha: float) -> "FixedLowPassFilter":
+        return cls(alpha_q=int(round(alpha * Q_ONE)))
+
+    def reset(self, value_q: int = 0) -> None:
+        self.value_q = value_q
+        self.initialized = True
+
+    def update(self, raw: int) -> int:
+        if not self.initialized:
+            self.reset(raw << Q_BITS)
+            return self.value_q
+
+        self.value_q += (self.alpha_q * ((raw << Q_BITS) - self.value_q)) >> Q_BITS
+        return self.value_q
+
+
+# -------------- PI --------------
+
+@dataclass
+class FixedPIController:
+    """
+    PIController on Q16 voltage codes with the duty in pigpio counts.
+
+    kp_q:       counts per Q16 code, Q16
+    ki_q:       counts per Q16 code per tick (ki * dt folded in), Q16
+    ff_gain_q:  ff_gain in Q16
+    integral_q: integral term in counts, Q16
+    """
+    kp_q: int = 0
+    ki_q: int = 0
+    ff_gain_q: int = 0
+
+    duty_min: int = 0
+    duty_max_buck: int = 0
+    duty_max_boost: int = 0
+
+    max_duty_step: int = 0
+
+    integral_q: int = 0
+    duty: int = 0
+
+    @classmethod
+    def from_float(cls, pi: PIController, scale: RawScale) -> "FixedPIController":
+        counts_per_code = scale.volts_per_code * DUTY_SCALE
+
+        return cls(
+            kp_q=int(round(pi.kp * counts_per_code * Q_ONE)),
+            ki_q=int(round(pi.ki * pi.dt * counts_per_code * Q_ONE)),
+            ff_gain_q=int(round(pi.ff_gain * Q_ONE)),
+            duty_min=scale.duty_to_counts(pi.duty_min),
+            duty_max_buck=scale.duty_to_counts(pi.duty_max_buck),
+            duty_max_boost=scale.duty_to_counts(pi.duty_max_boost),
+            max_duty_step=scale.duty_to_counts(pi.max_duty_step),
+        )
+
+    def reset(self, duty: int = 0) -> None:
+        self.integral_q = 0
+        self.duty = duty
+
+    def update(self, vtarget_q: int, vout_q: int, vin_q: int, mode: ConverterMode) -> int:
+        error_q = vtarget_q - vout_q
+
+        if mode == ConverterMode.BUCK:
+            duty_max = self.duty_max_buck
+            feedforward = (vtarget_q * DUTY_SCALE) // max(vin_q, 1)
+
+        elif mode == ConverterMode.BOOST:
+            duty_max = self.duty_max_boost
+            feedforward = DUTY_SCALE - (vin_q * DUTY_SCALE) // max(vtarget_q, 1)
+
+        else:
+            return self.duty
+
+        duty_min = self.duty_min
+        feedforward = max(duty_min, min(feedforward, duty_max))
+
+        p_term = (self.kp_q * error_q) >> (2 * Q_BITS)
+        ff_term = (self.ff_gain_q * feedforward) >> Q_BITS
+
+        u_unsat = ff_term + p_term + (self.integral_q >> Q_BITS)
+        u_sat = max(duty_min, min(u_unsat, duty_max))
+
+        # anti windup
+        if (
+            u_unsat == u_sat
+            or (u_sat >= duty_max and error_q < 0)
+            or (u_sat <= duty_min and error_q > 0)
+        ):
+            self.integral_q += (self.ki_q * error_q) >> Q_BITS
+
+        u_unsat = ff_term + p_term + (self.integral_q >> Q_BITS)
+        u_sat = max(duty_min, min(u_unsat, duty_max))
+
+        step = self.max_duty_step
+        delta = max(-step, min(u_sat - self.duty, step))
+        self.duty = max(duty_min, min(self.duty + delta, duty_max))
+
+        return self.duty
+
+    def preload(self, duty: int, vtarget_q: int, vout_q: int, vin_q: int, mode: ConverterMode) -> int:
+        """
+        PIController.preload in counts
+        """
+        if mode == ConverterMode.BUCK:
+            duty_max = self.duty_max_buck
+            feedforward = (vtarget_q * DUTY_SCALE) // max(vin_q, 1)
+
+        elif mode == ConverterMode.BOOST:
+            duty_max = self.duty_max_boost
+            feedforward = DUTY_SCALE - (vin_q * DUTY_SCALE) // max(vtarget_q, 1)
+
+        else:
+            return self.duty
+
+        duty_min = self.duty_min
+        feedforward = max(duty_min, min(feedforward, duty_max))
+
+        p_term = (self.kp_q * (vtarget_q - vout_q)) >> (2 * Q_BITS)
+        ff_term = (self.ff_gain_q * feedforward) >> Q_BITS
+
+        self.duty = max(duty_min, min(duty, duty_max))
+        self.integral_q = (self.duty - ff_term - p_term) << Q_BITS
+
+        return self.duty
@@ -0,0 +1,88 @@
+"""
+the control loop both entry points run: main.py in one process, core.py in
+the split setup. update_converter at tick_period_s, a heartbeat beat after
+every tick, the fault capture written between ticks and fault recovery.
+
+whatever an entry point does on top (status prints, telemetry, commands)
+goes in on_tick, called with the status of every tick after recovery ran.
+"""
+
+import time
+from typing import Callable
+
+from control.control import ConverterState
+from control.converter import Converter, ConverterStatus
+from control.recovery import RecoveryManager
+from control.watchdog import Heartbeat
+
+
+def run(
+    converter: Converter,
+    recovery: RecoveryManager,
+    heartbeat: Heartbeat,
+    keep_running: Callable[[], bool],
+    on_tick: Callable[[ConverterStatus], None] | None = None,
+) -> int:
+    """
+    ticks until keep_running() is False, then stops the converter. 0 after a
+    clean stop, 1 when recovery gave up on a fault
+    """
+    next_tick_s = time.monotonic()
+
+    while keep_running():
+        status = converter.update_converter()
+        heartbeat.beat(converter.tick_period_s)
+
+        # a frozen fault capture is written here, between ticks, before recovery can rearm it
+        if status.state == ConverterState.FAULT:
+            converter.save_capture()
+
+        recovery.update(converter)
+
+        if on_tick is not None:
+            on_tick(status)
+
+        if recovery.gave_up:
+            return 1
+
+        # tick_period_s is 1 / pi_rate, or the slower standby poll period while waiting for cut in
+        next_tick_s += converter.tick_period_s
+        sleep_s = next_tick_s - time.monotonic()
+        if sleep_s > 0:
+            time.sleep(sleep_s)
+        else:
+            next_tick_s = time.monotonic()
+
+    # after stop_converter the converter ramps down and ends in standby
+    converter.stop_converter()
+    loop_period_s = 1.0 / converter.config.pi_rate
+
+    while converter.get_status().state == ConverterState.STOPPING:
+        status = converter.update_converter()
+        heartbeat.beat(loop_period_s)
+
+        if on_tick is not None:
+            on_tick(status)
+
+        time.sleep(loop_period_s)
+
+    return 0
+
+
+def shutdown(converter: Converter, heartbeat: Heartbeat) -> None:
+    """
+    final shutdown: stop_converter, every output pin in its safe level, deinit.
+    the heartbeat record goes last, a clean exit is not a stall for the supervisor
+    """
+    try:
+        converter.stop_converter()
+        converter.force_safe_outputs()
+    except Exception:
+        pass
+
+    try:
+        converter.deinit()
+    except Exception:
+        pass
+
+    heartbeat.close()
@@ -0,0 +1,187 @@
+"""
+time aware protection on top of SafetyChecker.
+
+tier 1, every tick: SafetyChecker instantaneous limits (in the converter).
+tier 2, every tick O(1): ProtectionEngine.update adds the sample to running sums.
+tier 3, every slow_divider ticks: the sums are turned into
+    - I2t above the continuous current rating
+    - sustained (averaged) input power
+    - Vout rate of rise
+    - INA229 die temperature (fed by the converter at its own rate)
+and compared against ProtectionLimits.
+
+before a slow limit trips, derate drops linearly from 1.0 to derate_min
+between derate_start and 1.0 of the limit. the converter scales its duty
+ceiling with it so the turbine keeps harvesting at reduced power.
+"""
+
+from dataclasses import dataclass, field
+
+from control.control import FaultCode
+
+
+_FAULT_NONE = FaultCode.NONE
+
+
+@dataclass
+class ProtectionLimits:
+    # I2t, only current above i_continuous accumulates
+    i_continuous: float = 8.0       # A
+    i2t_limit: float = 40.0         # A^2 s
+
+    # sustained input power, first order average over p_window_s
+    p_max: float = 350.0            # W
+    p_window_s: float = 2.0
+
+    # output voltage rate of rise
+    dvout_dt_max: float = 10_000.0  # V/s
+
+    # INA229 die temperature
+    temp_max_c: float = 110.0
+
+    # derating
+    derate_start: float = 0.7       # fraction of a limit where derating starts
+    derate_min: float = 0.3         # duty ceiling factor right before a trip
+
+
+@dataclass
+class ProtectionEngine:
+    limits: ProtectionLimits = field(default_factory=ProtectionLimits)
+    dt: float = 1.0 / 30_000.0
+    slow_divider: int = 30
+
+    # units of the values passed to update(), 1.0 for volts/amps,
+    # RawScale factors for the integer control path
+    volts_per_unit: float = 1.0
+    amps_per_unit: float = 1.0
+
+    i2t: float = 0.0
+    p_avg: float = 0.0
+    dvout_dt: float = 0.0
+    temperature_c: float = 25.0
+    derate: float = 1.0
+    fault_code: FaultCode = FaultCode.NONE
+
+    _ticks: int = 0
+    _i2_sum: float = 0.0
+    _p_sum: float = 0.0
+    _prev_vout: float | None = None
+
+    def reset(self) -> None:
+        self.i2t = 0.0
+        self.p_avg = 0.0
+        self.dvout_dt = 0.0
+        self.derate = 1.0
+        self.fault_code = FaultCode.NONE
+
+        self._ticks = 0
+        self._i2_sum = 0.0
+        self._p_sum = 0.0
+        self._prev_vout = None
+
+    def update(self, vin, vout, iin, iout) -> FaultCode:
+        """
+        per tick, only sums. returns a FaultCode when a slow limit trips.
+        """
+        a = iin if iin >= 0 else -iin
+        b = iout if iout >= 0 else -iout
+        i = a if a > b else b
+
+        self._i2_sum += i * i
+        self._p_sum += vin * iin
+        self._ticks += 1
+
+        if self._ticks < self.slow_divider:
+            return _FAULT_NONE
+
+        return self._evaluate_slow(vout)
+
+    def set_units(self, volts_per_unit: float, amps_per_unit: float) -> None:
+        """
+        switches the units of update() inputs, drops the partial sums
+        """
+        self.volts_per_unit = volts_per_unit
+        self.amps_per_unit = amps_per_unit
+
+        self._ticks = 0
+        self._i2_sum = 0.0
+        self._p_sum = 0.0
+
+    def update_temperature(self, temperature_c: float) -> None:
+        self.temperature_c = temperature_c
+
+    def _evaluate_slow(self, vout) -> FaultCode:
+        limits = self.limits
+
+        ticks = self._ticks
+        dt_slow = ticks * self.dt
+
+        amps_sq = self.amps_per_unit * self.amps_per_unit
+        i2_mean = self._i2_sum * amps_sq / ticks
+        p_mean = self._p_sum * self.volts_per_unit * self.amps_per_unit / ticks
+        vout = vout * self.volts_per_unit
+
+        self._ticks = 0
+        self._i2_sum = 0.0
+        self._p_sum = 0.0
+
+        # I2t leaks back down while the current is below the continuous rating
+        self.i2t = max(0.0, self.i2t + (i2_mean - limits.i_continuous ** 2) * dt_slow)
+
+        alpha = min(1.0, dt_slow / limits.p_window_s)
+        self.p_avg += alpha * (p_mean - self.p_avg)
+
+        if self._prev_vout is not None:
+            self.dvout_dt = (vout - self._prev_vout) / dt_slow
+        self._prev_vout = vout
+
+        if self.i2t > limits.i2t_limit:
+            return self._trip(FaultCode.I2T)
+
+        if self.p_avg > limits.p_max:
+            return self._trip(FaultCode.OVERPOWER)
+
+        if self.dvout_dt > limits.dvout_dt_max:
+            return self._trip(FaultCode.VOUT_SLEW)
+
+        if self.temperature_c > limits.temp_max_c:
+            return self._trip(FaultCode.OVERTEMP)
+
+        load = max(
+            self.i2t / limits.i2t_limit,
+            self.p_avg / limits.p_max,
+            self.temperature_c / limits.temp_max_c,
+        )
+        self.derate = self._derate_for(load)
+
+        return _FAULT_NONE
+
+    def _derate_for(self, load: float) -> float:
+        limits = self.limits
+
+        if load <= limits.derate_start:
+            return 1.0
+
+        span = 1.0 - limits.derate_start
+        frac = min(1.0, (load - limits.derate_start) / span)
+
+        return 1.0 - frac * (1.0 - limits.derate_min)
+
+    def _trip(self, code: FaultCode) -> FaultCode:
+        self.fault_code = code
+        return code
+
+    def describe(self, code: FaultCode) -> str:
+        if code == FaultCode.I2T:
+            return f"I2t overcurrent: {self.i2t:.2f} A2s"
+
+        if code == FaultCode.OVERPOWER:
+            return f"sustained overpower: {self.p_avg:.1f} W"
+
+        if code == FaultCode.VOUT_SLEW:
+            return f"output voltage rising too fast: {self.dvout_dt:.0f} V/s"
+
+        if code == FaultCode.OVERTEMP:
+            return f"INA229 overtemperature: {self.temperature_c:.1f} C"
+
+        return f"fault {code.name.lower()}"
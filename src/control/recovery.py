@@ -0,0 +1,179 @@
+"""
+automatic fault recovery for Converter.
+
+faults are classified from the FaultCode latched by Converter.fault_stop:
+- TRANSIENT:  overcurrent, I2t, Vout slew, input undervoltage. retried quickly
+- PERSISTENT: overvoltage, sustained overpower, overtemperature. long backoff
+- SENSOR:     non finite values and driver/SPI exceptions. few retries
+
+after each fault the manager waits base_delay * multiplier**n (capped at
+max_delay_s), then calls clear_fault() so the converter goes back through
+STANDBY -> STARTUP once the cut in debounce passes. n counts retries inside
+retry_window_s; past max_retries (or sensor_max_retries for SENSOR) it gives
+up and leaves the converter in FAULT. running fault free for stable_reset_s
+resets the backoff.
+
+the clock is injectable so the same code runs against the sim rig.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+import time
+from typing import Callable
+
+from control.control import ConverterState, FaultCode
+
+
+class FaultClass(IntEnum):
+    TRANSIENT = 0
+    PERSISTENT = 1
+    SENSOR = 2
+
+
+FAULT_CLASSES = {
+    FaultCode.IIN_OVER: FaultClass.TRANSIENT,
+    FaultCode.IOUT_OVER: FaultClass.TRANSIENT,
+    FaultCode.I2T: FaultClass.TRANSIENT,
+    FaultCode.VOUT_SLEW: FaultClass.TRANSIENT,
+    FaultCode.VIN_UNDER: FaultClass.TRANSIENT,
+    FaultCode.VIN_OVER: FaultClass.PERSISTENT,
+    FaultCode.VOUT_OVER: FaultClass.PERSISTENT,
+    FaultCode.OVERPOWER: FaultClass.PERSISTENT,
+    FaultCode.OVERTEMP: FaultClass.PERSISTENT,
+    FaultCode.NON_FINITE: FaultClass.SENSOR,
+    FaultCode.OTHER: FaultClass.SENSOR,
+}
+
+
+def classify_fault(code: FaultCode) -> FaultClass:
+    return FAULT_CLASSES.get(code, FaultClass.SENSOR)
+
+
+@dataclass
+class RecoveryPolicy:
+    transient_delay_s: float = 1.0
+    persistent_delay_s: float = 30.0
+    sensor_delay_s: float = 5.0
+
+    multiplier: float = 2.0
+    max_delay_s: float = 600.0
+
+    max_retries: int = 10
+    sensor_max_retries: int = 3
+    retry_window_s: float = 3600.0
+
+    stable_reset_s: float = 300.0
+
+    def base_delay(self, fault_class: FaultClass) -> float:
+        if fault_class == FaultClass.TRANSIENT:
+            return self.transient_delay_s
+        if fault_class == FaultClass.PERSISTENT:
+            return self.persistent_delay_s
+        return self.sensor_delay_s
+
+
+class RecoveryManager:
+    def __init__(
+        self,
+        policy: RecoveryPolicy = RecoveryPolicy(),
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.policy = policy
+        self.clock = clock
+
+        self.pending = False
+        self.gave_up = False
+        self.retry_at = 0.0
+        self.last_class = None
+        self.last_code = FaultCode.NONE
+
+        self.faults_total = 0
+        self.recoveries = 0
+        self.class_counts = {c: 0 for c in FaultClass}
+
+        # (time, class) of retries inside retry_window_s, fault times inside the last hour
+        self._retries: deque[tuple[float, FaultClass]] = deque()
+        self._fault_times: deque[float] = deque()
+        self._consecutive = 0
+        self._last_fault_s = None
+
+    # -------------- main entry --------------
+
+    def update(self, converter) -> None:
+        """
+        call once per loop after update_converter
+        """
+        state = converter.state
+
+        if state == ConverterState.FAULT:
+            now = self.clock()
+
+            if not self.pending and not self.gave_up:
+                self._on_fault(converter.fault_code, now)
+
+            elif self.pending and now >= self.retry_at:
+                self.pending = False
+                self.recoveries += 1
+                self._retries.append((now, self.last_class))
+                converter.clear_fault()
+
+        elif (
+            self._consecutive
+            and state == ConverterState.NORMAL
+            and self.clock() - self._last_fault_s >= self.policy.stable_reset_s
+        ):
+            self._consecutive = 0
+
+    def _on_fault(self, code: FaultCode, now: float) -> None:
+        policy = self.policy
+        fault_class = classify_fault(code)
+
+        self.faults_total += 1
+        self.class_counts[fault_class] += 1
+        self.last_class = fault_class
+        self.last_code = code
+
+        self._fault_times.append(now)
+        self._last_fault_s = now
+        self._trim(now)
+
+        sensor_retries = sum(1 for _, c in self._retries if c == FaultClass.SENSOR)
+        if (
+            len(self._retries) >= policy.max_retries
+            or (fault_class == FaultClass.SENSOR and sensor_retries >= policy.sensor_max_retries)
+        ):
+            self.gave_up = True
+            return
+
+        delay = policy.base_delay(fault_class) * policy.multiplier ** self._consecutive
+        self.retry_at = now + min(delay, policy.max_delay_s)
+        self._consecutive += 1
+        self.pending = True
+
+    def _trim(self, now: float) -> None:
+        while self._retries and now - self._retries[0][0] > self.policy.retry_window_s:
+            self._retries.popleft()
+
+        while self._fault_times and now - self._fault_times[0] > 3600.0:
+            self._fault_times.popleft()
+
+    # -------------- reporting --------------
+
+    def faults_per_hour(self) -> int:
+        self._trim(self.clock())
+        return len(self._fault_times)
+
+    def time_to_retry(self) -> float:
+        if not self.pending:
+            return 0.0
+        return max(0.0, self.retry_at - self.clock())
+
+    def reset(self) -> None:
+        """
+        operator reset after giving up
+        """
+        self.pending = False
+        self.gave_up = False
+        self._consecutive = 0
+        self._retries.clear()
@@ -0,0 +1,190 @@
+"""
+single producer / single consumer ring buffers in shared memory.
+
+the control core (core.py) and the service process (services.py) only talk
+through these: telemetry frames one way, commands the other. records have a
+fixed struct format. the producer never waits, a full ring drops the record
+and counts it in `dropped`, so a stalled consumer cannot hold up control.
+
+layout, all little endian:
+    header   HEADER_WORDS uint64: head, tail, dropped, capacity, record size
+    slots    capacity * (record size + 4) bytes: the record, then its crc32
+
+head is only written by the producer, tail only by the consumer. capacity
+is a power of two, a slot is index & (capacity - 1).
+
+ordering: the producer writes the record, then publishes head; the consumer
+reads the records, then publishes tail. head and tail are aligned 8 byte
+stores and never tear, but these are plain mmap stores, python has no
+barrier to put between the record and the index. x86 keeps stores in
+program order, the Pi's Cortex-A53 (ARMv8) does not: a reader on another
+core may see the new head before the record it covers. so the order is
+checked instead of assumed. every slot ends with crc32(record) seeded with
+its index, and pop() only takes a record whose crc matches its index; at
+the first that does not (not visible yet, or a stale record from the
+previous lap) it stops and leaves the rest for the next pop(). the other
+direction needs no check: tail is stored only after the crc compare, which
+depends on every byte read, and ARMv8 never makes a store visible ahead of
+a branch on an earlier load.
+
+the rings are files in SHM_DIR mapped with mmap, not
+multiprocessing.shared_memory: its resource tracker unlinks segments when
+an attaching process exits. the creator removes the file in close().
+"""
+
+import mmap
+import os
+import secrets
+import struct
+import zlib
+
+
+HEADER_WORDS = 8
+HEADER_SIZE = 8 * HEADER_WORDS
+
+HEAD, TAIL, DROPPED, CAPACITY, RECORD_SIZE = range(5)
+
+SHM_DIR = "/dev/shm"
+
+CRC = struct.Struct("<I")
+INDEX_MASK = 0xFFFFFFFF
+
+
+# -------------- record formats --------------
+
+# core -> services, one per telemetry_every ticks and on every state change:
+# monotonic time, tick, state, mode, fault code, vin, vout, iin, iout, duty1, duty2, vtarget
+TELEMETRY_FMT = "<dQBBB5x7d"
+
+# services -> core: command, argument
+COMMAND_FMT = "<B7xd"
+
+CMD_STOP = 1
+CMD_CLEAR_FAULT = 2
+CMD_START = 3
+
+
+class RingError(RuntimeError):
+    pass
+
+
+class ShmRing:
+    def __init__(self, name: str, record_fmt: str, owner: bool):
+        self.name = name
+        self.path = os.path.join(SHM_DIR, name)
+        self.owner = owner
+
+        fd = os.open(self.path, os.O_RDWR)
+        try:
+            self._mm = mmap.mmap(fd, 0)
+        finally:
+            os.close(fd)
+
+        self._struct = struct.Struct(record_fmt)
+        self._buf = memoryview(self._mm)
+        self._header = self._buf[:HEADER_SIZE].cast("Q")
+
+        if self._header[RECORD_SIZE] != self._struct.size:
+            size = self._header[RECORD_SIZE]
+            self.close()
+            raise RingError(f"ring {name}: record size {size}, format needs {self._struct.size}")
+
+        self.capacity = self._header[CAPACITY]
+        self._mask = self.capacity - 1
+        self._slot = self._struct.size + CRC.size
+
+    @classmethod
+    def create(cls, record_fmt: str, capacity: int = 4096, name: str | None = None) -> "ShmRing":
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise RingError(f"ring capacity must be a power of two, got {capacity}")
+
+        name = name or f"utwind-ring-{secrets.token_hex(4)}"
+        size = struct.calcsize(record_fmt)
+
+        fd = os.open(os.path.join(SHM_DIR, name), os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            os.ftruncate(fd, HEADER_SIZE + capacity * (size + CRC.size))
+            os.pwrite(fd, struct.pack("<5Q", 0, 0, 0, capacity, size), 0)
+        finally:
+            os.close(fd)
+
+        return cls(name, record_fmt, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, record_fmt: str) -> "ShmRing":
+        return cls(name, record_fmt, owner=False)
+
+    def close(self) -> None:
+        if self._mm is None:
+            return
+
+        self._header.release()
+        self._buf.release()
+        self._mm.close()
+        self._mm = None
+
+        if self.owner:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def __len__(self) -> int:
+        header = self._header
+        return header[HEAD] - header[TAIL]
+
+    @property
+    def dropped(self) -> int:
+        return self._header[DROPPED]
+
+    # -------------- producer --------------
+
+    def push(self, *values) -> bool:
+        header = self._header
+        head = header[HEAD]
+
+        if head - header[TAIL] > self._mask:
+            header[DROPPED] += 1
+            return False
+
+        data = self._struct.pack(*values)
+        offset = HEADER_SIZE + (head & self._mask) * self._slot
+        end = offset + len(data)
+
+        self._buf[offset:end] = data
+        CRC.pack_into(self._buf, end, zlib.crc32(data, head & INDEX_MASK))
+        header[HEAD] = head + 1
+        return True
+
+    # -------------- consumer --------------
+
+    def pop(self, max_records: int = 0) -> list[tuple]:
+        """
+        every waiting record (at most max_records when > 0), oldest first.
+        stops early at a record whose crc does not match yet
+        """
+        header = self._header
+        head = header[HEAD]
+        tail = header[TAIL]
+
+        n = head - tail
+        if max_records > 0 and n > max_records:
+            n = max_records
+
+        unpack = self._struct.unpack
+        size = self._struct.size
+        slot = self._slot
+        mask = self._mask
+        buf = self._buf
+        crc32 = zlib.crc32
+
+        records = []
+        for index in range(tail, tail + n):
+            offset = HEADER_SIZE + (index & mask) * slot
+            data = bytes(buf[offset:offset + size])
+            if crc32(data, index & INDEX_MASK) != CRC.unpack_from(buf, offset + size)[0]:
+                break  # not visible yet, taken by the next pop
+            records.append(unpack(data))
+
+        header[TAIL] = tail + len(records)
+        return records
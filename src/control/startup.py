@@ -0,0 +1,75 @@
+"""
+bring up profile and warm start state.
+
+StartupProfile times the stages of a launch (imports, construction and
+every enter_standby step). main.py prints it once the converter is in
+STANDBY:
+
+    startup 241.3 ms: import 43.0, construct 1.2, gpio 3.4, spi 0.4, pwm 2.1, ina229 191.2 (cold)
+
+a warm start skips the INA229 reset, id check and configuration with their
+fixed sleeps (10 + 50 ms per chip). it needs two things: the hash the last
+cold start stored under warm_start_path matches INA229.config_hash(), and
+both chips read back the expected registers. anything else is a cold start,
+which stores the hash again.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import json
+import os
+import time
+
+
+@dataclass
+class StartupProfile:
+    # stage name -> seconds, in the order they ran
+    stages: dict[str, float] = field(default_factory=dict)
+    warm: bool = False
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @property
+    def total_s(self) -> float:
+        return sum(self.stages.values())
+
+    def report(self) -> str:
+        stages = ", ".join(f"{name} {seconds * 1e3:.1f}" for name, seconds in self.stages.items())
+        return f"startup {self.total_s * 1e3:.1f} ms: {stages} ({'warm' if self.warm else 'cold'})"
+
+
+# -------------- warm start hashes --------------
+
+def load_warm_hashes(path: str) -> dict[str, str]:
+    """
+    hashes stored by the last cold start, empty when missing or unreadable
+    """
+    try:
+        with open(path) as f:
+            hashes = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    return hashes if isinstance(hashes, dict) else {}
+
+
+def save_warm_hash(path: str, key: str, value: str) -> None:
+    """
+    replaces the file in one rename so a crash never leaves half of it
+    """
+    hashes = load_warm_hashes(path)
+    hashes[key] = value
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(hashes, f)
+    os.replace(tmp, path)
@@ -0,0 +1,266 @@
+"""
+live converter status in shared memory, for monitors outside the control
+process (monitor.py, exporters).
+
+with ConverterConfig.status_path set, the Converter writes its status, the
+latest measurements and a few counters into a small file in /dev/shm every
+status_every ticks. any number of processes can map it and read at their
+own rate, a reader never takes a lock or makes a call into the control
+process.
+
+layout, little endian:
+    header   STATUS_HEADER_FMT: magic, layout version, payload size, sequence
+    payload  STATUS_FMT, the fields of StatusSnapshot in order
+    crc      uint32, crc32 of the payload
+
+the sequence is a seqlock: the writer makes it odd, writes the payload and
+its crc and makes it even again. a reader copies the payload between two
+reads of the sequence and keeps the copy only when both are the same even
+number and the crc matches. a new field means a new STATUS_VERSION,
+readers refuse layouts they do not know.
+
+the sequence alone is not enough on the Pi. its stores and the payload's
+are plain mmap stores, python has no barrier to order them, and the
+Cortex-A53 (ARMv8) may make them visible to another core out of program
+order, or satisfy the reader's payload loads before its sequence load. x86
+would keep both in order. the crc catches a copy torn that way, the reader
+retries it like a busy sequence. a copy that is whole but a publish old is
+still a consistent snapshot, its count and time say which one it is.
+
+the segment is a plain mmapped file like the rings of control/shm_ring.py,
+multiprocessing.shared_memory would let an exiting reader unlink it.
+"""
+
+from dataclasses import dataclass
+import mmap
+import os
+import struct
+import time
+import zlib
+
+
+STATUS_MAGIC = b"UTST"
+STATUS_VERSION = 2
+
+STATUS_HEADER_FMT = "<4sHHQ"  # magic, version, payload size, sequence
+STATUS_HEADER_SIZE = struct.calcsize(STATUS_HEADER_FMT)
+SEQ_OFFSET = 8
+
+# pid, publish count, CLOCK_MONOTONIC time of the publish, ticks,
+# state, mode, fault code, duty, duty1, duty2, vtarget, derate,
+# vin, vout, iin, iout, powin, powout,
+# faults, mode changes, mode changes suppressed, fault captures, fault reason
+STATUS_FMT = "<IxxxxQdQBBB5x5d6dQQQQ48s"
+STATUS_SIZE = struct.calcsize(STATUS_FMT)
+
+STATUS_CRC = struct.Struct("<I")
+SEGMENT_SIZE = STATUS_HEADER_SIZE + STATUS_SIZE + STATUS_CRC.size
+
+REASON_BYTES = 48
+
+
+class StatusError(RuntimeError):
+    pass
+
+
+@dataclass(slots=True)
+class StatusSnapshot:
+    pid: int
+    count: int
+    time_s: float
+    ticks: int
+    state: int
+    mode: int
+    fault_code: int
+    duty: float
+    duty1: float
+    duty2: float
+    vtarget: float
+    derate: float
+    vin: float
+    vout: float
+    iin: float
+    iout: float
+    powin: float
+    powout: float
+    faults: int
+    mode_changes: int
+    mode_suppressed: int
+    captures: int
+    fault_reason: str
+
+    @property
+    def age_s(self) -> float:
+        """
+        seconds since the publish, both sides use CLOCK_MONOTONIC
+        """
+        return time.monotonic() - self.time_s
+
+
+# -------------- writer --------------
+
+class StatusPublisher:
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+
+        self._pid = os.getpid()
+        self._struct = struct.Struct(STATUS_FMT)
+        self._mm = None
+        self._buf = None
+        self._seq = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._mm is not None
+
+    def open(self) -> None:
+        """
+        builds the segment under a temporary name and renames it over path.
+        a file left by a crashed converter is never truncated under a reader
+        still mapping it (SIGBUS), readers see a new inode and remap
+        """
+        if self._mm is not None:
+            return
+
+        tmp = f"{self.path}.{self._pid}.tmp"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, SEGMENT_SIZE)
+            os.pwrite(fd, struct.pack(STATUS_HEADER_FMT, STATUS_MAGIC, STATUS_VERSION, STATUS_SIZE, 0), 0)
+            mm = mmap.mmap(fd, 0)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        finally:
+            os.close(fd)
+
+        os.replace(tmp, self.path)
+        self._mm = mm
+
+        self._buf = memoryview(self._mm)
+        self._seq = self._buf[SEQ_OFFSET:SEQ_OFFSET + 8].cast("Q")
+
+    def close(self) -> None:
+        """
+        unmaps and removes the segment, readers see the converter is gone
+        """
+        if self._mm is None:
+            return
+
+        self._seq.release()
+        self._buf.release()
+        self._mm.close()
+        self._mm = self._buf = self._seq = None
+
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def publish(self, *values) -> None:
+        """
+        the StatusSnapshot fields after pid and count, fault reason as bytes
+        """
+        seq = self._seq
+        self.count += 1
+        data = self._struct.pack(self._pid, self.count, *values)
+
+        seq[0] += 1  # odd: write in progress
+        self._buf[STATUS_HEADER_SIZE:STATUS_HEADER_SIZE + STATUS_SIZE] = data
+        STATUS_CRC.pack_into(self._buf, STATUS_HEADER_SIZE + STATUS_SIZE, zlib.crc32(data))
+        seq[0] += 1
+
+
+# -------------- reader --------------
+
+class StatusReader:
+    def __init__(self, path: str, retries: int = 100):
+        self.path = path
+        self.retries = retries
+
+        self._mm = None
+        self._buf = None
+        self._seq = None
+        self._inode = None
+
+    def _open(self) -> bool:
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except OSError:
+            return False
+
+        try:
+            st = os.fstat(fd)
+            if st.st_size < STATUS_HEADER_SIZE:
+                return False
+
+            mm = mmap.mmap(fd, 0, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+
+        magic, version, size, _ = struct.unpack_from(STATUS_HEADER_FMT, mm, 0)
+        if magic != STATUS_MAGIC or version != STATUS_VERSION or size != STATUS_SIZE or len(mm) < SEGMENT_SIZE:
+            mm.close()
+            raise StatusError(f"{self.path}: unknown status layout {magic!r} v{version}, {size} bytes")
+
+        self._mm = mm
+        self._buf = memoryview(mm)
+        self._seq = self._buf[SEQ_OFFSET:SEQ_OFFSET + 8].cast("Q")
+        self._inode = st.st_ino
+        return True
+
+    def close(self) -> None:
+        if self._mm is None:
+            return
+
+        self._seq.release()
+        self._buf.release()
+        self._mm.close()
+        self._mm = self._buf = self._seq = None
+
+    def _replaced(self) -> bool:
+        """
+        True when the file was removed or recreated by a new converter
+        """
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except OSError:
+            return True
+
+    def read(self) -> StatusSnapshot | None:
+        """
+        a consistent snapshot, None when there is no segment or the writer
+        kept it busy (or every copy was torn) for every retry
+        """
+        if self._mm is not None and self._replaced():
+            self.close()
+
+        if self._mm is None and not self._open():
+            return None
+
+        seq = self._seq
+        buf = self._buf
+
+        for _ in range(self.retries):
+            before = seq[0]
+            if before & 1:
+                continue
+
+            data = bytes(buf[STATUS_HEADER_SIZE:SEGMENT_SIZE])
+            if seq[0] != before:
+                continue
+
+            payload = data[:STATUS_SIZE]
+            if zlib.crc32(payload) == STATUS_CRC.unpack_from(data, STATUS_SIZE)[0]:
+                values = struct.unpack(STATUS_FMT, payload)
+                reason = values[-1].rstrip(b"\0").decode("utf-8", "replace")
+                return StatusSnapshot(*values[:-1], reason)
+
+        return None
+
+
+def encode_reason(reason: str | None) -> bytes:
+    if not reason:
+        return b""
+    return reason.encode("utf-8", "replace")[:REASON_BYTES]
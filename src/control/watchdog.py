@@ -0,0 +1,227 @@
+"""
+heartbeat of the control loop, for a hardware watchdog and supervisor.py.
+
+main.py calls heartbeat.beat() after every update_converter. a beat is late
+when it comes more than deadline_s after the previous beat plus the tick
+period the converter asked for (Converter.tick_period_s). every
+kick_period_s the heartbeat pets its outputs, but only if no beat in that
+window was late:
+
+- device: /dev/watchdog (any write pets it, the board resets when the pets
+  stop) or a file / FIFO standing in for it
+- heartbeat_path: a small record (pid, sequence, time, process start time)
+  that supervisor.py polls. it forces the outputs safe when the sequence
+  stops moving, the start time tells it the pid still is the control process
+
+close() disarms the device with the magic "V" and removes the heartbeat
+record, so a clean exit is not mistaken for a stall.
+
+HeartbeatStats keeps the jitter of the beats, how long after its expected
+time each one came.
+"""
+
+from dataclasses import dataclass
+import fcntl
+import math
+import os
+import stat
+import struct
+import time
+from typing import Callable
+
+
+HEARTBEAT_MAGIC = b"UTHB"
+# magic, pid, sequence, CLOCK_MONOTONIC time of the pet, process start time
+# (/proc/<pid>/stat starttime, clock ticks since boot)
+HEARTBEAT_FMT = "<4sIQdQ"
+
+# linux/watchdog.h
+WDIOC_SETTIMEOUT = 0xC0045706
+
+
+class WatchdogError(RuntimeError):
+    pass
+
+
+@dataclass
+class WatchdogConfig:
+    # how late a beat may be before the window it falls in is not petted
+    deadline_s: float = 0.002
+    kick_period_s: float = 0.010
+
+    device: str | None = None
+    # seconds set with WDIOC_SETTIMEOUT on a watchdog device, 0 keeps the driver's
+    device_timeout_s: int = 0
+
+    heartbeat_path: str | None = None
+
+
+@dataclass(slots=True)
+class HeartbeatStats:
+    count: int = 0
+    late: int = 0
+    missed_pets: int = 0
+    pets: int = 0
+    mean_s: float = 0.0
+    m2: float = 0.0
+    max_s: float = -math.inf
+
+    def add(self, jitter_s: float, late: bool) -> None:
+        self.count += 1
+        self.late += late
+
+        delta = jitter_s - self.mean_s
+        self.mean_s += delta / self.count
+        self.m2 += delta * (jitter_s - self.mean_s)
+
+        if jitter_s > self.max_s:
+            self.max_s = jitter_s
+
+    @property
+    def std_s(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count > 1 else 0.0
+
+    def report(self) -> str:
+        if not self.count:
+            return "heartbeat: no beats"
+
+        return (
+            f"heartbeat jitter mean {self.mean_s * 1e6:.1f} us, std {self.std_s * 1e6:.1f} us, "
+            f"max {self.max_s * 1e6:.1f} us, {self.late} late of {self.count}, "
+            f"{self.pets} pets, {self.missed_pets} withheld"
+        )
+
+
+def process_start_time(pid: int) -> int | None:
+    """
+    start time of a process in clock ticks since boot, None when there is no
+    such process. a pid reused by another process has another start time
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    # the command name may hold spaces and parentheses, fields follow the last ")"
+    fields = data[data.rfind(b")") + 2:].split()
+    try:
+        return int(fields[19])
+    except (IndexError, ValueError):
+        return None
+
+
+def read_heartbeat(path: str) -> tuple[int, int, float, int] | None:
+    """
+    (pid, sequence, time, start time) of a heartbeat record, None when there
+    is none
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(struct.calcsize(HEARTBEAT_FMT))
+    except OSError:
+        return None
+
+    if len(data) != struct.calcsize(HEARTBEAT_FMT):
+        return None
+
+    magic, pid, seq, t, started = struct.unpack(HEARTBEAT_FMT, data)
+    if magic != HEARTBEAT_MAGIC:
+        return None
+
+    return pid, seq, t, started
+
+
+class Heartbeat:
+    def __init__(self, config: WatchdogConfig = WatchdogConfig(), clock: Callable[[], float] = time.monotonic):
+        self.config = config
+        self.clock = clock
+        self.stats = HeartbeatStats()
+
+        self._device_fd = None
+        self._record_fd = None
+        self._pid = os.getpid()
+        self._started = process_start_time(self._pid) or 0
+        self._seq = 0
+
+        self._expected_s = None
+        self._next_kick_s = 0.0
+        self._window_late = False
+
+    def open(self) -> None:
+        config = self.config
+
+        if config.device is not None and self._device_fd is None:
+            try:
+                # non blocking so a FIFO stand in without a reader fails here, not in the loop
+                self._device_fd = os.open(config.device, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as e:
+                raise WatchdogError(f"cannot open watchdog {config.device}: {e}") from e
+
+            if config.device_timeout_s > 0 and stat.S_ISCHR(os.fstat(self._device_fd).st_mode):
+                fcntl.ioctl(self._device_fd, WDIOC_SETTIMEOUT, struct.pack("i", config.device_timeout_s))
+
+        if config.heartbeat_path is not None and self._record_fd is None:
+            self._record_fd = os.open(config.heartbeat_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+
+    def close(self, disarm: bool = True) -> None:
+        if self._device_fd is not None:
+            try:
+                if disarm:
+                    os.write(self._device_fd, b"V")  # magic close
+            except OSError:
+                pass
+            os.close(self._device_fd)
+            self._device_fd = None
+
+        if self._record_fd is not None:
+            os.close(self._record_fd)
+            self._record_fd = None
+            try:
+                os.unlink(self.config.heartbeat_path)
+            except OSError:
+                pass
+
+    def beat(self, next_period_s: float) -> None:
+        """
+        one completed update_converter, next_period_s is when the next one is due
+        """
+        now = self.clock()
+
+        expected = self._expected_s
+        if expected is not None:
+            jitter = now - expected
+            late = jitter > self.config.deadline_s
+            self.stats.add(jitter, late)
+            if late:
+                self._window_late = True
+
+        self._expected_s = now + next_period_s
+
+        if now >= self._next_kick_s:
+            self._next_kick_s = now + self.config.kick_period_s
+
+            if self._window_late:
+                self._window_late = False
+                self.stats.missed_pets += 1
+            else:
+                self._pet(now)
+
+    def pause(self) -> None:
+        """
+        the loop stops beating on purpose, the gap to the next beat is not jitter
+        """
+        self._expected_s = None
+
+    def _pet(self, now: float) -> None:
+        self.stats.pets += 1
+        self._seq += 1
+
+        if self._device_fd is not None:
+            try:
+                os.write(self._device_fd, b"\0")
+            except BlockingIOError:
+                pass  # FIFO stand in full, its reader is behind
+
+        if self._record_fd is not None:
+            os.pwrite(self._record_fd, struct.pack(HEARTBEAT_FMT, HEARTBEAT_MAGIC, self._pid, self._seq, now, self._started), 0)
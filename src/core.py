@@ -0,0 +1,149 @@
+"""
+control core of the split setup: Converter, fault recovery and the
+heartbeat, nothing else. no printing or logging in the loop, everything a
+person or another program wants goes out as telemetry frames through a
+shared memory ring, and commands come back through another one (see
+control/shm_ring.py). services.py starts this in its own process:
+
+    python services.py
+
+the loop is main.py's, both run control/loop.py. after bring up the core
+can pin itself to a cpu and switch to SCHED_FIFO, so the service process
+never gets the cpu while a tick is due.
+"""
+
+import gc
+import os
+import signal
+import time
+
+from control import loop
+from control.control import ConverterState
+from control.converter import Converter, ConverterConfig
+from control.recovery import RecoveryManager, RecoveryPolicy
+from control.shm_ring import (
+    CMD_CLEAR_FAULT,
+    CMD_START,
+    CMD_STOP,
+    COMMAND_FMT,
+    TELEMETRY_FMT,
+    ShmRing,
+)
+from control.watchdog import Heartbeat, WatchdogConfig
+
+
+running = True
+
+
+def handle_signal(signum, frame) -> None:
+    global running
+    running = False
+
+
+def isolate(cpu: int | None, fifo_priority: int) -> list[str]:
+    """
+    pins the process to cpu and / or makes it SCHED_FIFO, returns what failed
+    """
+    problems = []
+
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except (OSError, ValueError) as exc:
+            problems.append(f"cpu {cpu}: {exc}")
+
+    if fifo_priority > 0:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(fifo_priority))
+        except (OSError, AttributeError) as exc:
+            problems.append(f"SCHED_FIFO {fifo_priority}: {exc}")
+
+    return problems
+
+
+def publish(telemetry: ShmRing, converter: Converter, tick: int, now_s: float) -> None:
+    status = converter.get_status()
+    m = converter.latest_measurements()
+
+    telemetry.push(
+        now_s,
+        tick,
+        status.state,
+        status.mode,
+        status.fault_code,
+        m.vin,
+        m.vout,
+        m.iin,
+        m.iout,
+        status.duty1,
+        status.duty2,
+        status.vtarget,
+    )
+
+
+def apply_commands(commands: ShmRing, converter: Converter) -> None:
+    global running
+
+    for command, _ in commands.pop():
+        if command == CMD_STOP:
+            running = False
+        elif command == CMD_CLEAR_FAULT:
+            converter.clear_fault()
+        elif command == CMD_START and converter.state == ConverterState.STANDBY:
+            converter.start_converter()
+
+
+def run_core(
+    config: ConverterConfig,
+    telemetry_name: str,
+    command_name: str,
+    telemetry_every: int = 30,
+    cpu: int | None = None,
+    fifo_priority: int = 0,
+    watchdog: WatchdogConfig = WatchdogConfig(),
+) -> int:
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    telemetry = ShmRing.attach(telemetry_name, TELEMETRY_FMT)
+    commands = ShmRing.attach(command_name, COMMAND_FMT)
+
+    converter = Converter(config)
+    recovery = RecoveryManager(RecoveryPolicy())
+    heartbeat = Heartbeat(watchdog)
+
+    tick = 0
+    next_publish = telemetry_every
+    state = converter.state
+
+    def on_tick(status) -> None:
+        nonlocal tick, next_publish, state
+
+        tick += 1
+        next_publish -= 1
+        if next_publish <= 0 or status.state != state:
+            next_publish = telemetry_every
+            state = status.state
+            publish(telemetry, converter, tick, time.monotonic())
+
+            if len(commands):
+                apply_commands(commands, converter)
+
+    try:
+        converter.enter_standby()
+        heartbeat.open()
+
+        # everything allocated so far is long lived, keep the collector off it
+        gc.freeze()
+
+        for problem in isolate(cpu, fifo_priority):
+            print(f"core: running without {problem}")
+
+        result = loop.run(converter, recovery, heartbeat, lambda: running, on_tick)
+        publish(telemetry, converter, tick, time.monotonic())
+        return result
+
+    finally:
+        loop.shutdown(converter, heartbeat)
+        telemetry.close()
+        commands.close()
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import hashlib
 import time
 
 from hal.spi import PiSpi
@@ -21,6 +22,14 @@ REG_DIAG_ALRT = 0x0B
 REG_MANUFACTURER_ID = 0x3E
 REG_DEVICE_ID = 0x3F
 
+MODE_CONTINUOUS_TEMP_SHUNT = 0xE
+
+DIETEMP_LSB_C = 7.8125e-3
+
+# sensor handles, every sensor argument takes one of these or a name
+INA_IN = 0
+INA_OUT = 1
+
 
 def sign_extend(value: int, bits:int) -> int:
    sign_bit = 1 << (bits-1)
@@ -41,6 +50,9 @@ class INA229Config:
 
    mode_continuous_shunt_only: int = 0xA
 
+   # also convert die temperature (adds vtct to every conversion cycle)
+   measure_die_temp: bool = False
+
    expected_manufacturer_id: int = 0x5449
    expected_device_id: int = 0x2291
 
@@ -64,21 +76,35 @@ class INA229:
 
       return int(round(shunt_cal)) & 0x7FFF
    
-   def _transfer(self, sensor: str, tx: bytes | bytearray) -> bytes:
+   def handle(self, sensor: str | int) -> int:
+      """
+      INA_IN / INA_OUT for a sensor name, resolve once and pass the handle
+      """
+      if sensor.__class__ is int:
+         if sensor == INA_IN or sensor == INA_OUT:
+            return sensor
+         raise INA229Error(f"unknown sensor handle {sensor}: use INA_IN or INA_OUT")
+
       name = sensor.strip().lower()
 
       if name in ("ina_in", "ina229_in", "input"):
-         return self.spi.transfer_ina_in(tx)
+         return INA_IN
       
       if name in ("ina_out", "ina229_out", "output"):
-         return self.spi.transfer_ina_out(tx)
+         return INA_OUT
 
       raise INA229Error("unknown sensor: use ina_in or ina_out")
+
+   def _transfer(self, sensor: str | int, tx: bytes | bytearray) -> bytes:
+      if self.handle(sensor) == INA_IN:
+         return self.spi.transfer_ina_in(tx)
+
+      return self.spi.transfer_ina_out(tx)
    
 
    # -------------- register access --------------
 
-   def read_reg(self, sensor: str, reg_addr: int, num_bytes: int) -> int:
+   def read_reg(self, sensor: str | int, reg_addr: int, num_bytes: int) -> int:
       cmd = ((reg_addr & 0x3F) << 2) | 0x01
       tx = bytes([cmd] + [0x00] * num_bytes)
       rx = self._transfer(sensor, tx)
@@ -89,7 +115,7 @@ class INA229:
       
       return data
    
-   def write_reg(self, sensor: str, reg_addr: int, value: int, num_bytes: int) -> None:
+   def write_reg(self, sensor: str | int, reg_addr: int, value: int, num_bytes: int) -> None:
       cmd = ((reg_addr & 0x3F) << 2) | 0x00
       tx = [cmd]
 
@@ -101,21 +127,31 @@ class INA229:
 
    # -------------- sensor reads --------------
 
-   def read_current(self, sensor: str) -> float:
+   def read_current_raw(self, sensor: str | int) -> int:
+      """
+      signed 20 bit CURRENT register code, amps = code * current_lsb
+      """
       raw24 = self.read_reg(sensor, REG_CURRENT, 3)
 
       raw20 = (raw24 >> 4) & 0xFFFFF
-      raw_signed = sign_extend(raw20,20)
+      return sign_extend(raw20,20)
 
-      return raw_signed * self.current_lsb
+   def read_current(self, sensor: str | int) -> float:
+      return self.read_current_raw(sensor) * self.current_lsb
    
    def read_ina_in(self) -> float:
-      return self.read_current("ina_in")
+      return self.read_current(INA_IN)
    
    def read_ina_out(self) -> float:
-      return self.read_current("ina_out")
+      return self.read_current(INA_OUT)
+
+   def read_ina_in_raw(self) -> int:
+      return self.read_current_raw(INA_IN)
+
+   def read_ina_out_raw(self) -> int:
+      return self.read_current_raw(INA_OUT)
    
-   def read_vshunt(self, sensor: str) -> float:
+   def read_vshunt(self, sensor: str | int) -> float:
       raw24 = self.read_reg(sensor, REG_VSHUNT, 3)
 
       raw20 = (raw24 >> 4) & 0xFFFFF
@@ -124,7 +160,14 @@ class INA229:
       lsb = 78.125e-9 if self.config.use_low_shunt_range else 312.5e-9
       return raw_signed * lsb
 
-   def read_ids_ina(self, sensor: str) -> tuple[int, int]:
+   def read_die_temp(self, sensor: str | int) -> float:
+      """
+      die temperature in C, needs measure_die_temp in the config
+      """
+      raw16 = self.read_reg(sensor, REG_DIETEMP, 2)
+      return sign_extend(raw16, 16) * DIETEMP_LSB_C
+
+   def read_ids_ina(self, sensor: str | int) -> tuple[int, int]:
       man_id = self.read_reg(sensor, REG_MANUFACTURER_ID, 2)
       dev_id = self.read_reg(sensor, REG_DEVICE_ID, 2)
 
@@ -133,28 +176,44 @@ class INA229:
 
    # -------------- utility --------------
 
-   def reset_ina(self, sensor: str) -> None:
+   def reset_ina(self, sensor: str | int) -> None:
       self.write_reg(sensor, REG_CONFIG, 0x8000, 2)
       time.sleep(0.010)
 
-   def configure_ina(self, sensor: str) -> None:
+   def register_image(self) -> tuple[tuple[int, int], ...]:
+      """
+      (register, value) in the order configure_ina writes them, a configured
+      chip reads the same values back
+      """
       config_reg = 0x0010 if self.config.use_low_shunt_range else 0x0000
-      self.write_reg(sensor, REG_CONFIG, config_reg, 2)
+
+      mode = (
+         MODE_CONTINUOUS_TEMP_SHUNT
+         if self.config.measure_die_temp
+         else self.config.mode_continuous_shunt_only
+      )
 
       adc_config = (
-         (self.config.mode_continuous_shunt_only << 12)
+         (mode << 12)
          | (self.config.vbusct_code << 9)
          | (self.config.vshct_code << 6)
          | (self.config.vtct_code << 3)
          | (self.config.avg_code)
       )
 
-      self.write_reg(sensor, REG_ADC_CONFIG, adc_config, 2)
-      self.write_reg(sensor, REG_SHUNT_CAL, self.shunt_cal, 2)
+      return (
+         (REG_CONFIG, config_reg),
+         (REG_ADC_CONFIG, adc_config),
+         (REG_SHUNT_CAL, self.shunt_cal),
+      )
+
+   def configure_ina(self, sensor: str | int) -> None:
+      for reg, value in self.register_image():
+         self.write_reg(sensor, reg, value, 2)
 
       time.sleep(0.050)
 
-   def check_ids_ina(self, sensor: str) -> bool:
+   def check_ids_ina(self, sensor: str | int) -> bool:
       man_id, dev_id = self.read_ids_ina(sensor)
 
       return (
@@ -162,7 +221,7 @@ class INA229:
          and dev_id == self.config.expected_device_id
       )
    
-   def initialize_ina(self, sensor: str, check_id: bool = True) -> None:
+   def initialize_ina(self, sensor: str | int, check_id: bool = True) -> None:
       self.reset_ina(sensor)
 
       if check_id and not self.check_ids_ina(sensor):
@@ -178,4 +237,20 @@ class INA229:
    def initialize_all_ina(self, check_id: bool = True) -> None:
       self.initialize_ina("ina_in", check_id=check_id)
       self.initialize_ina("ina_out", check_id=check_id)
-   
\ No newline at end of file
+
+
+   # -------------- warm start --------------
+
+   def config_hash(self) -> str:
+      """
+      hash of the register image and expected ids, stored after a cold start
+      """
+      text = repr((self.register_image(), self.config.expected_manufacturer_id, self.config.expected_device_id))
+      return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+   def is_configured(self, sensor: str | int) -> bool:
+      """
+      True when the chip reads back register_image(), i.e. it kept the
+      configuration of an earlier start and is converting
+      """
+      return all(self.read_reg(sensor, reg, 2) == value for reg, value in self.register_image())
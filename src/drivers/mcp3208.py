@@ -69,6 +69,12 @@ class MCP3208:
         raw = self.read_raw(channel)
         return (raw / 4095.0) * self.config.vref
     
+    def read_vin_raw(self) -> int:
+        return self.read_raw(self.config.ch_vin)
+
+    def read_vout_raw(self) -> int:
+        return self.read_raw(self.config.ch_vout)
+
     def read_vin(self) -> float:
         adc_voltage = self.read_adc_voltage(self.config.ch_vin)
         return adc_voltage * self.config.divider_ratio
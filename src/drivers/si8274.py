@@ -18,11 +18,17 @@ class SI8274:
 
     # -------------- gate driver control -------------
 
-    def enable(self, driver: str) -> None:
+    def handle(self, driver: str) -> int:
+        """
+        enable pin of a driver, enable / disable take it in place of the name
+        """
+        return self.gpio.get_gd_enable_pin(driver)
+
+    def enable(self, driver: str | int) -> None:
         self._require_gpio()
         self.gpio.set_gd_enable(driver, True)
 
-    def disable(self, driver:str) -> None:
+    def disable(self, driver: str | int) -> None:
         self._require_gpio()
         self.gpio.set_gd_enable(driver, False)
     
@@ -1,9 +1,30 @@
 from dataclasses import dataclass
+import time
 
-try:
-    import pigpio
-except ImportError:
-    pigpio = None
+
+# imported by the first init(), so sims, benches and replays that never talk
+# to the daemon do not load it. sim/fake_hw.install() may set it before that
+pigpio = None
+
+
+def _import_pigpio():
+    global pigpio
+
+    if pigpio is None:
+        try:
+            import pigpio as module
+        except ImportError:
+            return None
+        pigpio = module
+
+    return pigpio
+
+
+# pigpio script states (pigpio.PI_SCRIPT_*)
+SCRIPT_INITING = 0
+SCRIPT_HALTED = 1
+
+SCRIPT_STORE_TIMEOUT_S = 0.5
 
 
 class GpioError(RuntimeError):
@@ -57,11 +78,19 @@ class PiGpio:
         self._inited = False
         self.pi = None
 
+        self._gd_mask = (1 << pins.gd_enable1) | (1 << pins.gd_enable2)
+        self._cs_mask = (1 << pins.cs_ina_in) | (1 << pins.cs_ina_out) | (1 << pins.cs_mcp3208)
+
+        # valid handles per channel kind, an int is checked before any write
+        self._cs_pins = frozenset((pins.cs_ina_in, pins.cs_ina_out, pins.cs_mcp3208))
+        self._gd_pins = frozenset((pins.gd_enable1, pins.gd_enable2))
+        self._pwm_pins = frozenset((pins.pwm1, pins.pwm2))
+
     def init(self) -> None:
         if self._inited:  # check that it has not been initialized
             return
         
-        if pigpio is None:  # check import errors
+        if _import_pigpio() is None:  # check import errors
             raise GpioError("pigpio library not found. check if installed or started")
         
         self.pi = pigpio.pi()
@@ -129,12 +158,22 @@ class PiGpio:
 
 
     # -------------- internal helper functions --------------
+    # channel names ("gd1", "mcp3208", "pwm1", ...) are matched here. the
+    # pin number returned is the channel's handle: resolve it once, hot paths
+    # pass the int and skip the string matching. scripts keep using names.
+    # an int is only taken when it is a pin of that kind of channel, a stray
+    # number never reaches the daemon.
 
     def _require_init(self) -> None:
         if not self._inited or self.pi is None:
             raise GpioError("GPIO not initialized. call PiGpio.init() first")
         
-    def _get_cs_pin(self, name: str) -> int:
+    def _get_cs_pin(self, name: str | int) -> int:
+        if name.__class__ is int:
+            if name in self._cs_pins:
+                return name  # already a handle
+            raise GpioError(f"gpio {name} is not a cs pin")
+
         device = name.strip().lower()
 
         if device in ("ina_in", "ina229_in", "input_ina"):
@@ -148,7 +187,12 @@ class PiGpio:
         
         raise GpioError("unknown cs device name. use: ina229_in, ina229_out, mcp3208")
     
-    def get_gd_enable_pin(self, name: str) -> int:
+    def get_gd_enable_pin(self, name: str | int) -> int:
+        if name.__class__ is int:
+            if name in self._gd_pins:
+                return name
+            raise GpioError(f"gpio {name} is not a gd enable pin")
+
         driver = name.strip().lower()
 
         if driver in ("gd1", "gd_enable1"):
@@ -159,7 +203,12 @@ class PiGpio:
         
         raise GpioError("unknown gd name. use: gd_enable1 or gd_enable2")
     
-    def get_pwm_pin(self, name: str) -> int:
+    def get_pwm_pin(self, name: str | int) -> int:
+        if name.__class__ is int:
+            if name in self._pwm_pins:
+                return name
+            raise GpioError(f"gpio {name} is not a pwm pin")
+
         channel = name.strip().lower()
 
         if channel in ("pwm1",):
@@ -171,41 +220,66 @@ class PiGpio:
         raise GpioError("unknown pwm channel. use: pwm1 or pwm2")
     
     def force_safe_outputs(self) -> None:
+        """
+        gate drivers disabled, pwm off and low, chip selects released, in
+        the deinit order. runs on every standby and fault tick: the gate and
+        cs lines are one bank write each, 6 requests instead of 9
+        """
         self._require_init()
 
+        pi = self.pi
+        pi.clear_bank_1(self._gd_mask)
+
         for pin in (
             self.pins.pwm1,
             self.pins.pwm2,
         ):
-            self.pi.hardware_PWM(pin, 0, 0)
-            self.pi.write(pin, 0)
+            pi.hardware_PWM(pin, 0, 0)
+            pi.write(pin, 0)
 
-        self.set_gd_enable("gd1", False)
-        self.set_gd_enable("gd2", False)
+        pi.set_bank_1(self._cs_mask)
 
-        for pin in (
-            self.pins.cs_ina_in,
-            self.pins.cs_ina_out,
-            self.pins.cs_mcp3208,
-        ):
-            self.pi.write(pin, 1)
+
+    # -------------- pigpio scripts --------------
+
+    def store_script(self, text: str) -> int:
+        """
+        stores a pigpio script and waits until the daemon has it ready
+        """
+        pi = self.pi
+        script_id = pi.store_script(text.encode())
+
+        deadline = time.monotonic() + SCRIPT_STORE_TIMEOUT_S
+        status, _ = pi.script_status(script_id)
+        while status == SCRIPT_INITING and time.monotonic() < deadline:
+            time.sleep(0.001)
+            status, _ = pi.script_status(script_id)
+
+        if status != SCRIPT_HALTED:
+            pi.delete_script(script_id)
+            raise GpioError(f"pigpio script {script_id} not ready, status {status}")
+
+        return script_id
     
 
     # -------------- gate driver helpers --------------
 
-    def set_gd_enable(self, name: str, enable: bool) -> None:
+    def set_gd_enable(self, name: str | int, enable: bool) -> None:
         self._require_init()
         self.pi.write(self.get_gd_enable_pin(name), 1 if enable else 0)
 
 
     # -------------- chip select helpers --------------
 
-    def cs_pull(self, name: str) -> None:
+    def get_cs_pin(self, name: str | int) -> int:
+        return self._get_cs_pin(name)
+
+    def cs_pull(self, name: str | int) -> None:
         # pulls selected cs pin LOW
         self._require_init()
         self.pi.write(self._get_cs_pin(name), 0)
     
-    def cs_release(self, name: str) -> None:
+    def cs_release(self, name: str | int) -> None:
         # releases selected cs pin HIGH
         self._require_init()
         self.pi.write(self._get_cs_pin(name), 1)
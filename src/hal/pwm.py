@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+import math
+import time
 
 from .gpio import PiGpio
 
@@ -14,6 +16,106 @@ class PwmConfig:
     min_duty: float = 0.0
     max_duty: float = 0.85
 
+    # PWM peripheral clock pigpio runs the hardware PWM from (250 MHz on
+    # the BCM2710 / Zero 2W), real duty steps = pwm_clock_hz // frequency_hz
+    pwm_clock_hz: int = 250_000_000
+
+    # sigma-delta dithering of set_duties across calls, see DutyQuantizer
+    dither: bool = False
+
+
+class DutyQuantizer:
+    """
+    duty resolution of the hardware PWM and optional dithering.
+
+    pigpio scales its 0-1_000_000 duty to the real range and truncates:
+    level = counts * steps // 1_000_000, so at 300 kHz there are only 833
+    levels (0.12 % duty each). with dither each channel rounds to the nearest
+    level and carries the rounding error into the next call (first order
+    sigma-delta): the duty averaged over a few calls follows the request to
+    a fraction of a step instead of sticking to one level.
+    """
+
+    def __init__(self, frequency_hz: int, clock_hz: int = 250_000_000, dither: bool = False):
+        self.steps = max(1, int(clock_hz // max(1, frequency_hz)))
+        self.dither = dither
+        self.error = [0.0, 0.0]
+
+    @property
+    def step_duty(self) -> float:
+        return 1.0 / self.steps
+
+    @property
+    def bits(self) -> float:
+        return math.log2(self.steps)
+
+    def effective_bits(self, window_ticks: int = 1) -> float:
+        """
+        resolution of the duty averaged over window_ticks calls
+        """
+        return math.log2(self.steps * (max(1, window_ticks) if self.dither else 1))
+
+    def level(self, counts: int) -> int:
+        # what the hardware runs for pigpio duty counts
+        return counts * self.steps // 1_000_000
+
+    def level_counts(self, level: int) -> int:
+        # smallest pigpio duty counts that give exactly `level`
+        return -(-level * 1_000_000 // self.steps)
+
+    def reset(self) -> None:
+        self.error[0] = 0.0
+        self.error[1] = 0.0
+
+    def quantize(self, channel: int, counts: int, max_counts: int = 1_000_000) -> int:
+        """
+        pigpio duty counts landing on a real level, channel 0 / 1.
+        counts <= 0 stops the channel and clears its error
+        """
+        if counts <= 0:
+            self.error[channel] = 0.0
+            return 0
+
+        steps = self.steps
+        target = counts * steps / 1_000_000 + self.error[channel]
+
+        level = int(target + 0.5)
+        max_level = self.level(max_counts)
+        if level > max_level:
+            level = max_level
+        elif level < 0:
+            level = 0
+
+        # bounded so a saturated channel does not wind up
+        error = target - level
+        self.error[channel] = 1.0 if error > 1.0 else -1.0 if error < -1.0 else error
+
+        return self.level_counts(level)
+
+
+@dataclass
+class PwmSkew:
+    """
+    host side window of set_duties: from issuing the pwm1 update to the pwm2
+    update returning. one daemon round trip through pigpio, two register
+    stores with MmapPwm.
+    """
+    count: int = 0
+    last_s: float = 0.0
+    max_s: float = 0.0
+    total_s: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.last_s = seconds
+        self.total_s += seconds
+        if seconds > self.max_s:
+            self.max_s = seconds
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.count if self.count else 0.0
+
 
 class PiPwm:
     def __init__(self, gpio: PiGpio, config: PwmConfig = PwmConfig()):
@@ -24,6 +126,23 @@ class PiPwm:
         self._duty_pwm1 = 0.0
         self._duty_pwm2 = 0.0
 
+        self._min_counts = self._to_pigpio_duty(self.config.min_duty)
+        self._max_counts = self._to_pigpio_duty(self.config.max_duty)
+
+        self._pin1 = self.gpio.pins.pwm1 if self.gpio is not None else None
+        self._pin2 = self.gpio.pins.pwm2 if self.gpio is not None else None
+
+        self._ramp_script = None
+        self.ramp_running = False
+        self.skew = PwmSkew()
+
+        self.quantizer = DutyQuantizer(
+            self.config.frequency_hz,
+            self.config.pwm_clock_hz,
+            self.config.dither,
+        )
+        self._dither = self.config.dither
+
     def init(self) -> None:
         if self.gpio is None or self.gpio.pi is None:
             raise PwmError("pigpio is not initialized")
@@ -34,6 +153,8 @@ class PiPwm:
         for pin in (self.gpio.pins.pwm1, self.gpio.pins.pwm2):
             self.gpio.pi.hardware_PWM(pin, 0, 0)
             self.gpio.pi.write(pin, 0)
+
+        self._store_ramp_script()
         
         self._inited = True
     
@@ -41,8 +162,10 @@ class PiPwm:
         if not self._inited:
             return
         
+        self.stop_ramp()
         self.stop_pwm("pwm1")
         self.stop_pwm("pwm2")
+        self._delete_ramp_script()
 
         self._inited = False
     
@@ -65,11 +188,76 @@ class PiPwm:
     @staticmethod
     def _to_pigpio_duty(duty: float) -> int:
         return int(round(duty * 1_000_000))
+
+    def _store_duty(self, pin: int, duty: float) -> None:
+        if pin == self._pin1:
+            self._duty_pwm1 = duty
+        elif pin == self._pin2:
+            self._duty_pwm2 = duty
+        else:
+            raise PwmError("unknown pwm channel: use pwm1 or pwm2")
+
+    def _ramp_text(self) -> str:
+        """
+        pwm1 from p1 in steps of p2 counts every p3 us while below p4, then
+        p4. p0 frequency. v0 is the duty being played
+        """
+        pin = self._pin1
+        return (
+            f"lda p1 sta v0 "
+            f"tag 1 hp {pin} p0 v0 mics p3 "
+            f"lda v0 add p2 sta v0 cmp p4 jm 1 "
+            f"hp {pin} p0 p4"
+        )
+
+    def _store_ramp_script(self) -> None:
+        """
+        a pigpio without scripts (or a failed store) leaves start_ramp off
+        """
+        pi = self.gpio.pi
+        if not hasattr(pi, "store_script"):
+            return
+
+        try:
+            self._ramp_script = self.gpio.store_script(self._ramp_text())
+        except Exception:
+            self._ramp_script = None
+
+    def _delete_ramp_script(self) -> None:
+        if self._ramp_script is None:
+            return
+
+        try:
+            self.gpio.pi.delete_script(self._ramp_script)
+        except Exception:
+            pass
+        self._ramp_script = None
+
+    def _push_counts(self, counts1: int, counts2: int) -> None:
+        if self._dither:
+            quantize = self.quantizer.quantize
+            counts1 = quantize(0, counts1, self._max_counts)
+            counts2 = quantize(1, counts2, self._max_counts)
+
+        pi = self.gpio.pi
+        freq = self.config.frequency_hz
+        on1 = counts1 > 0
+        on2 = counts2 > 0
+
+        start = time.perf_counter()
+        pi.hardware_PWM(self._pin1, freq if on1 else 0, counts1)
+        pi.hardware_PWM(self._pin2, freq if on2 else 0, counts2)
+        self.skew.add(time.perf_counter() - start)
+
+        if not on1:
+            pi.write(self._pin1, 0)
+        if not on2:
+            pi.write(self._pin2, 0)
     
 
     # -------------- public pwm functions --------------
 
-    def set_duty(self, name: str, duty: float) -> None:
+    def set_duty(self, name: str | int, duty: float) -> None:
         self._require_init()
 
         duty = float(duty)
@@ -84,28 +272,110 @@ class PiPwm:
             pigpio_duty,
         )
 
-        channel = name.strip().lower()
-        if channel in ("pwm1",):
-            self._duty_pwm1 = duty
-        elif channel in ("pwm2",):
-            self._duty_pwm2 = duty
-        else:
-            raise PwmError("unknown pwm channel: use pwm1 or pwm2")
+        self._store_duty(pin, duty)
 
-    def stop_pwm(self, name: str) -> None:
+    def set_duty_counts(self, name: str | int, counts: int) -> None:
+        """
+        same as set_duty but takes pigpio duty counts (0-1_000_000) directly,
+        used by the integer control path.
+        """
+        self._require_init()
+
+        counts = max(self._min_counts, min(int(counts), self._max_counts))
+
+        pin = self.gpio.get_pwm_pin(name)
+
+        self.gpio.pi.hardware_PWM(
+            pin,
+            self.config.frequency_hz,
+            counts,
+        )
+
+        self._store_duty(pin, counts / 1_000_000)
+
+    def set_duties(self, duty1: float, duty2: float) -> None:
+        """
+        both channels in one call. a duty <= 0 stops that channel like
+        stop_pwm, anything else is clamped like set_duty and, with
+        config.dither, dithered by self.quantizer.
+
+        through pigpio this is two hardware_PWM requests back to back, pwm2
+        changes one daemon round trip after pwm1 (see PwmSkew). MmapPwm
+        stores both data registers a few hundred ns apart
+        """
+        self._require_init()
+
+        duty1 = self._clamp_duty(float(duty1)) if duty1 > 0 else 0.0
+        duty2 = self._clamp_duty(float(duty2)) if duty2 > 0 else 0.0
+
+        self._push_counts(self._to_pigpio_duty(duty1), self._to_pigpio_duty(duty2))
+
+        self._duty_pwm1 = duty1
+        self._duty_pwm2 = duty2
+
+    def set_duties_counts(self, counts1: int, counts2: int) -> None:
+        """
+        set_duties in pigpio duty counts, used by the integer control path
+        """
+        self._require_init()
+
+        counts1 = max(self._min_counts, min(int(counts1), self._max_counts)) if counts1 > 0 else 0
+        counts2 = max(self._min_counts, min(int(counts2), self._max_counts)) if counts2 > 0 else 0
+
+        self._push_counts(counts1, counts2)
+
+        self._duty_pwm1 = counts1 / 1_000_000
+        self._duty_pwm2 = counts2 / 1_000_000
+
+    def start_ramp(self, start_duty: float, end_duty: float, duration_s: float, step_s: float = 1e-4) -> bool:
+        """
+        plays a straight pwm1 ramp inside the pigpio daemon, one request for
+        the whole ramp instead of one per tick. returns False when scripts
+        are not available, the caller then ramps itself. stop_ramp() before
+        writing pwm1 again
+        """
+        self._require_init()
+
+        if self._ramp_script is None:
+            return False
+
+        start = self._to_pigpio_duty(self._clamp_duty(start_duty)) if start_duty > 0 else 0
+        end = self._to_pigpio_duty(self._clamp_duty(end_duty))
+
+        steps = max(1, int(round(duration_s / step_s)))
+        increment = max(1, int(round((end - start) / steps)))
+        step_us = max(1, int(round(step_s * 1e6)))
+
+        try:
+            self.gpio.pi.run_script(
+                self._ramp_script,
+                [self.config.frequency_hz, start, increment, step_us, end],
+            )
+        except Exception:
+            return False
+
+        self.ramp_running = True
+        self._duty_pwm1 = start / 1_000_000
+        return True
+
+    def stop_ramp(self) -> None:
+        if not self.ramp_running:
+            return
+
+        self.ramp_running = False
+        try:
+            self.gpio.pi.stop_script(self._ramp_script)
+        except Exception:
+            pass
+
+    def stop_pwm(self, name: str | int) -> None:
         self._require_init()
 
         pin = self.gpio.get_pwm_pin(name)
         self.gpio.pi.hardware_PWM(pin, 0, 0)
         self.gpio.pi.write(pin, 0)
 
-        channel = name.strip().lower()
-        if channel in ("pwm1",):
-            self._duty_pwm1 = 0.0
-        elif channel in ("pwm2",):
-            self._duty_pwm2 = 0.0
-        else:
-            raise PwmError("unknown pwm channel: use pwm1 or pwm2")
+        self._store_duty(pin, 0.0)
         
 
 
@@ -0,0 +1,179 @@
+"""
+PWM backend writing the BCM PWM data registers directly.
+
+PiPwm sends every duty change to pigpiod over its socket. MmapPwm lets pigpio
+set the PWM up once (clock, range, mark space mode, pin function) and then
+updates duties by storing the level into DAT1 / DAT2 of the memory mapped PWM
+block: no daemon round trip per update, both channels a few hundred ns apart,
+and the PWM picks the new value up at its next period.
+
+stopping a channel (stop_pwm, deinit, PiGpio.force_safe_outputs) still goes
+through pigpio, so the safe shutdown path is the one PiPwm uses. the next
+update sees PWENx clear in CTL and has pigpio start that channel again.
+set_duties with a 0 duty writes DAT 0, which holds the pin low with the
+channel still enabled.
+
+needs /dev/mem (root). the register block is injectable, sim/fake_hw.py has
+a FakePwmBlock that the fake pigpio programs like the real daemon does.
+"""
+
+import mmap
+import os
+import struct
+import time
+
+from .gpio import PiGpio
+from .pwm import PiPwm, PwmConfig, PwmError
+
+
+# -------------- BCM PWM registers --------------
+
+PWM_OFFSET = 0x20C000
+BLOCK_SIZE = 0x28
+
+REG_CTL = 0x00
+REG_STA = 0x04
+REG_RNG1 = 0x10
+REG_DAT1 = 0x14
+REG_RNG2 = 0x20
+REG_DAT2 = 0x24
+
+CTL_PWEN1 = 1 << 0
+CTL_MSEN1 = 1 << 7
+CTL_PWEN2 = 1 << 8
+CTL_MSEN2 = 1 << 15
+
+# peripheral base when /proc/device-tree/soc/ranges is not readable (BCM2710)
+DEFAULT_PERIPHERAL_BASE = 0x3F000000
+
+# hardware PWM channel of each pwm capable pin
+PIN_CHANNEL = {12: 1, 13: 2, 18: 1, 19: 2}
+
+
+def peripheral_base() -> int:
+    """
+    ARM physical address of the peripherals, read the way pigpio does
+    """
+    try:
+        with open("/proc/device-tree/soc/ranges", "rb") as f:
+            ranges = f.read(12)
+    except OSError:
+        return DEFAULT_PERIPHERAL_BASE
+
+    base = struct.unpack(">I", ranges[4:8])[0]
+    if base == 0 and len(ranges) >= 12:
+        base = struct.unpack(">I", ranges[8:12])[0]  # BCM2711 layout
+
+    return base or DEFAULT_PERIPHERAL_BASE
+
+
+class DevMemBlock:
+    """
+    the PWM register page through /dev/mem. words[offset >> 2] is a register
+    """
+
+    def __init__(self, base: int | None = None):
+        self.base = (peripheral_base() if base is None else base) + PWM_OFFSET
+        self._fd = None
+        self._mm = None
+        self.words = None
+
+    def open(self) -> None:
+        if self.words is not None:
+            return
+
+        try:
+            self._fd = os.open("/dev/mem", os.O_RDWR | os.O_SYNC)
+        except OSError as e:
+            raise PwmError(f"cannot open /dev/mem for the pwm registers: {e}") from e
+
+        page = self.base & ~(mmap.PAGESIZE - 1)
+        self._mm = mmap.mmap(self._fd, mmap.PAGESIZE, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE, offset=page)
+        self.words = memoryview(self._mm)[self.base - page:self.base - page + BLOCK_SIZE].cast("I")
+
+    def close(self) -> None:
+        if self.words is not None:
+            self.words.release()
+            self.words = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class MmapPwm(PiPwm):
+    def __init__(self, gpio: PiGpio, config: PwmConfig = PwmConfig(), block=None):
+        super().__init__(gpio, config)
+
+        self.block = block if block is not None else DevMemBlock()
+        self._words = None
+
+        self._dat1 = REG_DAT1 >> 2
+        self._dat2 = REG_DAT2 >> 2
+        self._range1 = 0
+        self._range2 = 0
+
+        self._ctl = REG_CTL >> 2
+        self._enabled = CTL_PWEN1 | CTL_PWEN2
+
+    def init(self) -> None:
+        if self._inited:
+            return
+
+        if PIN_CHANNEL.get(self._pin1) != 1 or PIN_CHANNEL.get(self._pin2) != 2:
+            raise PwmError(f"pins {self._pin1} / {self._pin2} are not pwm channels 1 / 2")
+
+        super().init()
+
+        self.block.open()
+        self._words = self.block.words
+
+        for pin in (self._pin1, self._pin2):
+            self._start_channel(pin)
+
+    def deinit(self) -> None:
+        if not self._inited:
+            return
+
+        super().deinit()
+
+        self._words = None
+        self.block.close()
+
+    def _start_channel(self, pin: int) -> None:
+        """
+        pigpio sets clock, range and mode at 0 duty, the range is read back
+        """
+        self.gpio.pi.hardware_PWM(pin, self.config.frequency_hz, 0)
+
+        if pin == self._pin1:
+            self._range1 = value = self._words[REG_RNG1 >> 2]
+        else:
+            self._range2 = value = self._words[REG_RNG2 >> 2]
+
+        if value == 0:
+            raise PwmError(f"pwm range register of pin {pin} reads 0, is pigpio running the hardware pwm?")
+
+    def _push_counts(self, counts1: int, counts2: int) -> None:
+        if self._dither:
+            quantize = self.quantizer.quantize
+            counts1 = quantize(0, counts1, self._max_counts)
+            counts2 = quantize(1, counts2, self._max_counts)
+
+        words = self._words
+        ctl = words[self._ctl]
+        if ctl & self._enabled != self._enabled:
+            if not ctl & CTL_PWEN1:
+                self._start_channel(self._pin1)
+            if not ctl & CTL_PWEN2:
+                self._start_channel(self._pin2)
+
+        level1 = counts1 * self._range1 // 1_000_000
+        level2 = counts2 * self._range2 // 1_000_000
+
+        start = time.perf_counter()
+        words[self._dat1] = level1
+        words[self._dat2] = level2
+        self.skew.add(time.perf_counter() - start)
@@ -2,14 +2,26 @@ from dataclasses import dataclass
 import threading
 import time
 
-try:
-    import spidev
-except ImportError:
-    spidev = None
-
 from .gpio import PiGpio
 
 
+# imported by the first init(), like pigpio in hal/gpio.py
+spidev = None
+
+
+def _import_spidev():
+    global spidev
+
+    if spidev is None:
+        try:
+            import spidev as module
+        except ImportError:
+            return None
+        spidev = module
+
+    return spidev
+
+
 class SpiError(RuntimeError):
     pass
 
@@ -39,6 +51,10 @@ class SpiConfig:
     mode_ina229: int = 1
     mode_mcp3208: int = 0
 
+    # chip select setup / hold around each transfer
+    cs_setup_s: float = 1e-6
+    cs_hold_s: float = 1e-6
+
 
 class PiSpi:
     def __init__(self, config: SpiConfig = SpiConfig(), gpio: PiGpio | None = None):
@@ -48,11 +64,16 @@ class PiSpi:
         self._opened = False
         self._lock = threading.Lock()
 
+        # chip select handles, resolved in init()
+        self._cs_ina_in = None
+        self._cs_ina_out = None
+        self._cs_mcp3208 = None
+
     def init(self) -> None:
         if self._opened:
             return
         
-        if spidev is None:
+        if _import_spidev() is None:
             raise SpiError("spidev library not found. install and enable spi")
         
         if self.gpio is None:
@@ -65,6 +86,10 @@ class PiSpi:
         self.spi.max_speed_hz = self.config.max_speed_hz
         self.spi.bits_per_word = self.config.bits_per_word
 
+        self._cs_ina_in = self.gpio.get_cs_pin("ina_in")
+        self._cs_ina_out = self.gpio.get_cs_pin("ina_out")
+        self._cs_mcp3208 = self.gpio.get_cs_pin("mcp3208")
+
         self._opened = True
 
     def deinit(self) -> None:
@@ -95,17 +120,25 @@ class PiSpi:
     
     def _transfer_manual(
             self,
-            device_name: str,
+            device_name: str | int,
             tx: bytes | bytearray,
             mode: int,
-            cs_setup_s: float = 1e-6,
-            cs_hold_s: float = 1e-6,
+            cs_setup_s: float | None = None,
+            cs_hold_s: float | None = None,
     ) -> bytes:
+        """
+        device_name is a cs name or a cs pin handle (PiGpio.get_cs_pin)
+        """
         self._require_init()
         self._require_bytes(tx)
 
         if self.gpio is None:
             raise SpiError("gpio not initialized")
+
+        if cs_setup_s is None:
+            cs_setup_s = self.config.cs_setup_s
+        if cs_hold_s is None:
+            cs_hold_s = self.config.cs_hold_s
         
         tx_list = list(tx)
 
@@ -132,21 +165,21 @@ class PiSpi:
 
     def transfer_ina_in(self, tx:bytes | bytearray) -> bytes:
         return self._transfer_manual(
-            device_name="ina_in",
+            device_name=self._cs_ina_in,
             tx=tx,
             mode=self.config.mode_ina229,
         )
     
     def transfer_ina_out(self, tx:bytes | bytearray) -> bytes:
         return self._transfer_manual(
-            device_name="ina_out",
+            device_name=self._cs_ina_out,
             tx=tx,
             mode=self.config.mode_ina229,
         )
     
     def transfer_mcp3208(self, tx:bytes | bytearray) -> bytes:
         return self._transfer_manual(
-            device_name="mcp3208",
+            device_name=self._cs_mcp3208,
             tx=tx,
             mode=self.config.mode_mcp3208,
         )
@@ -2,11 +2,19 @@ import signal
 import sys
 import time
 
+IMPORT_START_S = time.perf_counter()
+
+from control import loop
 from control.control import ConverterState
 from control.converter import Converter, ConverterConfig
+from control.recovery import RecoveryManager, RecoveryPolicy
+from control.watchdog import Heartbeat, WatchdogConfig
+
+IMPORT_S = time.perf_counter() - IMPORT_START_S
 
 
 LOG_PERIOD_S = 0.250
+HEARTBEAT_REPORT_S = 60.0
 
 running = True
 
@@ -29,68 +37,97 @@ def format_status(status) -> str:
 
 
 def main() -> int:
-    global running
-
     signal.signal(signal.SIGINT, handle_signal)
     signal.signal(signal.SIGTERM, handle_signal)
 
-    # initialize your converter object, set the configs here
+    construct_start_s = time.perf_counter()
+
+    # initialize your converter object, set the configs here.
+    # warm_start_path lets a restart skip the INA229 bring up when the chips kept their config,
+    # status_path is the segment monitor.py reads
     converter = Converter(
         ConverterConfig(
             pwm_freq=300_000,
             pi_rate=30_000,
             po_rate=1_000,
+            warm_start_path="/var/tmp/utwind-converter.warm",
+            status_path="/dev/shm/utwind-converter.status",
         )
     )
 
-    loop_period_s = 1.0 / converter.config.pi_rate
-    next_tick_s = time.monotonic()
-    next_log_s = next_tick_s
+    profile = converter.startup_profile
+    profile.add("import", IMPORT_S)
+    profile.add("construct", time.perf_counter() - construct_start_s)
+
+    # clears faults with exponential backoff, main only exits once it gives up
+    recovery = RecoveryManager(RecoveryPolicy())
+    faulted = False
+    starts = 0
+
+    # pets the watchdog / writes the record supervisor.py watches, only while ticks come on time.
+    # device="/dev/watchdog" hands the board reset to the kernel watchdog as well
+    heartbeat = Heartbeat(WatchdogConfig(heartbeat_path="/dev/shm/utwind-converter.hb"))
+
+    next_log_s = time.monotonic()
+    next_heartbeat_report_s = next_log_s + HEARTBEAT_REPORT_S
+    capture_path = None
+
+    def keep_running() -> bool:
+        if not running:
+            print("stop requested")
+        return running
+
+    # called by the loop after every update_converter and recovery.update
+    def on_tick(status) -> None:
+        nonlocal faulted, starts, next_log_s, next_heartbeat_report_s, capture_path
+
+        now_s = time.monotonic()
+        if now_s >= next_log_s:
+            print(format_status(status))
+            next_log_s += LOG_PERIOD_S
+
+        if now_s >= next_heartbeat_report_s:
+            print(heartbeat.stats.report())
+            next_heartbeat_report_s += HEARTBEAT_REPORT_S
+
+        if converter.capture_path != capture_path:
+            capture_path = converter.capture_path
+            print(f"fault capture written to {capture_path}")
+
+        if status.state == ConverterState.FAULT and not faulted:
+            print(
+                f"converter faulted: {status.fault_reason} "
+                f"({recovery.last_class.name.lower()}, "
+                f"retry in {recovery.time_to_retry():.1f} s, "
+                f"{recovery.faults_per_hour()} faults in the last hour)"
+            )
+        faulted = status.state == ConverterState.FAULT
+
+        stats = converter.soft_start.stats
+        if stats.count != starts:
+            starts = stats.count
+            print(
+                f"startup took {stats.last_s * 1e3:.1f} ms "
+                f"(min {stats.min_s * 1e3:.1f} / mean {stats.mean_s * 1e3:.1f} / max {stats.max_s * 1e3:.1f} ms, "
+                f"peak iin {stats.peak_iin:.2f} A)"
+            )
 
     try:
         # to ready the converter, enter standby state
         converter.enter_standby()
+        print(profile.report())
 
-        # once in stand by, the converter just waits until cut in voltage is achieved
-
-        while running:
-            now_s = time.monotonic()
-            # this is the main function you run: update_converter, this should be called in a loop at 30 kHz for as long as you want the converter
-            # to chase mpp
-            status = converter.update_converter()
-
-            if now_s >= next_log_s:
-                print(format_status(status))
-                next_log_s += LOG_PERIOD_S
-
-            # after calling update_converter, print error message in the case the converter faulted during the update
-            if status.state == ConverterState.FAULT:
-                print(f"converter faulted: {status.fault_reason}")
-                return 1
-
-            # feel free to ignore this, this is just the way i configured the converter to update at 30kHz, it will be different for you
-            next_tick_s += loop_period_s
-            sleep_s = next_tick_s - time.monotonic()
-            if sleep_s > 0:
-                time.sleep(sleep_s)
-            else:
-                next_tick_s = time.monotonic()
-
-        # call stop_converter to shut down the converter safely
-        # after stop_converter, the converter should be in standby mode 
-        print("stop requested")
-        converter.stop_converter()
-
-        while converter.get_status().state == ConverterState.STOPPING:
-            status = converter.update_converter()
-
-            if time.monotonic() >= next_log_s:
-                print(format_status(status))
-                next_log_s += LOG_PERIOD_S
+        heartbeat.open()
 
-            time.sleep(loop_period_s)
+        # once in stand by, the converter just waits until cut in voltage is achieved.
+        # loop.run calls update_converter at 30 kHz for as long as running is set (see control/loop.py),
+        # then stop_converter, after which the converter should be in standby mode
+        result = loop.run(converter, recovery, heartbeat, keep_running, on_tick)
 
-        return 0
+        if result:
+            status = converter.get_status()
+            print(f"converter faulted: {status.fault_reason}, giving up after {recovery.recoveries} retries")
+        return result
 
     except Exception as exc:
         print(f"ERROR: {exc}")
@@ -98,17 +135,8 @@ def main() -> int:
 
     # final shutdown, essentially stop_converter and then force safe outputs for all output pins we are using for the buckboost
     finally:
-        try:
-            converter.stop_converter()
-            converter.force_safe_outputs()
-        except Exception:
-            pass
-
-        try:
-            # deinit the converter after youre done
-            converter.deinit()
-        except Exception:
-            pass
+        loop.shutdown(converter, heartbeat)
+        print(heartbeat.stats.report())
 
         print("shutdown complete")
 
@@ -0,0 +1,99 @@
+"""
+top like view of a running converter, read from the status segment
+(ConverterConfig.status_path, see control/status_segment.py). reading does
+not touch the control process, run as many of these as you like.
+
+    python monitor.py [--path /dev/shm/utwind-converter.status] [--interval 0.5] [--once]
+"""
+
+import argparse
+import signal
+import sys
+import time
+
+from control.control import ConverterMode, ConverterState, FaultCode
+from control.status_segment import StatusReader, StatusSnapshot
+
+
+DEFAULT_PATH = "/dev/shm/utwind-converter.status"
+
+CLEAR = "\x1b[H\x1b[2J"
+
+running = True
+
+
+def handle_signal(signum, frame) -> None:
+    global running
+    running = False
+
+
+def rate(now: StatusSnapshot, before: StatusSnapshot | None, field: str) -> float:
+    if before is None or before.pid != now.pid or now.time_s <= before.time_s:
+        return 0.0
+    return (getattr(now, field) - getattr(before, field)) / (now.time_s - before.time_s)
+
+
+def render(s: StatusSnapshot, before: StatusSnapshot | None, stale_s: float) -> str:
+    age_s = s.age_s
+    efficiency = s.powout / s.powin * 100.0 if s.powin > 1.0 else 0.0
+    fault = FaultCode(s.fault_code).name
+    if s.fault_reason:
+        fault += f" ({s.fault_reason})"
+
+    lines = [
+        f"utwind converter  pid {s.pid}  publish {s.count}  age {age_s * 1e3:.1f} ms"
+        + ("  STALE" if age_s > stale_s else ""),
+        "",
+        f"state   {ConverterState(s.state).name:10s} mode {ConverterMode(s.mode).name:10s} fault {fault}",
+        "",
+        f"vin     {s.vin:7.2f} V   iin  {s.iin:6.2f} A   pin  {s.powin:7.1f} W",
+        f"vout    {s.vout:7.2f} V   iout {s.iout:6.2f} A   pout {s.powout:7.1f} W   eff {efficiency:5.1f} %",
+        f"vtarget {s.vtarget:7.2f} V   derate {s.derate:4.2f}",
+        f"duty    {s.duty:7.3f}     d1 {s.duty1:6.3f}   d2 {s.duty2:6.3f}",
+        "",
+        f"ticks   {s.ticks}  ({rate(s, before, 'ticks'):.0f}/s)   publishes {rate(s, before, 'count'):.0f}/s",
+        f"faults  {s.faults}   captures {s.captures}   mode changes {s.mode_changes}   suppressed {s.mode_suppressed}",
+    ]
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between refreshes")
+    parser.add_argument("--stale", type=float, default=1.0, help="flag a status older than this, seconds")
+    parser.add_argument("--once", action="store_true", help="print one status and exit")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    reader = StatusReader(args.path)
+    before = None
+
+    try:
+        while running:
+            snapshot = reader.read()
+
+            if snapshot is None:
+                text = f"waiting for {args.path}"
+            else:
+                text = render(snapshot, before, args.stale)
+                before = snapshot
+
+            if args.once:
+                print(text)
+                return 0 if snapshot is not None else 1
+
+            sys.stdout.write(CLEAR + text + "\n")
+            sys.stdout.flush()
+            time.sleep(args.interval)
+
+    finally:
+        reader.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
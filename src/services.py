@@ -0,0 +1,165 @@
+"""
+split setup: the control core (core.py) runs in its own process, this one
+does everything that may be slow or block: the status log, telemetry
+statistics and sending commands. the two only share the rings of
+control/shm_ring.py, a stalled service process costs the core dropped
+telemetry frames, never a late tick.
+
+    python services.py [--core-cpu 3] [--fifo 50] [--telemetry-every 30]
+
+Ctrl-C stops both: the core runs its stop sequence, this process waits for
+it and removes the shared memory.
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from control.control import ConverterMode, ConverterState, FaultCode
+from control.converter import ConverterConfig
+from control.shm_ring import CMD_STOP, COMMAND_FMT, TELEMETRY_FMT, ShmRing
+from control.watchdog import WatchdogConfig
+
+from core import run_core
+
+
+LOG_PERIOD_S = 0.250
+POLL_S = 0.010
+STOP_TIMEOUT_S = 5.0
+
+running = True
+
+
+def handle_signal(signum, frame) -> None:
+    global running
+    running = False
+
+
+def format_frame(frame: tuple) -> str:
+    _, _, state, mode, fault_code, vin, vout, iin, iout, duty1, duty2, vtarget = frame
+    return (
+        f"state={ConverterState(state).name:8s} "
+        f"mode={ConverterMode(mode).name:10s} "
+        f"vin={vin:6.2f} V vout={vout:6.2f} V "
+        f"iin={iin:5.2f} A iout={iout:5.2f} A "
+        f"vtarget={vtarget:7.3f} V "
+        f"d1={duty1:6.3f} d2={duty2:6.3f} "
+        f"fault={FaultCode(fault_code).name}"
+    )
+
+
+class TelemetryLog:
+    """
+    what the service side keeps from the frames: state changes, startup
+    times and energy delivered
+    """
+
+    def __init__(self):
+        self.last = None
+        self.frames = 0
+        self.energy_out_j = 0.0
+        self.startup_s = None
+
+    def add(self, frame: tuple) -> None:
+        last = self.last
+        self.frames += 1
+
+        if last is not None:
+            dt = frame[0] - last[0]
+            self.energy_out_j += frame[6] * frame[8] * dt
+
+            if frame[2] != last[2]:
+                print(f"{ConverterState(last[2]).name} -> {ConverterState(frame[2]).name} at tick {frame[1]}")
+
+                if frame[2] == ConverterState.STARTUP:
+                    self.startup_s = frame[0]
+                elif last[2] == ConverterState.STARTUP and self.startup_s is not None:
+                    print(f"startup took {(frame[0] - self.startup_s) * 1e3:.1f} ms")
+
+        self.last = frame
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--core-cpu", type=int, default=None, help="pin the control core to this cpu")
+    parser.add_argument("--fifo", type=int, default=0, help="SCHED_FIFO priority of the core, 0 keeps SCHED_OTHER")
+    parser.add_argument("--telemetry-every", type=int, default=30, help="ticks per telemetry frame")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    config = ConverterConfig(
+        pwm_freq=300_000,
+        pi_rate=30_000,
+        po_rate=1_000,
+        warm_start_path="/var/tmp/utwind-converter.warm",
+        status_path="/dev/shm/utwind-converter.status",
+    )
+
+    telemetry = ShmRing.create(TELEMETRY_FMT, capacity=1 << 14)
+    commands = ShmRing.create(COMMAND_FMT, capacity=64)
+
+    core = multiprocessing.get_context("spawn").Process(
+        target=run_core,
+        name="utwind-core",
+        args=(config, telemetry.name, commands.name),
+        kwargs=dict(
+            telemetry_every=args.telemetry_every,
+            cpu=args.core_cpu,
+            fifo_priority=args.fifo,
+            watchdog=WatchdogConfig(heartbeat_path="/dev/shm/utwind-converter.hb"),
+        ),
+    )
+    core.start()
+
+    if args.core_cpu is not None:
+        others = os.sched_getaffinity(0) - {args.core_cpu}
+        if others:
+            os.sched_setaffinity(0, others)
+
+    log = TelemetryLog()
+    next_log_s = time.monotonic()
+
+    try:
+        while running and core.is_alive():
+            for frame in telemetry.pop():
+                log.add(frame)
+
+            now = time.monotonic()
+            if now >= next_log_s and log.last is not None:
+                print(format_frame(log.last))
+                next_log_s = now + LOG_PERIOD_S
+
+            time.sleep(POLL_S)
+
+        print("stop requested")
+        commands.push(CMD_STOP, 0.0)
+        core.join(STOP_TIMEOUT_S)
+
+        if core.is_alive():
+            print("core did not stop, terminating it")
+            core.terminate()
+            core.join()
+
+        for frame in telemetry.pop():
+            log.add(frame)
+
+        print(
+            f"core exited with {core.exitcode}, {log.frames} frames, {telemetry.dropped} dropped, "
+            f"{log.energy_out_j:.1f} J out"
+        )
+        return 0 if core.exitcode == 0 else 1
+
+    finally:
+        if core.is_alive():
+            core.kill()
+        telemetry.close()
+        commands.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,7 +8,11 @@ from drivers.si8274 import SI8274
 PWM_FREQ = 10_000
 
 
-def main() -> int:
+def safe_shutdown(pwm_freq: int = PWM_FREQ) -> int:
+    """
+    gates off, both pwm channels stopped and every output in its safe level,
+    through a fresh pigpio connection. supervisor.py runs this too
+    """
     gpio = PiGpio()
     pwm = None
     gate = None
@@ -17,7 +21,7 @@ def main() -> int:
         print("initializing gpio...")
         gpio.init()
 
-        pwm = PiPwm(gpio=gpio, config=PwmConfig(frequency_hz=PWM_FREQ))
+        pwm = PiPwm(gpio=gpio, config=PwmConfig(frequency_hz=pwm_freq))
         gate = SI8274(gpio)
 
         print("initializing pwm...")
@@ -62,5 +66,9 @@ def main() -> int:
             pass
 
 
+def main() -> int:
+    return safe_shutdown()
+
+
 if __name__ == "__main__":
     sys.exit(main())
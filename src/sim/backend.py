@@ -0,0 +1,335 @@
+"""
+runs a real Converter against BuckBoostPlant instead of the Pi.
+
+the converter's gpio/spi/pwm/adc/ina/gate objects are swapped for sim
+versions. the sim ADC and INA229 subclass the real drivers and only replace
+the raw register reads, so code -> volts/amps scaling is the real one.
+
+FaultInjector overrides a sensor value for a time window, e.g.
+
+    rig = SimRig()
+    rig.injector.add("iin", start_s=1.0, duration_s=0.001, value=20.0)
+    rig.run(2.0)
+"""
+
+from dataclasses import dataclass
+import math
+
+from hal.gpio import GpioPins, PiGpio
+from hal.pwm import DutyQuantizer
+
+from drivers.mcp3208 import MCP3208
+from drivers.ina229 import INA229, INA_IN
+from drivers.si8274 import SI8274
+
+from control.control import ConverterState
+from control.converter import Converter, ConverterConfig
+
+from sim.plant import BuckBoostPlant, PlantParams
+
+
+SENSORS = ("vin", "vout", "iin", "iout")
+
+
+# -------------- fault injection --------------
+
+@dataclass
+class Injection:
+    sensor: str
+    start_s: float
+    end_s: float
+    value: float
+
+
+class FaultInjector:
+    def __init__(self):
+        self.injections: list[Injection] = []
+
+    def add(self, sensor: str, start_s: float, duration_s: float, value: float) -> None:
+        if sensor not in SENSORS:
+            raise ValueError(f"unknown sensor {sensor}, use one of {SENSORS}")
+
+        self.injections.append(Injection(sensor, start_s, start_s + duration_s, value))
+
+    def override(self, sensor: str, t: float, value: float) -> float:
+        for inj in self.injections:
+            if inj.sensor == sensor and inj.start_s <= t < inj.end_s:
+                return inj.value
+        return value
+
+
+# -------------- sim hardware --------------
+
+class SimGpio:
+    """
+    stands in for PiGpio, gate enables go to the plant
+    """
+
+    def __init__(self, plant: BuckBoostPlant):
+        self.plant = plant
+        self.pins = GpioPins()
+        self.pi = self  # SI8274 and PiPwm only check that pi is set
+        self.safe_writes = 0
+        self._gd_pins = frozenset((self.pins.gd_enable1, self.pins.gd_enable2))
+
+    def init(self) -> None:
+        pass
+
+    def deinit(self) -> None:
+        self.force_safe_outputs()
+
+    def force_safe_outputs(self) -> None:
+        self.safe_writes += 1
+        self.plant.duty1 = 0.0
+        self.plant.duty2 = 0.0
+        self.plant.gate1 = False
+        self.plant.gate2 = False
+
+    def get_gd_enable_pin(self, name: str | int) -> int:
+        return PiGpio.get_gd_enable_pin(self, name)
+
+    def set_gd_enable(self, name: str | int, enable: bool) -> None:
+        pin = self.get_gd_enable_pin(name)
+
+        if pin == self.pins.gd_enable1:
+            self.plant.gate1 = enable
+        elif pin == self.pins.gd_enable2:
+            self.plant.gate2 = enable
+
+
+class SimSpi:
+    def init(self) -> None:
+        pass
+
+    def deinit(self) -> None:
+        pass
+
+
+class SimPwm:
+    """
+    duties straight to the plant. with a quantizer the plant gets what the
+    hardware runs: pigpio counts truncated to the real PWM levels, dithered
+    in set_duties when the quantizer dithers.
+
+    start_ramp plays the PiPwm ramp script against plant time, SimRig.step
+    advances it before each plant step
+    """
+
+    def __init__(self, plant: BuckBoostPlant, max_duty: float = 0.95, quantizer: DutyQuantizer | None = None):
+        self.plant = plant
+        self.max_duty = max_duty
+        self.quantizer = quantizer
+
+        self.ramp_running = False
+        # (start s, start counts, counts per step, step s, end counts)
+        self._ramp = (0.0, 0, 0, 1.0, 0)
+
+    def init(self) -> None:
+        pass
+
+    def _hardware_duty(self, duty: float) -> float:
+        q = self.quantizer
+        if q is None:
+            return duty
+        return q.level(int(round(duty * 1_000_000))) / q.steps
+
+    def deinit(self) -> None:
+        self.stop_pwm("pwm1")
+        self.stop_pwm("pwm2")
+
+    def set_duty(self, name: str, duty: float) -> None:
+        duty = max(0.0, min(float(duty), self.max_duty))
+
+        duty = self._hardware_duty(duty)
+
+        if name == "pwm1":
+            self.plant.duty1 = duty
+        else:
+            self.plant.duty2 = duty
+
+    def set_duty_counts(self, name: str, counts: int) -> None:
+        self.set_duty(name, counts / 1_000_000)
+
+    def set_duties(self, duty1: float, duty2: float) -> None:
+        q = self.quantizer
+        if q is not None and q.dither:
+            max_counts = int(round(self.max_duty * 1_000_000))
+            duty1 = q.quantize(0, int(round(max(0.0, min(duty1, self.max_duty)) * 1_000_000)), max_counts) / 1_000_000
+            duty2 = q.quantize(1, int(round(max(0.0, min(duty2, self.max_duty)) * 1_000_000)), max_counts) / 1_000_000
+
+        self.set_duty("pwm1", duty1)
+        self.set_duty("pwm2", duty2)
+
+    def set_duties_counts(self, counts1: int, counts2: int) -> None:
+        self.set_duties(counts1 / 1_000_000, counts2 / 1_000_000)
+
+    def stop_pwm(self, name: str) -> None:
+        self.set_duty(name, 0.0)
+
+    def start_ramp(self, start_duty: float, end_duty: float, duration_s: float, step_s: float = 1e-4) -> bool:
+        # same integer steps as the script PiPwm.start_ramp runs
+        start = int(round(max(0.0, min(start_duty, self.max_duty)) * 1_000_000))
+        end = int(round(max(0.0, min(end_duty, self.max_duty)) * 1_000_000))
+
+        steps = max(1, int(round(duration_s / step_s)))
+        increment = max(1, int(round((end - start) / steps)))
+        step_us = max(1, int(round(step_s * 1e6)))
+
+        self._ramp = (self.plant.t, start, increment, step_us * 1e-6, end)
+        self.ramp_running = True
+        self.advance_ramp()
+        return True
+
+    def advance_ramp(self) -> None:
+        t0, start, increment, step_s, end = self._ramp
+
+        counts = start + int((self.plant.t - t0) / step_s + 1e-9) * increment
+        if counts >= end:
+            counts = end
+            self.ramp_running = False
+
+        self.set_duty("pwm1", counts / 1_000_000)
+
+    def stop_ramp(self) -> None:
+        self.ramp_running = False
+
+
+class SimAdc(MCP3208):
+    def __init__(self, rig: "SimRig"):
+        super().__init__(spi=None)
+        self.rig = rig
+        self.volts_per_code = self.config.vref * self.config.divider_ratio / 4095.0
+
+    def _volts(self, channel: int) -> float:
+        name = "vin" if channel == self.config.ch_vin else "vout"
+        return self.rig.sensor(name)
+
+    def read_raw(self, channel: int) -> int:
+        self._validate_channel(channel)
+        volts = self._volts(channel)
+
+        if not math.isfinite(volts):
+            volts = 0.0
+
+        return max(0, min(4095, int(round(volts / self.volts_per_code))))
+
+    def read_vin(self) -> float:
+        volts = self._volts(self.config.ch_vin)
+        return volts if not math.isfinite(volts) else super().read_vin()
+
+    def read_vout(self) -> float:
+        volts = self._volts(self.config.ch_vout)
+        return volts if not math.isfinite(volts) else super().read_vout()
+
+
+class SimIna(INA229):
+    def __init__(self, rig: "SimRig", config):
+        super().__init__(spi=None, config=config)
+        self.rig = rig
+        self.temperature_c = 35.0
+
+    def initialize_all_ina(self, check_id: bool = True) -> None:
+        pass
+
+    def read_current_raw(self, sensor: str | int) -> int:
+        amps = self.rig.sensor("iin" if self.handle(sensor) == INA_IN else "iout")
+
+        if not math.isfinite(amps):
+            amps = 0.0
+
+        code = int(round(amps / self.current_lsb))
+        return max(-(1 << 19), min((1 << 19) - 1, code))
+
+    def read_current(self, sensor: str | int) -> float:
+        amps = self.rig.sensor("iin" if self.handle(sensor) == INA_IN else "iout")
+        return amps if not math.isfinite(amps) else super().read_current(sensor)
+
+    def read_die_temp(self, sensor: str | int) -> float:
+        return self.temperature_c
+
+
+# -------------- rig --------------
+
+class SimRig:
+    """
+    converter + plant + injector, stepped in lockstep at pi_rate.
+    rig.time is the simulated monotonic clock.
+    """
+
+    def __init__(
+        self,
+        config: ConverterConfig | None = None,
+        params: PlantParams | None = None,
+        plant: BuckBoostPlant | None = None,
+        quantize_pwm: bool = False,
+    ):
+        self.config = config or ConverterConfig()
+        # plant sees the hardware PWM levels, always on with pwm_dither
+        self.quantize_pwm = quantize_pwm or self.config.pwm_dither
+        self.plant = plant or BuckBoostPlant(params or PlantParams())
+        self.injector = FaultInjector()
+        self.dt = 1.0 / self.config.pi_rate
+
+        self.converter = Converter(self.config)
+        self.attach(self.converter)
+
+        self.ticks = 0
+        self.status = None
+
+    def attach(self, converter: Converter) -> None:
+        converter.gpio = SimGpio(self.plant)
+        converter.spi = SimSpi()
+        quantizer = None
+        if self.quantize_pwm:
+            config = self.config
+            quantizer = DutyQuantizer(config.pwm_freq, config.pwm_clock_hz, config.pwm_dither)
+
+        converter.pwm = SimPwm(self.plant, max_duty=self.config.pwm_max_duty, quantizer=quantizer)
+        converter.adc = SimAdc(self)
+        converter.ina = SimIna(self, converter.ina.config)
+        converter.gate = SI8274(converter.gpio)
+        converter.clock = self.time
+
+    def time(self) -> float:
+        return self.plant.t
+
+    def sensor(self, name: str) -> float:
+        plant = self.plant
+
+        if name == "vin":
+            value = plant.vin
+        elif name == "vout":
+            value = plant.vout
+        elif name == "iin":
+            value = plant.iin
+        else:
+            value = plant.iout
+
+        return self.injector.override(name, plant.t, value)
+
+    def step(self):
+        pwm = self.converter.pwm
+        if pwm.ramp_running:
+            pwm.advance_ramp()
+
+        self.plant.step(self.dt)
+        self.status = self.converter.update_converter()
+        self.ticks += 1
+        return self.status
+
+    def run(self, seconds: float, until=None):
+        """
+        steps for `seconds` of sim time, or until until(rig) returns True
+        """
+        end = self.plant.t + seconds
+
+        while self.plant.t < end:
+            self.step()
+            if until is not None and until(self):
+                break
+
+        return self.status
+
+    def start(self) -> None:
+        if self.converter.state == ConverterState.OFF:
+            self.converter.enter_standby()
@@ -0,0 +1,695 @@
+"""
+offline stand ins for the pigpio and spidev modules.
+
+install() puts fake `pigpio` and `spidev` modules in sys.modules (and into
+hal.gpio / hal.spi if those were already imported), after that PiGpio,
+PiSpi, PiPwm and the real MCP3208 / INA229 drivers run unmodified. for
+scripts that import pigpio themselves, sim/fake_modules holds drop in
+pigpio.py / spidev.py:
+
+    PYTHONPATH=sim/fake_modules:. python main.py
+
+every fake pi and SpiDev shares one FakeBus. pin writes land in
+bus.levels, hardware_PWM in bus.pwm (and in the bus.pwm_block registers the
+way the daemon programs them), and xfer2 is routed to the device whose chip
+select pin is low. devices model the chips at register level:
+
+- Mcp3208Model: decodes the start / SGL / channel bits, answers 12 bit codes
+  from volts at the pin
+- Ina229Model: register file with reset, CONFIG ADCRANGE, ADC_CONFIG mode,
+  SHUNT_CAL and ids. VSHUNT / CURRENT / DIETEMP follow from the source
+  current and temperature the way the chip computes them.
+
+Latency adds a fixed cost per pigpio call and per SPI transfer (plus per
+byte at max_speed_hz). "spin" busy waits so wall clock benchmarks see it,
+"account" only adds it to bus.hw_time_s, which is deterministic.
+
+    bus = install(latency=Latency(pigpio_call_s=50e-6, mode="account"))
+    attach_default_devices(bus, vin=30.0, vout=20.0, iin=2.0, iout=2.0)
+"""
+
+from dataclasses import dataclass
+import math
+import os
+import sys
+import time
+import types
+from array import array
+from typing import Callable
+
+
+OUTPUT = 1
+INPUT = 0
+
+
+class FakeHardwareError(RuntimeError):
+    pass
+
+
+# -------------- latency --------------
+
+@dataclass
+class Latency:
+    pigpio_call_s: float = 0.0
+    spi_call_s: float = 0.0
+    # per byte on the wire, None derives it from SpiDev.max_speed_hz
+    spi_byte_s: float | None = 0.0
+    mode: str = "spin"  # "spin" or "account"
+
+    def __post_init__(self) -> None:
+        if self.mode not in ("spin", "account"):
+            raise FakeHardwareError("latency mode must be spin or account")
+
+
+def _spin(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+# -------------- pwm registers --------------
+
+PWM_CLOCK_HZ = 250_000_000
+
+# hardware channel of each pwm pin, and its CTL enable / mark space bits
+PWM_CHANNELS = {12: 1, 13: 2, 18: 1, 19: 2}
+PWM_CTL_BITS = {1: (1 << 0) | (1 << 7), 2: (1 << 8) | (1 << 15)}
+
+
+class FakePwmBlock:
+    """
+    CTL / STA / RNG1 / DAT1 / RNG2 / DAT2 words of the BCM PWM block, what
+    hal.pwm_mmap maps from /dev/mem. words[offset >> 2] is a register
+    """
+
+    def __init__(self):
+        self.words = array("I", [0] * 10)
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def program(self, gpio: int, frequency: int, dutycycle: int) -> None:
+        channel = PWM_CHANNELS.get(gpio)
+        if channel is None:
+            return
+
+        rng = 0x10 >> 2 if channel == 1 else 0x20 >> 2
+        bits = PWM_CTL_BITS[channel]
+
+        if frequency <= 0:
+            self.words[0] &= ~bits
+            return
+
+        self.words[rng] = PWM_CLOCK_HZ // frequency
+        self.words[rng + 1] = dutycycle * self.words[rng] // 1_000_000
+        self.words[0] |= bits
+
+    def level(self, channel: int) -> int:
+        return self.words[(0x14 if channel == 1 else 0x24) >> 2]
+
+
+# -------------- shared bus --------------
+
+class FakeBus:
+    def __init__(self, latency: Latency | None = None):
+        self.latency = latency or Latency()
+
+        self.levels: dict[int, int] = {}
+        self.modes: dict[int, int] = {}
+        self.pwm: dict[int, tuple[int, int]] = {}
+        self.devices: dict[int, object] = {}
+        self.scripts: list[tuple] = []
+        self.pwm_block = FakePwmBlock()
+
+        # (virtual script time s, pin, dutycycle) of every script hp when set
+        self.log_pwm = False
+        self.pwm_events: list[tuple[float, int, int]] = []
+
+        self.pigpio_calls = 0
+        self.transfers = 0
+        self.bytes = 0
+        self.hw_time_s = 0.0
+
+    def attach(self, cs_pin: int, device) -> None:
+        self.devices[cs_pin] = device
+
+    def selected(self):
+        found = None
+
+        for pin, device in self.devices.items():
+            if self.levels.get(pin, 1) == 0:
+                if found is not None:
+                    raise FakeHardwareError("more than one chip select is low")
+                found = device
+
+        return found
+
+    def reset_counters(self) -> None:
+        self.pigpio_calls = 0
+        self.transfers = 0
+        self.bytes = 0
+        self.hw_time_s = 0.0
+
+    def pigpio_call(self) -> None:
+        self.pigpio_calls += 1
+        self._delay(self.latency.pigpio_call_s)
+
+    def spi_call(self, n_bytes: int, speed_hz: int) -> None:
+        latency = self.latency
+        byte_s = latency.spi_byte_s if latency.spi_byte_s is not None else 8.0 / speed_hz
+
+        self.transfers += 1
+        self.bytes += n_bytes
+        self._delay(latency.spi_call_s + n_bytes * byte_s)
+
+    def _delay(self, seconds: float) -> None:
+        if seconds <= 0.0:
+            return
+
+        self.hw_time_s += seconds
+        if self.latency.mode == "spin":
+            _spin(seconds)
+
+
+BUS = FakeBus()
+
+
+# -------------- pigpio --------------
+
+SCRIPT_ARGC = {
+    "hp": 3, "w": 2, "bs1": 1, "bc1": 1, "lda": 1, "sta": 1, "add": 1, "cmp": 1,
+    "mics": 1, "tag": 1, "jmp": 1, "jm": 1, "halt": 0,
+}
+SCRIPT_MAX_STEPS = 1_000_000
+
+
+def _script_arg(token: str) -> tuple[str, int]:
+    """
+    ("p", n) parameter, ("v", n) variable, ("", n) literal
+    """
+    if token[0] in "pv":
+        return token[0], int(token[1:])
+    return "", int(token)
+
+
+class FakePi:
+    def __init__(self, host: str = "localhost", port: int = 8888, bus: FakeBus | None = None):
+        self.bus = bus or BUS
+        self.connected = True
+
+    def set_mode(self, gpio: int, mode: int) -> int:
+        self.bus.pigpio_call()
+        self.bus.modes[gpio] = mode
+        return 0
+
+    def write(self, gpio: int, level: int) -> int:
+        self.bus.pigpio_call()
+        self.bus.levels[gpio] = 1 if level else 0
+        return 0
+
+    def read(self, gpio: int) -> int:
+        self.bus.pigpio_call()
+        return self.bus.levels.get(gpio, 0)
+
+    def set_bank_1(self, bits: int) -> int:
+        self.bus.pigpio_call()
+        self._bank(bits, 1)
+        return 0
+
+    def clear_bank_1(self, bits: int) -> int:
+        self.bus.pigpio_call()
+        self._bank(bits, 0)
+        return 0
+
+    def _bank(self, bits: int, level: int) -> None:
+        levels = self.bus.levels
+        for gpio in range(32):
+            if bits >> gpio & 1:
+                levels[gpio] = level
+
+    def hardware_PWM(self, gpio: int, frequency: int, dutycycle: int) -> int:
+        self.bus.pigpio_call()
+
+        if not 0 <= dutycycle <= 1_000_000:
+            raise FakeHardwareError(f"pigpio dutycycle out of range: {dutycycle}")
+
+        self.bus.pwm[gpio] = (frequency, dutycycle)
+        self.bus.pwm_block.program(gpio, frequency, dutycycle)
+        return 0
+
+    # pigpio scripts: hp / w / bs1 / bc1 plus the accumulator, variable and jump
+    # commands the ramp script uses. a script runs to completion inside
+    # run_script, mics advances a virtual clock instead of sleeping
+
+    def store_script(self, script: bytes) -> int:
+        self.bus.pigpio_call()
+
+        tokens = script.decode().split()
+        commands = []
+        tags = {}
+        k = 0
+
+        while k < len(tokens):
+            op = tokens[k]
+            argc = SCRIPT_ARGC.get(op)
+            if argc is None:
+                raise FakeHardwareError(f"fake pigpio script: unsupported command {op}")
+
+            args = tuple(_script_arg(t) for t in tokens[k + 1:k + 1 + argc])
+            if op == "tag":
+                tags[args[0][1]] = len(commands)
+            else:
+                commands.append((op, args))
+            k += 1 + argc
+
+        simple = all(op in ("hp", "w", "bs1", "bc1") for op, _ in commands)
+        self.bus.scripts.append((simple, commands, tags))
+        return len(self.bus.scripts) - 1
+
+    def script_status(self, script_id: int) -> tuple[int, list[int]]:
+        self.bus.pigpio_call()
+        return 1, [0] * 10  # PI_SCRIPT_HALTED
+
+    def run_script(self, script_id: int, params: list[int] | None = None) -> int:
+        self.bus.pigpio_call()
+        params = list(params or []) + [0] * 10
+        simple, commands, tags = self.bus.scripts[script_id]
+
+        if simple:
+            # straight line scripts, no program counter needed
+            for op, args in commands:
+                values = [params[n] if kind == "p" else n for kind, n in args]
+                if op == "hp":
+                    self._script_pwm(0.0, *values)
+                elif op == "w":
+                    self.bus.levels[values[0]] = 1 if values[1] else 0
+                else:
+                    self._bank(values[0], 1 if op == "bs1" else 0)
+            return 0
+
+        self._run_program(commands, tags, params)
+        return 0
+
+    def _run_program(self, commands: list, tags: dict[int, int], params: list[int]) -> None:
+        variables = [0] * 150
+        acc = 0
+        flag = 0
+        clock = 0.0
+        pc = 0
+
+        def value(arg):
+            kind, n = arg
+            return params[n] if kind == "p" else variables[n] if kind == "v" else n
+
+        for _ in range(SCRIPT_MAX_STEPS):
+            if pc >= len(commands):
+                return
+
+            op, args = commands[pc]
+            pc += 1
+
+            if op == "hp":
+                self._script_pwm(clock, *(value(a) for a in args))
+            elif op == "w":
+                self.bus.levels[value(args[0])] = 1 if value(args[1]) else 0
+            elif op in ("bs1", "bc1"):
+                self._bank(value(args[0]), 1 if op == "bs1" else 0)
+            elif op == "lda":
+                acc = value(args[0])
+            elif op == "sta":
+                variables[args[0][1]] = acc
+            elif op == "add":
+                acc += value(args[0])
+                flag = acc
+            elif op == "cmp":
+                flag = acc - value(args[0])
+            elif op == "mics":
+                clock += value(args[0]) * 1e-6
+            elif op == "jmp":
+                pc = tags[args[0][1]]
+            elif op == "jm":
+                if flag < 0:
+                    pc = tags[args[0][1]]
+            elif op == "halt":
+                return
+
+        raise FakeHardwareError("fake pigpio script: step limit reached")
+
+    def _script_pwm(self, clock: float, gpio: int, frequency: int, dutycycle: int) -> None:
+        if not 0 <= dutycycle <= 1_000_000:
+            raise FakeHardwareError(f"pigpio dutycycle out of range: {dutycycle}")
+
+        bus = self.bus
+        bus.pwm[gpio] = (frequency, dutycycle)
+        bus.pwm_block.program(gpio, frequency, dutycycle)
+        if bus.log_pwm:
+            bus.pwm_events.append((clock, gpio, dutycycle))
+
+    def stop_script(self, script_id: int) -> int:
+        self.bus.pigpio_call()
+        return 0
+
+    def delete_script(self, script_id: int) -> int:
+        self.bus.pigpio_call()
+        return 0
+
+    def stop(self) -> None:
+        self.connected = False
+
+
+# -------------- spidev --------------
+
+class FakeSpiDev:
+    def __init__(self, bus: FakeBus | None = None):
+        self.bus = bus or BUS
+        self.opened = False
+
+        self.mode = 0
+        self.no_cs = False
+        self.max_speed_hz = 500_000
+        self.bits_per_word = 8
+
+    def open(self, bus: int, device: int) -> None:
+        self.opened = True
+
+    def close(self) -> None:
+        self.opened = False
+
+    def xfer2(self, data: list[int]) -> list[int]:
+        if not self.opened:
+            raise FakeHardwareError("SpiDev not open")
+
+        self.bus.spi_call(len(data), self.max_speed_hz)
+        device = self.bus.selected()
+
+        if device is None:
+            return [0] * len(data)
+
+        return device.xfer(list(data), self.mode)
+
+
+# -------------- MCP3208 --------------
+
+Source = Callable[[], float]
+
+
+def _source(value) -> Source:
+    return value if callable(value) else (lambda: float(value))
+
+
+class Mcp3208Model:
+    """
+    MCP3208 in the 3 byte framing the driver uses:
+        tx  [0b00000 start sgl d2, d1 d0 xxxxxx, xxxxxxxx]
+        rx  [x, xxx 0 b11..b8, b7..b0]
+    channels[n] is the pin voltage (or a callable returning it)
+    """
+
+    def __init__(self, vref: float = 3.3, channels: dict[int, object] | None = None):
+        self.vref = vref
+        self.channels: dict[int, Source] = {}
+        self.conversions = 0
+
+        for channel, value in (channels or {}).items():
+            self.set_channel(channel, value)
+
+    def set_channel(self, channel: int, volts) -> None:
+        self.channels[channel] = _source(volts)
+
+    def code(self, channel: int) -> int:
+        volts = self.channels.get(channel, lambda: 0.0)()
+        if not math.isfinite(volts):
+            volts = 0.0
+        return max(0, min(4095, int(round(volts / self.vref * 4095))))
+
+    def xfer(self, tx: list[int], mode: int) -> list[int]:
+        if len(tx) != 3:
+            return [0xFF] * len(tx)
+
+        if mode not in (0, 3):
+            # wrong clock phase, the ADC clocks garbage
+            return [0xFF] * 3
+
+        if not tx[0] & 0x04:
+            return [0xFF] * 3  # no start bit, output stays high impedance
+
+        single = bool(tx[0] & 0x02)
+        channel = ((tx[0] & 0x01) << 2) | (tx[1] >> 6)
+
+        if single:
+            code = self.code(channel)
+        else:
+            pair = channel & 0x06
+            plus, minus = (pair, pair + 1) if not channel & 0x01 else (pair + 1, pair)
+            code = max(0, self.code(plus) - self.code(minus))
+
+        self.conversions += 1
+        return [0x00, (code >> 8) & 0x0F, code & 0xFF]
+
+
+# -------------- INA229 --------------
+
+REGISTER_BYTES = {
+    0x00: 2,  # CONFIG
+    0x01: 2,  # ADC_CONFIG
+    0x02: 2,  # SHUNT_CAL
+    0x03: 2,  # SHUNT_TEMPCO
+    0x04: 3,  # VSHUNT
+    0x05: 3,  # VBUS
+    0x06: 2,  # DIETEMP
+    0x07: 3,  # CURRENT
+    0x08: 3,  # POWER
+    0x0B: 2,  # DIAG_ALRT
+    0x3E: 2,  # MANUFACTURER_ID
+    0x3F: 2,  # DEVICE_ID
+}
+
+WRITABLE = {0x00, 0x01, 0x02, 0x03, 0x0B}
+
+RESET_VALUES = {
+    0x00: 0x0000,
+    0x01: 0xFB68,
+    0x02: 0x1000,
+    0x0B: 0x0001,
+    0x3E: 0x5449,
+    0x3F: 0x2291,
+}
+
+
+class Ina229Model:
+    """
+    INA229 register file. results are computed when read from the current
+    source (A), bus voltage source (V) and die temperature source (C):
+
+        VSHUNT  = I * rshunt / (312.5 nV, 78.125 nV with ADCRANGE)
+        CURRENT = VSHUNT * 4096 / SHUNT_CAL, which is I / CURRENT_LSB for
+                  SHUNT_CAL = 13107.2e6 * CURRENT_LSB * R (x4 with ADCRANGE)
+        DIETEMP = temp / 7.8125 m C, only when the ADC_CONFIG mode converts temperature
+
+    shunt and temperature results read 0 while the mode does not convert them.
+    """
+
+    def __init__(self, rshunt_ohms: float = 0.01, current=0.0, vbus=0.0, temperature_c=25.0):
+        self.rshunt_ohms = rshunt_ohms
+        self.current = _source(current)
+        self.vbus = _source(vbus)
+        self.temperature_c = _source(temperature_c)
+
+        self.registers: dict[int, int] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        self.registers = {reg: RESET_VALUES.get(reg, 0) for reg in REGISTER_BYTES}
+
+    def _mode(self) -> int:
+        return self.registers[0x01] >> 12
+
+    def _adcrange(self) -> int:
+        return (self.registers[0x00] >> 4) & 0x01
+
+    def vshunt_code(self) -> int:
+        if not self._mode() & 0x02:
+            return 0
+
+        amps = self.current()
+        if not math.isfinite(amps):
+            amps = 0.0
+
+        lsb = 78.125e-9 if self._adcrange() else 312.5e-9
+        code = int(round(amps * self.rshunt_ohms / lsb))
+        return max(-(1 << 19), min((1 << 19) - 1, code))
+
+    def current_code(self) -> int:
+        shunt_cal = self.registers[0x02] & 0x7FFF
+        if shunt_cal == 0:
+            return 0
+
+        code = int(round(self.vshunt_code() * 4096 / shunt_cal))
+        return max(-(1 << 19), min((1 << 19) - 1, code))
+
+    def read_register(self, reg: int) -> int:
+        if reg == 0x04:
+            return (self.vshunt_code() & 0xFFFFF) << 4
+
+        if reg == 0x05:
+            if not self._mode() & 0x01:
+                return 0
+            return (int(round(self.vbus() / 195.3125e-6)) & 0xFFFFF) << 4
+
+        if reg == 0x06:
+            if not self._mode() & 0x04:
+                return 0
+            return int(round(self.temperature_c() / 7.8125e-3)) & 0xFFFF
+
+        if reg == 0x07:
+            return (self.current_code() & 0xFFFFF) << 4
+
+        return self.registers.get(reg, 0)
+
+    def write_register(self, reg: int, value: int) -> None:
+        if reg == 0x00 and value & 0x8000:
+            self.reset()
+            return
+
+        if reg in WRITABLE:
+            self.registers[reg] = value & 0xFFFF
+
+    def xfer(self, tx: list[int], mode: int) -> list[int]:
+        if mode != 1:
+            return [0xFF] * len(tx)
+
+        reg = tx[0] >> 2
+        n = len(tx) - 1
+
+        if tx[0] & 0x01:
+            value = self.read_register(reg)
+            return [0x00] + [(value >> (8 * (n - 1 - k))) & 0xFF for k in range(n)]
+
+        value = 0
+        for b in tx[1:]:
+            value = (value << 8) | b
+        self.write_register(reg, value)
+
+        return [0x00] * len(tx)
+
+
+# -------------- default wiring --------------
+
+def attach_default_devices(
+    bus: FakeBus | None = None,
+    vin=30.0,
+    vout=20.0,
+    iin=2.0,
+    iout=2.0,
+    temperature_c=35.0,
+    divider_ratio: float = 12.5,
+) -> tuple[Mcp3208Model, Ina229Model, Ina229Model]:
+    """
+    MCP3208 and both INA229 on the GpioPins chip selects. vin / vout are
+    converter volts (before the divider), values or callables.
+    """
+    from hal.gpio import GpioPins
+
+    bus = bus or BUS
+    pins = GpioPins()
+
+    vin_s = _source(vin)
+    vout_s = _source(vout)
+
+    adc = Mcp3208Model(channels={
+        0: lambda: vin_s() / divider_ratio,
+        1: lambda: vout_s() / divider_ratio,
+    })
+    ina_in = Ina229Model(current=iin, vbus=vin, temperature_c=temperature_c)
+    ina_out = Ina229Model(current=iout, vbus=vout, temperature_c=temperature_c)
+
+    bus.attach(pins.cs_mcp3208, adc)
+    bus.attach(pins.cs_ina_in, ina_in)
+    bus.attach(pins.cs_ina_out, ina_out)
+
+    return adc, ina_in, ina_out
+
+
+# -------------- drop in modules --------------
+
+_env_configured = False
+
+
+def configure_from_env(bus: FakeBus | None = None) -> FakeBus:
+    """
+    used by sim/fake_modules, runs once per process:
+        FAKE_PIGPIO_CALL_US   latency per pigpio call (default 0)
+        FAKE_SPI_CALL_US      latency per xfer2 (default 0)
+        FAKE_SPI_BYTE_US      latency per byte, "auto" derives it from max_speed_hz (default 0)
+        FAKE_LATENCY_MODE     spin or account (default spin)
+        FAKE_VIN / FAKE_VOUT / FAKE_IIN / FAKE_IOUT   what the sensors read
+    """
+    global _env_configured
+
+    bus = bus or BUS
+    if _env_configured:
+        return bus
+
+    env = os.environ
+    byte_us = env.get("FAKE_SPI_BYTE_US", "0")
+
+    bus.latency = Latency(
+        pigpio_call_s=float(env.get("FAKE_PIGPIO_CALL_US", "0")) * 1e-6,
+        spi_call_s=float(env.get("FAKE_SPI_CALL_US", "0")) * 1e-6,
+        spi_byte_s=None if byte_us == "auto" else float(byte_us) * 1e-6,
+        mode=env.get("FAKE_LATENCY_MODE", "spin"),
+    )
+
+    attach_default_devices(
+        bus,
+        vin=float(env.get("FAKE_VIN", "30")),
+        vout=float(env.get("FAKE_VOUT", "20")),
+        iin=float(env.get("FAKE_IIN", "2")),
+        iout=float(env.get("FAKE_IOUT", "2")),
+    )
+
+    _env_configured = True
+    return bus
+
+
+# -------------- install --------------
+
+def pigpio_module(bus: FakeBus | None = None) -> types.ModuleType:
+    bus = bus or BUS
+    module = types.ModuleType("pigpio")
+    module.pi = lambda host="localhost", port=8888: FakePi(host, port, bus)
+    module.OUTPUT = OUTPUT
+    module.INPUT = INPUT
+    return module
+
+
+def spidev_module(bus: FakeBus | None = None) -> types.ModuleType:
+    bus = bus or BUS
+    module = types.ModuleType("spidev")
+    module.SpiDev = lambda: FakeSpiDev(bus)
+    return module
+
+
+def install(bus: FakeBus | None = None, latency: Latency | None = None) -> FakeBus:
+    """
+    makes `import pigpio` / `import spidev` return the fakes, returns the bus
+    """
+    bus = bus or BUS
+    if latency is not None:
+        bus.latency = latency
+
+    pigpio = pigpio_module(bus)
+    spidev = spidev_module(bus)
+
+    sys.modules["pigpio"] = pigpio
+    sys.modules["spidev"] = spidev
+
+    if "hal.gpio" in sys.modules:
+        sys.modules["hal.gpio"].pigpio = pigpio
+    if "hal.spi" in sys.modules:
+        sys.modules["hal.spi"].spidev = spidev
+
+    return bus
@@ -0,0 +1,17 @@
+"""
+drop in pigpio backed by sim/fake_hw.py, put sim/fake_modules first on
+PYTHONPATH (with src after it). latency and sensor values come from the
+FAKE_* environment variables, see fake_hw.configure_from_env.
+"""
+
+from sim import fake_hw
+
+
+_bus = fake_hw.configure_from_env()
+
+OUTPUT = fake_hw.OUTPUT
+INPUT = fake_hw.INPUT
+
+
+def pi(host: str = "localhost", port: int = 8888) -> fake_hw.FakePi:
+    return fake_hw.FakePi(host, port, _bus)
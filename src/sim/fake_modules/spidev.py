@@ -0,0 +1,12 @@
+"""
+drop in spidev backed by sim/fake_hw.py, see sim/fake_modules/pigpio.py.
+"""
+
+from sim import fake_hw
+
+
+_bus = fake_hw.configure_from_env()
+
+
+def SpiDev() -> fake_hw.FakeSpiDev:
+    return fake_hw.FakeSpiDev(_bus)
@@ -0,0 +1,102 @@
+"""
+averaged model of the 4 switch buck-boost between the rectified turbine and a resistive load.
+
+    source:   voc behind r_source (voc can follow a wind profile)
+    inductor: L diL/dt = d1 * vin - (1 - d2) * vout - r_l * iL, iL >= 0 (body diodes)
+    input:    Cin dvin/dt  = (voc - vin) / r_source - d1 * iL
+    output:   Cout dvout/dt = (1 - d2) * iL - vout / r_load
+
+d1 is the buck (pwm1/gd1) duty and d2 the boost (pwm2/gd2) duty. a disabled
+gate driver or stopped pwm counts as duty 0 on that leg.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class PlantParams:
+    voc: float = 40.0
+    r_source: float = 4.0
+
+    l: float = 47e-6
+    r_l: float = 0.02
+
+    c_in: float = 470e-6
+    c_out: float = 470e-6
+
+    r_load: float = 10.0
+
+    # euler substeps per step() call
+    substeps: int = 8
+
+
+class BuckBoostPlant:
+    def __init__(self, params: PlantParams = PlantParams(), voc_profile: Callable[[float], float] | None = None):
+        self.params = params
+        self.voc_profile = voc_profile
+
+        self.t = 0.0
+        self.vin = params.voc
+        self.vout = 0.0
+        self.il = 0.0
+
+        self.duty1 = 0.0
+        self.duty2 = 0.0
+        self.gate1 = False
+        self.gate2 = False
+
+        self.energy_in = 0.0
+        self.energy_out = 0.0
+
+    @property
+    def voc(self) -> float:
+        if self.voc_profile is None:
+            return self.params.voc
+        return self.voc_profile(self.t)
+
+    @property
+    def d1(self) -> float:
+        return self.duty1 if self.gate1 else 0.0
+
+    @property
+    def d2(self) -> float:
+        return self.duty2 if self.gate2 else 0.0
+
+    @property
+    def iin(self) -> float:
+        return self.d1 * self.il
+
+    @property
+    def iout(self) -> float:
+        return (1.0 - self.d2) * self.il
+
+    def step(self, dt: float) -> None:
+        p = self.params
+        h = dt / p.substeps
+
+        d1 = self.d1
+        d2 = self.d2
+        voc = self.voc
+
+        vin = self.vin
+        vout = self.vout
+        il = self.il
+
+        for _ in range(p.substeps):
+            il += h * (d1 * vin - (1.0 - d2) * vout - p.r_l * il) / p.l
+            if il < 0.0:
+                il = 0.0
+
+            vin += h * ((voc - vin) / p.r_source - d1 * il) / p.c_in
+            vout += h * ((1.0 - d2) * il - vout / p.r_load) / p.c_out
+            if vout < 0.0:
+                vout = 0.0
+
+        self.vin = vin
+        self.vout = vout
+        self.il = il
+        self.t += dt
+
+        self.energy_in += vin * d1 * il * dt
+        self.energy_out += vout * vout / p.r_load * dt
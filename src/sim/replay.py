@@ -0,0 +1,413 @@
+"""
+record and replay of the converter's sensor stream.
+
+Recorder wraps converter.adc / converter.ina (real drivers on the Pi, or the
+SimRig ones) and keeps one frame of raw codes per update_converter call:
+
+    vin, vout      MCP3208 codes
+    iin, iout      INA229 CURRENT codes (signed 20 bit)
+    temp_in/out    INA229 DIETEMP codes (signed 16 bit)
+
+a channel not read during a tick keeps its previous code. record from
+enter_standby on, replay starts the converter from standby too.
+
+ReplayRig runs a Converter with drivers that answer from the frames, tick by
+tick and as fast as it goes. the clock is tick / pi_rate, so time based
+control (soft start, dwell times) replays the same way, up to float rounding
+against the live clock. both the float and the integer path scale the same
+codes, replays of one recording are bit for bit repeatable:
+
+    rig = ReplayRig(load("run.rec"), ConverterConfig(pi_kp=0.02))
+    trace = rig.run()
+
+file format, like control/fault_capture.py:
+    header  struct HEADER_FMT (magic, version, columns, frames, pi_rate, volts_per_code, current_lsb)
+    frames  int32 little endian, frames * columns
+
+python -m bench.replay_run   records, replays and compares configs
+"""
+
+from array import array
+from dataclasses import dataclass, field
+import struct
+import sys
+
+from hal.gpio import GpioPins, PiGpio
+
+from drivers.mcp3208 import MCP3208
+from drivers.ina229 import INA229, DIETEMP_LSB_C, INA_IN
+
+from control.control import ConverterState
+from control.converter import Converter, ConverterConfig
+
+
+MAGIC = b"UTRP"
+VERSION = 1
+
+HEADER_FMT = "<4sHHIIdd"
+
+COLUMNS = ("vin", "vout", "iin", "iout", "temp_in", "temp_out")
+N_COLUMNS = len(COLUMNS)
+
+VIN, VOUT, IIN, IOUT, TEMP_IN, TEMP_OUT = range(N_COLUMNS)
+
+
+class ReplayError(RuntimeError):
+    pass
+
+
+def _volts_per_code(adc: MCP3208) -> float:
+    return adc.config.vref * adc.config.divider_ratio / 4095.0
+
+
+# -------------- recording --------------
+
+@dataclass
+class Recording:
+    pi_rate: int
+    volts_per_code: float
+    current_lsb: float
+    frames: array = field(default_factory=lambda: array("i"))
+
+    def __len__(self) -> int:
+        return len(self.frames) // N_COLUMNS
+
+    def frame(self, index: int) -> tuple[int, ...]:
+        start = index * N_COLUMNS
+        return tuple(self.frames[start:start + N_COLUMNS])
+
+    def save(self, path: str) -> None:
+        frames = self.frames
+        if sys.byteorder != "little":
+            frames = array("i", frames)
+            frames.byteswap()
+
+        with open(path, "wb") as f:
+            f.write(struct.pack(
+                HEADER_FMT,
+                MAGIC,
+                VERSION,
+                N_COLUMNS,
+                len(self),
+                self.pi_rate,
+                self.volts_per_code,
+                self.current_lsb,
+            ))
+            f.write(frames.tobytes())
+
+
+def load(path: str) -> Recording:
+    with open(path, "rb") as f:
+        data = f.read()
+
+    header_size = struct.calcsize(HEADER_FMT)
+    if len(data) < header_size:
+        raise ReplayError(f"{path}: too short for a recording")
+
+    magic, version, n_columns, n_frames, pi_rate, volts_per_code, current_lsb = struct.unpack_from(HEADER_FMT, data)
+
+    if magic != MAGIC or version != VERSION:
+        raise ReplayError(f"{path}: not a recording (magic {magic!r}, version {version})")
+
+    if n_columns != N_COLUMNS:
+        raise ReplayError(f"{path}: {n_columns} columns, expected {N_COLUMNS}")
+
+    frames = array("i")
+    frames.frombytes(data[header_size:header_size + 4 * n_columns * n_frames])
+    if sys.byteorder != "little":
+        frames.byteswap()
+
+    if len(frames) != n_columns * n_frames:
+        raise ReplayError(f"{path}: truncated, {len(frames) // n_columns} of {n_frames} frames")
+
+    return Recording(pi_rate, volts_per_code, current_lsb, frames)
+
+
+class RecordingAdc(MCP3208):
+    """
+    passes reads through to the wrapped adc and notes the codes
+    """
+
+    def __init__(self, inner: MCP3208, frame: list[int]):
+        super().__init__(spi=inner.spi, config=inner.config)
+        self.inner = inner
+        self.frame = frame
+        self._columns = {self.config.ch_vin: VIN, self.config.ch_vout: VOUT}
+
+    def read_raw(self, channel: int) -> int:
+        code = self.inner.read_raw(channel)
+
+        column = self._columns.get(channel)
+        if column is not None:
+            self.frame[column] = code
+
+        return code
+
+
+class RecordingIna(INA229):
+    def __init__(self, inner: INA229, frame: list[int]):
+        super().__init__(spi=inner.spi, config=inner.config)
+        self.inner = inner
+        self.frame = frame
+        self.current_lsb = inner.current_lsb
+
+    def initialize_all_ina(self, check_id: bool = True) -> None:
+        self.inner.initialize_all_ina(check_id=check_id)
+
+    def read_current_raw(self, sensor: str | int) -> int:
+        code = self.inner.read_current_raw(sensor)
+        self.frame[IIN if self.handle(sensor) == INA_IN else IOUT] = code
+        return code
+
+    def read_die_temp(self, sensor: str | int) -> float:
+        temp = self.inner.read_die_temp(sensor)
+        self.frame[TEMP_IN if self.handle(sensor) == INA_IN else TEMP_OUT] = int(round(temp / DIETEMP_LSB_C))
+        return temp
+
+
+class Recorder:
+    """
+    call recorder.update_converter() in place of converter.update_converter()
+    """
+
+    def __init__(self, converter: Converter):
+        self.converter = converter
+        self.frame = [0] * N_COLUMNS
+
+        self.recording = Recording(
+            pi_rate=converter.config.pi_rate,
+            volts_per_code=_volts_per_code(converter.adc),
+            current_lsb=converter.ina.current_lsb,
+        )
+
+        converter.adc = RecordingAdc(converter.adc, self.frame)
+        converter.ina = RecordingIna(converter.ina, self.frame)
+
+    def update_converter(self):
+        status = self.converter.update_converter()
+        self.recording.frames.extend(self.frame)
+        return status
+
+    def save(self, path: str) -> None:
+        self.recording.save(path)
+
+
+# -------------- replay --------------
+
+class ReplayGpio:
+    def __init__(self):
+        self.pins = GpioPins()
+        self.pi = self  # SI8274 and PiPwm only check that pi is set
+        self.levels: dict[int, bool] = {}
+        self._gd_pins = frozenset((self.pins.gd_enable1, self.pins.gd_enable2))
+
+    def init(self) -> None:
+        pass
+
+    def deinit(self) -> None:
+        pass
+
+    def force_safe_outputs(self) -> None:
+        self.levels.clear()
+
+    def get_gd_enable_pin(self, name: str | int) -> int:
+        return PiGpio.get_gd_enable_pin(self, name)
+
+    def set_gd_enable(self, name: str | int, enable: bool) -> None:
+        self.levels[self.get_gd_enable_pin(name)] = enable
+
+
+class ReplaySpi:
+    def init(self) -> None:
+        pass
+
+    def deinit(self) -> None:
+        pass
+
+
+class ReplayPwm:
+    def __init__(self, max_duty: float = 0.95):
+        self.max_duty = max_duty
+        self.duty = {"pwm1": 0.0, "pwm2": 0.0}
+
+    def init(self) -> None:
+        pass
+
+    def deinit(self) -> None:
+        self.stop_pwm("pwm1")
+        self.stop_pwm("pwm2")
+
+    def set_duty(self, name: str, duty: float) -> None:
+        self.duty[name] = max(0.0, min(float(duty), self.max_duty))
+
+    def set_duty_counts(self, name: str, counts: int) -> None:
+        self.set_duty(name, counts / 1_000_000)
+
+    def set_duties(self, duty1: float, duty2: float) -> None:
+        self.set_duty("pwm1", duty1)
+        self.set_duty("pwm2", duty2)
+
+    def set_duties_counts(self, counts1: int, counts2: int) -> None:
+        self.set_duties(counts1 / 1_000_000, counts2 / 1_000_000)
+
+    def stop_pwm(self, name: str) -> None:
+        self.duty[name] = 0.0
+
+    def start_ramp(self, start_duty: float, end_duty: float, duration_s: float, step_s: float = 1e-4) -> bool:
+        # no daemon, the converter ramps tick by tick like without scripts
+        return False
+
+    def stop_ramp(self) -> None:
+        pass
+
+
+class ReplayAdc(MCP3208):
+    def __init__(self, rig: "ReplayRig"):
+        super().__init__(spi=None)
+        self.rig = rig
+        self._columns = {self.config.ch_vin: VIN, self.config.ch_vout: VOUT}
+
+    def read_raw(self, channel: int) -> int:
+        self._validate_channel(channel)
+        return self.rig.frames[self.rig.offset + self._columns.get(channel, VIN)]
+
+
+class ReplayIna(INA229):
+    def __init__(self, rig: "ReplayRig", config):
+        super().__init__(spi=None, config=config)
+        self.rig = rig
+
+    def initialize_all_ina(self, check_id: bool = True) -> None:
+        pass
+
+    def read_current_raw(self, sensor: str | int) -> int:
+        return self.rig.frames[self.rig.offset + (IIN if self.handle(sensor) == INA_IN else IOUT)]
+
+    def read_die_temp(self, sensor: str | int) -> float:
+        return self.rig.frames[self.rig.offset + (TEMP_IN if self.handle(sensor) == INA_IN else TEMP_OUT)] * DIETEMP_LSB_C
+
+
+@dataclass
+class Trace:
+    """
+    converter outputs per replayed tick
+    """
+    state: array = field(default_factory=lambda: array("b"))
+    mode: array = field(default_factory=lambda: array("b"))
+    duty1: array = field(default_factory=lambda: array("d"))
+    duty2: array = field(default_factory=lambda: array("d"))
+    vtarget: array = field(default_factory=lambda: array("d"))
+
+    def __len__(self) -> int:
+        return len(self.state)
+
+
+@dataclass
+class TraceDiff:
+    ticks: int
+    first_tick: int | None
+    state_ticks: int
+    mode_ticks: int
+    max_duty_diff: float
+    max_vtarget_diff: float
+
+    @property
+    def identical(self) -> bool:
+        return self.first_tick is None
+
+
+def compare(a: Trace, b: Trace, tolerance: float = 0.0) -> TraceDiff:
+    """
+    tick by tick difference of two replays of the same recording
+    """
+    if len(a) != len(b):
+        raise ReplayError(f"traces differ in length: {len(a)} and {len(b)}")
+
+    first = None
+    state_ticks = 0
+    mode_ticks = 0
+    max_duty = 0.0
+    max_vtarget = 0.0
+
+    for k in range(len(a)):
+        duty = max(abs(a.duty1[k] - b.duty1[k]), abs(a.duty2[k] - b.duty2[k]))
+        vtarget = abs(a.vtarget[k] - b.vtarget[k])
+        state = a.state[k] != b.state[k]
+        mode = a.mode[k] != b.mode[k]
+
+        state_ticks += state
+        mode_ticks += mode
+        max_duty = max(max_duty, duty)
+        max_vtarget = max(max_vtarget, vtarget)
+
+        if first is None and (state or mode or duty > tolerance or vtarget > tolerance):
+            first = k
+
+    return TraceDiff(len(a), first, state_ticks, mode_ticks, max_duty, max_vtarget)
+
+
+class ReplayRig:
+    """
+    Converter fed from a Recording, one frame per update_converter call
+    """
+
+    def __init__(self, recording: Recording, config: ConverterConfig | None = None):
+        self.recording = recording
+        self.config = config or ConverterConfig(pi_rate=recording.pi_rate)
+
+        if self.config.pi_rate != recording.pi_rate:
+            raise ReplayError(f"recorded at {recording.pi_rate} Hz, config runs at {self.config.pi_rate} Hz")
+
+        self.frames = recording.frames
+        self.offset = 0
+        self.ticks = 0
+
+        self.converter = Converter(self.config)
+        self.attach(self.converter)
+
+    def attach(self, converter: Converter) -> None:
+        converter.gpio = ReplayGpio()
+        converter.spi = ReplaySpi()
+        converter.pwm = ReplayPwm(max_duty=self.config.pwm_max_duty)
+        converter.adc = ReplayAdc(self)
+        converter.ina = ReplayIna(self, converter.ina.config)
+        converter.gate = type(converter.gate)(converter.gpio)
+        converter.clock = self.time
+
+        recording = self.recording
+        if abs(_volts_per_code(converter.adc) - recording.volts_per_code) > 1e-12 * recording.volts_per_code:
+            raise ReplayError("adc scaling differs from the recording")
+        if abs(converter.ina.current_lsb - recording.current_lsb) > 1e-12 * recording.current_lsb:
+            raise ReplayError("ina current_lsb differs from the recording")
+
+    def time(self) -> float:
+        return self.ticks / self.recording.pi_rate
+
+    def run(self, trace: Trace | None = None, ticks: int | None = None) -> Trace | None:
+        """
+        replays the whole recording (or `ticks` frames) from standby.
+        with trace=None nothing is kept per tick, for load testing.
+        """
+        converter = self.converter
+        n = len(self.recording) if ticks is None else min(ticks, len(self.recording))
+
+        self.offset = 0
+        self.ticks = 0
+        if converter.state == ConverterState.OFF:
+            converter.enter_standby()
+
+        update = converter.update_converter
+
+        for k in range(n):
+            self.offset = k * N_COLUMNS
+            self.ticks = k
+            status = update()
+
+            if trace is not None:
+                trace.state.append(status.state.value)
+                trace.mode.append(status.mode.value)
+                trace.duty1.append(status.duty1)
+                trace.duty2.append(status.duty2)
+                trace.vtarget.append(status.vtarget)
+
+        return trace
@@ -0,0 +1,333 @@
+"""
+parameter sweep of simulated converter runs over a process pool.
+
+every point is a set of ConverterConfig fields (pi_kp, pi_ki, pi_ff_gain,
+pi_max_duty_step, po_step_v, mode_margin_v, filter_alpha, ...) and plant.<name>
+PlantParams fields. each runs SimRig from standby for `seconds` of sim time
+and reports:
+
+    t_normal_s      time the converter first reached NORMAL
+    energy_in_j     taken from the source
+    energy_out_j    delivered to the load (harvested)
+    overshoot_v     peak vout after NORMAL above the mean of the last 20 %
+    mode_changes    applied mode changes, suppressed: requests the rate limit dropped
+    faults          entries into FAULT, fault: the first reason
+
+results are appended to a jsonl file as points finish, one line per point
+keyed by a hash of the point and run length. a rerun with the same file skips
+points already in it, so an interrupted sweep resumes where it stopped.
+start a new file after changing control code, the key does not cover it.
+
+    python -m sim.sweep --param pi_kp=0.01,0.02,0.05 --param pi_ki=0,5,20 -o kp_ki.jsonl
+    python -m sim.sweep --param pi_kp=0.005:0.1:log --param po_step_v=0.2:2 --random 64 --seed 1 -o rand.jsonl
+    python -m sim.sweep -o kp_ki.jsonl --show --sort energy_out_j
+
+grid values are comma separated, random search draws lo:hi uniformly
+(lo:hi:log log uniformly) or picks from a comma list, from a fixed seed so a
+resumed random sweep draws the same points.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import sys
+
+from control.control import ConverterState
+from control.converter import ConverterConfig
+
+from sim.backend import SimRig
+from sim.plant import PlantParams
+
+
+CONFIG_FIELDS = {f.name for f in fields(ConverterConfig)}
+PLANT_FIELDS = {f.name for f in fields(PlantParams)}
+
+METRICS = (
+    "t_normal_s",
+    "energy_in_j",
+    "energy_out_j",
+    "overshoot_v",
+    "mode_changes",
+    "suppressed",
+    "faults",
+)
+
+SETTLE_FRACTION = 0.2
+
+
+class SweepError(RuntimeError):
+    pass
+
+
+# -------------- points --------------
+
+def check_name(name: str) -> None:
+    if name.startswith("plant."):
+        if name[6:] not in PLANT_FIELDS:
+            raise SweepError(f"unknown plant parameter {name}")
+    elif name not in CONFIG_FIELDS:
+        raise SweepError(f"unknown config field {name}")
+
+
+def point_key(point: dict, seconds: float) -> str:
+    text = json.dumps({"point": point, "seconds": seconds}, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def parse_value(text: str):
+    text = text.strip()
+
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def grid(space: dict[str, list]) -> list[dict]:
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_points(space: dict[str, object], n: int, seed: int) -> list[dict]:
+    """
+    space values are lists (choice) or (lo, hi, log) tuples
+    """
+    rng = random.Random(seed)
+    names = sorted(space)
+    points = []
+
+    for _ in range(n):
+        point = {}
+
+        for name in names:
+            spec = space[name]
+
+            if isinstance(spec, list):
+                point[name] = rng.choice(spec)
+            else:
+                lo, hi, log = spec
+                if log:
+                    point[name] = math.exp(rng.uniform(math.log(lo), math.log(hi)))
+                else:
+                    point[name] = rng.uniform(lo, hi)
+
+        points.append(point)
+
+    return points
+
+
+# -------------- one run --------------
+
+def run_point(point: dict, seconds: float) -> dict:
+    config = {k: v for k, v in point.items() if not k.startswith("plant.")}
+    plant = {k[6:]: v for k, v in point.items() if k.startswith("plant.")}
+
+    rig = SimRig(ConverterConfig(**config), PlantParams(**plant))
+    rig.start()
+
+    p = rig.plant
+    dt = rig.dt
+    r_load = p.params.r_load
+    ticks = int(round(seconds / dt))
+    settle_from = int(ticks * (1.0 - SETTLE_FRACTION))
+
+    energy_in = 0.0
+    energy_out = 0.0
+    t_normal = None
+    peak_vout = 0.0
+    settle_sum = 0.0
+
+    faults = 0
+    fault = None
+    mode_changes = 0
+    state = rig.converter.state
+    mode = rig.converter.mode
+
+    for k in range(ticks):
+        status = rig.step()
+
+        vout = p.vout
+        energy_in += p.vin * p.iin * dt
+        energy_out += vout * vout / r_load * dt
+
+        if status.state != state:
+            if status.state == ConverterState.NORMAL and t_normal is None:
+                t_normal = p.t
+            if status.state == ConverterState.FAULT:
+                faults += 1
+                fault = fault or status.fault_reason
+            state = status.state
+
+        if status.mode != mode:
+            mode_changes += 1
+            mode = status.mode
+
+        if t_normal is not None and vout > peak_vout:
+            peak_vout = vout
+
+        if k >= settle_from:
+            settle_sum += vout
+
+    settled = settle_sum / max(1, ticks - settle_from)
+
+    return {
+        "t_normal_s": t_normal,
+        "energy_in_j": energy_in,
+        "energy_out_j": energy_out,
+        "overshoot_v": max(0.0, peak_vout - settled) if t_normal is not None else None,
+        "mode_changes": mode_changes,
+        "suppressed": rig.converter.mode_manager.suppressed,
+        "faults": faults,
+        "fault": fault,
+        "state": state.name,
+    }
+
+
+def _run(key: str, point: dict, seconds: float) -> dict:
+    try:
+        metrics = run_point(point, seconds)
+    except Exception as e:
+        metrics = {"error": f"{type(e).__name__}: {e}"}
+
+    return {"key": key, "point": point, "seconds": seconds, **metrics}
+
+
+# -------------- results --------------
+
+def load_results(path: str) -> dict[str, dict]:
+    results = {}
+
+    if not os.path.exists(path):
+        return results
+
+    with open(path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            results[row["key"]] = row
+
+    return results
+
+
+def sweep(points: list[dict], seconds: float, path: str, jobs: int | None = None, progress=print) -> dict[str, dict]:
+    """
+    runs the points not yet in `path`, appending each result as it finishes
+    """
+    for point in points:
+        for name in point:
+            check_name(name)
+
+    results = load_results(path)
+    todo = {}
+    for point in points:
+        key = point_key(point, seconds)
+        if key not in results:
+            todo[key] = point
+
+    progress(f"{len(points)} points, {len(points) - len(todo)} cached, {len(todo)} to run")
+    if not todo:
+        return results
+
+    with open(path, "a") as f, ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_run, key, point, seconds) for key, point in todo.items()]
+
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                row = future.result()
+                f.write(json.dumps(row) + "\n")
+                f.flush()
+                results[row["key"]] = row
+                progress(f"[{done}/{len(todo)}] {format_point(row['point'])}")
+
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    return results
+
+
+def format_point(point: dict) -> str:
+    return " ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in sorted(point.items()))
+
+
+def print_table(rows: list[dict], sort: str | None = None, limit: int | None = None) -> None:
+    names = sorted({name for row in rows for name in row["point"]})
+
+    if sort is not None:
+        rows = sorted(rows, key=lambda r: (r.get(sort) is None, -(r.get(sort) or 0.0)))
+    if limit is not None:
+        rows = rows[:limit]
+
+    header = names + list(METRICS) + ["state"]
+    print("  ".join(f"{h:>12}" for h in header))
+
+    for row in rows:
+        if "error" in row:
+            values = [row["point"].get(n) for n in names] + [row["error"]]
+        else:
+            values = [row["point"].get(n) for n in names] + [row.get(m) for m in METRICS] + [row.get("state")]
+
+        print("  ".join(f"{v:>12.5g}" if isinstance(v, float) else f"{str(v):>12}" for v in values))
+
+
+# -------------- cli --------------
+
+def parse_space(specs: list[str], random_search: bool) -> dict:
+    space = {}
+
+    for spec in specs or ():
+        name, _, text = spec.partition("=")
+        name = name.strip()
+        check_name(name)
+
+        if random_search and ":" in text:
+            parts = text.split(":")
+            space[name] = (float(parts[0]), float(parts[1]), len(parts) > 2 and parts[2] == "log")
+        else:
+            space[name] = [parse_value(v) for v in text.split(",")]
+
+    return space
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--param", action="append", metavar="NAME=VALUES", help="config field or plant.<name>")
+    parser.add_argument("--random", type=int, default=0, metavar="N", help="N random points instead of the grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--seconds", type=float, default=0.5, help="sim time per point")
+    parser.add_argument("-o", "--results", required=True, help="jsonl results file, appended and reused")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: cpu count)")
+    parser.add_argument("--show", action="store_true", help="only print the table of the results file")
+    parser.add_argument("--sort", default="energy_out_j", help="metric to sort the table by, descending")
+    parser.add_argument("--top", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        if args.show:
+            results = load_results(args.results)
+        else:
+            space = parse_space(args.param, random_search=args.random > 0)
+            points = random_points(space, args.random, args.seed) if args.random else grid(space)
+            results = sweep(points, args.seconds, args.results, jobs=args.jobs)
+
+    except SweepError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    print_table(list(results.values()), sort=args.sort, limit=args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+watches the heartbeat record main.py writes (WatchdogConfig.heartbeat_path)
+and forces the outputs safe when it stops.
+
+when the sequence number has not moved for --timeout, the control process
+(pid from the record) is killed so it cannot wake up and drive the PWM
+again, then shutdown.safe_shutdown() puts every output in its safe level.
+after that it waits for a new heartbeat. a record removed by a clean exit
+is not a stall.
+
+the kill is skipped when the pid no longer has the start time the record
+holds: the control process is gone and the pid was reused. the outputs are
+forced safe all the same.
+
+    python supervisor.py [--path /dev/shm/utwind-converter.hb] [--timeout 0.05] [--poll 0.005] [--no-kill]
+"""
+
+import argparse
+import os
+import signal
+import sys
+import time
+
+from control.watchdog import process_start_time, read_heartbeat
+from shutdown import safe_shutdown
+
+
+DEFAULT_PATH = "/dev/shm/utwind-converter.hb"
+
+running = True
+
+
+def handle_signal(signum, frame) -> None:
+    global running
+    running = False
+
+
+def stop_process(pid: int, started: int) -> None:
+    """
+    SIGKILL for pid, only while it is the process that wrote the heartbeat
+    """
+    if process_start_time(pid) != started:
+        print(f"{pid} is not the control process any more, not killed")
+        return
+
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    except PermissionError as exc:
+        print(f"cannot kill {pid}: {exc}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    parser.add_argument("--timeout", type=float, default=0.05, help="seconds without a new sequence number")
+    parser.add_argument("--poll", type=float, default=0.005)
+    parser.add_argument("--no-kill", action="store_true", help="leave the stalled process running")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    last = None          # (pid, seq) last seen
+    last_change_s = 0.0
+    max_gap_s = 0.0
+    tripped = False
+
+    print(f"supervising {args.path}, timeout {args.timeout * 1e3:.0f} ms")
+
+    while running:
+        now = time.monotonic()
+        record = read_heartbeat(args.path)
+
+        if record is None:
+            if last is not None and not tripped:
+                print(f"heartbeat of {last[0]} ended cleanly, longest gap {max_gap_s * 1e3:.1f} ms")
+            last = None
+            tripped = False
+
+        else:
+            pid, seq, _, started = record
+
+            if last is None or (pid, seq) != last:
+                if last is not None and last[0] == pid:
+                    max_gap_s = max(max_gap_s, now - last_change_s)
+                else:
+                    print(f"heartbeat from {pid}")
+                    max_gap_s = 0.0
+                    tripped = False
+
+                last = (pid, seq)
+                last_change_s = now
+
+            elif not tripped and now - last_change_s > args.timeout:
+                tripped = True
+                print(f"heartbeat of {pid} stopped at {seq} for {(now - last_change_s) * 1e3:.1f} ms, forcing safe outputs")
+
+                if not args.no_kill:
+                    stop_process(pid, started)
+
+                safe_shutdown()
+
+        time.sleep(args.poll)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+control.control: mode manager, soft start on the sim plant, compiled classes
+"""
+
+import random
+
+import pytest
+
+import control.control as cc
+from bench import accel_parity
+from build_accel import is_compiled, load_pure_python
+from control.control import ConverterMode, ConverterState, ModeManager
+from control.converter import ConverterConfig
+
+from sim.backend import SimRig
+from sim.plant import PlantParams
+
+
+# -------------- mode manager --------------
+
+DT = 1.0 / 30_000
+
+
+def test_pass_through_hysteresis():
+    mm = ModeManager(dt=DT, dwell_s=0.0, max_changes=0)
+
+    # inside exit_margin_v pass through is kept
+    assert mm.update(22.0, 20.0) == ConverterMode.PASS_BUCK
+    assert mm.update(22.6, 20.0) == ConverterMode.BUCK
+
+    # back to pass through only inside margin_v
+    assert mm.update(21.6, 20.0) == ConverterMode.BUCK
+    assert mm.update(21.4, 20.0) == ConverterMode.PASS_BUCK
+    assert mm.update(17.6, 20.0) == ConverterMode.PASS_BUCK
+    assert mm.update(17.4, 20.0) == ConverterMode.BOOST
+    assert mm.changes == 3
+
+
+def test_dwell_holds_the_mode():
+    mm = ModeManager(dt=DT, dwell_s=0.005, max_changes=0)
+    dwell_ticks = round(0.005 / DT)
+
+    assert mm.update(25.0, 20.0) == ConverterMode.BUCK
+
+    held = 0
+    while mm.update(15.0, 20.0) == ConverterMode.BUCK:
+        held += 1
+
+    # the change came on the first tick dwell_ticks after the last one
+    assert held == dwell_ticks - 1
+    assert mm.suppressed == dwell_ticks - 1
+    assert mm.changes == 2
+
+
+def test_rate_limit_caps_changes_per_window():
+    mm = ModeManager(dt=DT, dwell_s=0.0, max_changes=4, rate_window_s=0.01)
+    window_ticks = round(0.01 / DT)
+
+    modes = [mm.update(25.0 if k % 2 else 15.0, 20.0) for k in range(window_ticks)]
+    assert mm.changes == 4
+    # held back only on the ticks asking for the other mode
+    assert mm.suppressed == (window_ticks - 4) // 2
+    assert modes[-1] == modes[4]
+
+    # the first change leaves the window one window after it was made
+    mm.update(25.0 if window_ticks % 2 else 15.0, 20.0)
+    assert mm.changes == 5
+
+
+# -------------- soft start --------------
+
+def time_to_normal(voc: float) -> float:
+    rig = SimRig(ConverterConfig(), PlantParams(voc=voc))
+    rig.start()
+
+    rig.run(1.0, until=lambda r: r.converter.state != ConverterState.STANDBY)
+    started = rig.time()
+    rig.run(1.0, until=lambda r: r.converter.state != ConverterState.STARTUP)
+
+    assert rig.converter.state == ConverterState.NORMAL
+    return rig.time() - started
+
+
+def test_soft_start_ends_on_the_vout_band():
+    config = ConverterConfig()
+    durations = [time_to_normal(voc) for voc in (20.0, 30.0, 40.0)]
+
+    # reaching the band ends the ramp early, when depends on the source
+    assert all(d < config.startup_time_s for d in durations)
+    assert durations == sorted(durations)
+    assert durations[-1] - durations[0] > 10 / config.pi_rate
+
+
+# -------------- compiled classes --------------
+
+@pytest.mark.parametrize("name", cc.COMPILED_CLASSES)
+def test_compiled_classes_match_pure_python(name):
+    if not is_compiled(cc):
+        pytest.skip("control._control_accel is not built")
+
+    case = dict(accel_parity.CASES)[name]
+    out_c, state_c = case(cc, random.Random(accel_parity.SEED))
+    out_p, state_p = case(load_pure_python(), random.Random(accel_parity.SEED))
+
+    assert len(out_c) == len(out_p)
+    assert all(accel_parity.same(a, b) for a, b in zip(out_c, out_p))
+    assert accel_parity.same(state_c, state_p)
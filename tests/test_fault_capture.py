@@ -0,0 +1,105 @@
+"""
+fault capture ring (control/fault_capture.py) and Converter.save_capture
+"""
+
+import pytest
+
+from control import fault_capture
+from control.control import ConverterState
+from control.converter import ConverterConfig
+from control.fault_capture import FIELDS, N_FIELDS, REASON_BYTES, FaultCapture, FaultCaptureError
+
+from sim.backend import SimRig
+
+
+def record(capture: FaultCapture, tick: int) -> None:
+    capture.record(*([float(tick)] * N_FIELDS))
+
+
+def test_dump_load_round_trip(tmp_path):
+    capture = FaultCapture(depth=16, post=4)
+    for tick in range(40):
+        record(capture, tick)
+
+    capture.trigger("output overvoltage: 36.000 V", fault_code=7)
+    for tick in range(40, 60):
+        record(capture, tick)
+
+    assert capture.frozen
+
+    path = tmp_path / "capture.bin"
+    capture.dump(str(path))
+    loaded = fault_capture.load(str(path))
+
+    assert loaded["fields"] == list(FIELDS)
+    assert loaded["reason"] == "output overvoltage: 36.000 V"
+    assert loaded["fault_code"] == 7
+    assert loaded["samples"] == capture.samples()
+
+    # 16 deep, frozen `post` ticks after the trigger tick: 40 .. 44 after 29 .. 39
+    ticks = [row[1] for row in loaded["samples"]]
+    assert ticks == [float(t) for t in range(29, 45)]
+    assert ticks[loaded["trigger_index"]] == 40.0
+
+
+def test_long_reason_is_cut_on_a_character_boundary(tmp_path):
+    capture = FaultCapture(depth=4, post=0)
+    # "°" is two bytes, after the one byte "x" the cut lands inside a character
+    capture.trigger("x" + "°" * REASON_BYTES)
+    record(capture, 0)
+
+    path = tmp_path / "capture.bin"
+    capture.dump(str(path))
+    reason = fault_capture.load(str(path))["reason"]
+
+    assert reason == "x" + "°" * (REASON_BYTES // 2 - 1)
+
+
+def test_rearm_starts_a_new_capture():
+    capture = FaultCapture(depth=8, post=1)
+    capture.trigger("a")
+    record(capture, 0)
+    record(capture, 1)
+    assert capture.frozen
+
+    record(capture, 2)
+    assert capture.samples()[-1][1] == 1.0
+
+    capture.rearm()
+    record(capture, 3)
+    assert not capture.frozen
+    assert [row[1] for row in capture.samples()] == [3.0]
+    assert capture.trigger_count == 1
+
+
+def test_bad_depth():
+    with pytest.raises(FaultCaptureError):
+        FaultCapture(depth=4, post=4)
+
+
+def test_converter_saves_each_capture_once(tmp_path):
+    rig = SimRig(ConverterConfig(fault_capture_depth=256, fault_capture_post=32, fault_capture_dir=str(tmp_path)))
+    converter = rig.converter
+    rig.start()
+
+    rig.run(1.0, until=lambda r: r.converter.state == ConverterState.NORMAL)
+    assert converter.state == ConverterState.NORMAL
+
+    rig.injector.add("iin", start_s=rig.time(), duration_s=0.001, value=20.0)
+    rig.run(0.1, until=lambda r: r.converter.state == ConverterState.FAULT)
+    assert converter.state == ConverterState.FAULT
+
+    # still recording the post trigger ticks, nothing to write yet
+    assert converter.save_capture() is None
+
+    rig.run(0.01)
+    path = converter.save_capture()
+    assert path is not None and path.startswith(str(tmp_path))
+    assert converter.save_capture() is None
+
+    loaded = fault_capture.load(path)
+    assert len(loaded["samples"]) == 256
+    # the INA229 clips the 20 A spike at its range, still past the limit
+    assert loaded["samples"][loaded["trigger_index"]][FIELDS.index("iin")] > converter.safety.limits.iin_max
+    assert "overcurrent" in loaded["reason"]
+    assert list(tmp_path.iterdir()) == [tmp_path / path.rsplit("/", 1)[-1]]
@@ -0,0 +1,74 @@
+"""
+integer control path (control/fixed.py) against the float path
+"""
+
+from bench.fixed_parity import (
+    DUTY_TOL_COUNTS,
+    FILTER_TOL_CODES,
+    adc_volts,
+    run_control,
+    run_safety,
+    synthetic_codes,
+)
+from drivers.ina229 import INA229Config
+from drivers.mcp3208 import MCP3208Config
+
+from control.control import FaultCode, PIController, SafetyChecker, SafetyLimits, build_measurements
+from control.fixed import FixedLowPassFilter, Q_ONE, RawSafetyChecker, RawScale
+
+
+ADC = MCP3208Config()
+SCALE = RawScale.from_sensors(
+    vref=ADC.vref,
+    divider_ratio=ADC.divider_ratio,
+    adc_bits=ADC.adc_bits,
+    current_lsb=INA229Config(rshunt_ohms=0.01, max_expected_current=14.0).max_expected_current / 2 ** 19,
+)
+
+LIMITS = SafetyLimits(vin_min=5.0, vin_max=35.0, vout_max=30.0, iin_max=8.0, iout_max=9.0)
+
+
+def test_control_parity_within_bounds():
+    codes = synthetic_codes(20_000)
+
+    for pi in (PIController(dt=1.0 / 30_000), PIController(dt=1.0 / 30_000, kp=0.02, ki=40.0)):
+        worst_filter, worst_duty = run_control(codes, pi, SCALE, ADC)
+        assert worst_filter <= FILTER_TOL_CODES
+        assert worst_duty <= DUTY_TOL_COUNTS
+
+
+def test_fixed_filter_settles_on_the_code():
+    f = FixedLowPassFilter.from_alpha(0.3)
+    f.update(1000)
+    for _ in range(200):
+        value_q = f.update(2000)
+
+    assert abs(value_q / Q_ONE - 2000) < 1.0 / 1024.0
+
+
+def test_raw_checker_agrees_with_check_code():
+    assert run_safety(SCALE, ADC) == 0
+
+
+def test_raw_checker_windows_at_the_limit():
+    raw = RawSafetyChecker.compile(LIMITS, SCALE)
+    checker = SafetyChecker(limits=LIMITS)
+    w = raw.windows
+
+    for vin, expected in ((w.vin_hi, FaultCode.NONE), (w.vin_hi + 1, FaultCode.VIN_OVER),
+                          (w.vin_lo, FaultCode.NONE), (w.vin_lo - 1, FaultCode.VIN_UNDER)):
+        assert raw.check(vin, 1500, 0, 0) == expected
+
+        m = build_measurements(adc_volts(vin, ADC), adc_volts(1500, ADC), 0.0, 0.0)
+        assert checker.check_code(m) == expected
+
+    assert raw.check(2000, 1500, w.iin_hi + 1, 0) == FaultCode.IIN_OVER
+    assert raw.check(2000, 1500, 0, w.iout_lo - 1) == FaultCode.IOUT_OVER
+    assert raw.check(2000, w.vout_hi + 1, 0, 0) == FaultCode.VOUT_OVER
+
+
+def test_raw_checker_describe_uses_units():
+    raw = RawSafetyChecker.compile(LIMITS, SCALE)
+    vin = raw.windows.vin_hi + 10
+
+    assert "input overvoltage" in raw.describe(FaultCode.VIN_OVER, vin, 1500, 0, 0)
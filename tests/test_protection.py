@@ -0,0 +1,96 @@
+"""
+slow protection tier (control/protection.py): trip points and derating
+"""
+
+import math
+
+import pytest
+
+from control.control import FaultCode
+from control.protection import ProtectionEngine, ProtectionLimits
+
+
+def run_until_trip(engine: ProtectionEngine, vin, vout, iin, iout, max_ticks: int) -> int | None:
+    """
+    tick of the trip, None when nothing tripped in max_ticks
+    """
+    for tick in range(1, max_ticks + 1):
+        if engine.update(vin, vout, iin, iout) != FaultCode.NONE:
+            return tick
+    return None
+
+
+def test_i2t_trips_when_the_integral_passes_the_limit():
+    engine = ProtectionEngine()
+    limits = engine.limits
+    dt_slow = engine.slow_divider * engine.dt
+
+    # 10 A against 8 A continuous: 36 A^2 more every second
+    evals = math.floor(limits.i2t_limit / ((10.0 ** 2 - limits.i_continuous ** 2) * dt_slow)) + 1
+    tick = run_until_trip(engine, 20.0, 20.0, 10.0, 0.0, 2 * evals * engine.slow_divider)
+
+    assert tick == evals * engine.slow_divider
+    assert engine.fault_code == FaultCode.I2T
+
+
+def test_i2t_does_not_build_at_the_continuous_rating():
+    engine = ProtectionEngine()
+
+    assert run_until_trip(engine, 20.0, 20.0, engine.limits.i_continuous, 0.0, 90_000) is None
+    assert engine.i2t == 0.0
+
+
+def test_overpower_trips_on_the_averaged_power():
+    engine = ProtectionEngine()
+    limits = engine.limits
+    alpha = engine.slow_divider * engine.dt / limits.p_window_s
+
+    # 400 W at the continuous current, the average approaches it with alpha per evaluation
+    evals = math.ceil(math.log(1.0 - limits.p_max / 400.0) / math.log(1.0 - alpha))
+    tick = run_until_trip(engine, 50.0, 20.0, 8.0, 0.0, 2 * evals * engine.slow_divider)
+
+    assert tick == evals * engine.slow_divider
+    assert engine.fault_code == FaultCode.OVERPOWER
+
+
+@pytest.mark.parametrize("rise_v, expected", ((9.5, FaultCode.NONE), (10.5, FaultCode.VOUT_SLEW)))
+def test_vout_slew_limit(rise_v, expected):
+    # 10_000 V/s over one 1 ms evaluation is 10 V
+    engine = ProtectionEngine()
+    n = engine.slow_divider
+
+    assert run_until_trip(engine, 20.0, 10.0, 1.0, 1.0, n) is None
+    tick = run_until_trip(engine, 20.0, 10.0 + rise_v, 1.0, 1.0, n)
+
+    assert (tick is not None) == (expected != FaultCode.NONE)
+    assert engine.fault_code == expected
+
+
+def test_overtemp_trips():
+    engine = ProtectionEngine()
+    engine.update_temperature(engine.limits.temp_max_c + 1.0)
+
+    assert run_until_trip(engine, 20.0, 20.0, 1.0, 1.0, engine.slow_divider) == engine.slow_divider
+    assert engine.fault_code == FaultCode.OVERTEMP
+
+
+@pytest.mark.parametrize("load, derate", ((0.5, 1.0), (0.7, 1.0), (0.85, 0.65), (1.0, 0.3)))
+def test_derate_is_linear_between_start_and_limit(load, derate):
+    engine = ProtectionEngine(limits=ProtectionLimits(temp_max_c=100.0))
+    engine.update_temperature(100.0 * load - 1e-9)
+
+    assert run_until_trip(engine, 20.0, 20.0, 1.0, 1.0, engine.slow_divider) is None
+    assert engine.derate == pytest.approx(derate, abs=1e-6)
+
+
+def test_units_scale_the_raw_path():
+    volts = ProtectionEngine()
+    codes = ProtectionEngine()
+    codes.set_units(volts_per_unit=0.01, amps_per_unit=0.001)
+
+    for _ in range(3000):
+        volts.update(50.0, 20.0, 9.0, 0.0)
+        codes.update(5000, 2000, 9000, 0)
+
+    assert codes.i2t == pytest.approx(volts.i2t)
+    assert codes.p_avg == pytest.approx(volts.p_avg)
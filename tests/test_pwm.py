@@ -0,0 +1,157 @@
+"""
+hal on the fake bus: duty quantizer, channel handles, pwm backends and the
+safe output path
+"""
+
+import pytest
+
+from bench.suite import BUS, PINS, driver_stack
+
+from drivers.ina229 import INA_IN, INA_OUT, INA229Error
+from hal.gpio import GpioError
+from hal.pwm import DutyQuantizer
+
+
+# -------------- duty quantizer --------------
+
+def average_level(quantizer: DutyQuantizer, counts: int, calls: int) -> float:
+    return sum(quantizer.level(quantizer.quantize(0, counts)) for _ in range(calls)) / calls
+
+
+def test_quantizer_levels_at_300khz():
+    q = DutyQuantizer(300_000)
+
+    assert q.steps == 833
+    for level in (0, 1, 416, 832):
+        assert q.level(q.level_counts(level)) == level
+        assert q.level(q.level_counts(level) - 1) == level - 1 or level == 0
+
+
+def test_sigma_delta_average_follows_the_request():
+    q = DutyQuantizer(300_000, dither=True)
+    counts = 400_420  # 333.55 levels
+    wanted = counts * q.steps / 1_000_000
+
+    for calls in (20, 100, 1000):
+        q.reset()
+        assert abs(average_level(q, counts, calls) - wanted) <= 1.0 / calls
+
+
+def test_without_dither_the_duty_sticks_to_one_level():
+    # PiPwm hands the counts to pigpio as they are, the hardware truncates
+    q = DutyQuantizer(300_000)
+    counts = 400_420
+    wanted = counts * q.steps / 1_000_000
+
+    assert q.level(counts) == 333
+    assert wanted - q.level(counts) > 0.5
+
+
+def test_saturated_channel_does_not_wind_up():
+    q = DutyQuantizer(300_000, dither=True)
+
+    for _ in range(1000):
+        q.quantize(0, 990_000, max_counts=850_000)
+
+    assert q.error[0] <= 1.0
+    assert abs(average_level(q, 500_000, 100) - 500_000 * q.steps / 1_000_000) <= 2.0 / 100
+
+
+def test_zero_duty_clears_the_error():
+    q = DutyQuantizer(300_000, dither=True)
+    q.quantize(1, 400_420)
+
+    assert q.quantize(1, 0) == 0
+    assert q.error[1] == 0.0
+
+
+# -------------- handles --------------
+
+def test_int_handles_are_validated():
+    _, ina, pwm = driver_stack()
+    gpio = pwm.gpio
+
+    assert gpio.get_pwm_pin(PINS.pwm1) == PINS.pwm1
+    assert gpio.get_gd_enable_pin(PINS.gd_enable2) == PINS.gd_enable2
+    assert gpio.get_cs_pin(PINS.cs_mcp3208) == PINS.cs_mcp3208
+    assert ina.handle(INA_OUT) == INA_OUT
+
+    with pytest.raises(GpioError):
+        gpio.get_pwm_pin(7)
+    with pytest.raises(GpioError):
+        gpio.get_gd_enable_pin(PINS.pwm1)
+    with pytest.raises(GpioError):
+        gpio.get_cs_pin(PINS.gd_enable1)
+    with pytest.raises(INA229Error):
+        ina.handle(INA_IN + INA_OUT + 1)
+
+
+def test_set_duty_refuses_a_pin_that_is_not_pwm():
+    _, _, pwm = driver_stack()
+    BUS.pwm.clear()
+
+    with pytest.raises(GpioError):
+        pwm.set_duty(7, 0.3)
+
+    assert 7 not in BUS.pwm
+
+
+def test_name_and_handle_drive_the_same_pin():
+    _, _, pwm = driver_stack()
+
+    pwm.set_duty("pwm2", 0.3)
+    by_name = BUS.pwm[PINS.pwm2]
+    BUS.pwm.clear()
+    pwm.set_duty(PINS.pwm2, 0.3)
+
+    assert BUS.pwm == {PINS.pwm2: by_name}
+
+
+# -------------- backends --------------
+
+@pytest.mark.parametrize("backend", ("pigpio", "mmap"))
+def test_set_duties_programs_both_channels(backend):
+    _, _, pwm = driver_stack(pwm_backend=backend)
+    block = BUS.pwm_block
+
+    pwm.set_duties(0.40, 0.20)
+
+    steps = 250_000_000 // 300_000
+    assert block.level(1) == 400_000 * steps // 1_000_000
+    assert block.level(2) == 200_000 * steps // 1_000_000
+
+
+def test_mmap_updates_go_around_pigpio():
+    _, _, pwm = driver_stack(pwm_backend="mmap")
+    pwm.set_duties(0.40, 0.20)
+
+    BUS.reset_counters()
+    for k in range(10):
+        pwm.set_duties(0.40 + 0.01 * k, 0.20)
+
+    assert BUS.pigpio_calls == 0
+    assert BUS.pwm_block.level(1) == 490_000 * (250_000_000 // 300_000) // 1_000_000
+
+
+# -------------- safe outputs --------------
+
+@pytest.mark.parametrize("backend", ("pigpio", "mmap"))
+def test_force_safe_outputs(backend):
+    _, _, pwm = driver_stack(pwm_backend=backend)
+    gpio = pwm.gpio
+
+    gpio.set_gd_enable("gd1", True)
+    gpio.set_gd_enable("gd2", True)
+    pwm.set_duties(0.40, 0.20)
+
+    gpio.force_safe_outputs()
+
+    assert BUS.levels[PINS.gd_enable1] == 0
+    assert BUS.levels[PINS.gd_enable2] == 0
+    assert BUS.levels[PINS.pwm1] == 0
+    assert BUS.levels[PINS.pwm2] == 0
+    for pin in (PINS.cs_ina_in, PINS.cs_ina_out, PINS.cs_mcp3208):
+        assert BUS.levels[pin] == 1
+    assert BUS.pwm[PINS.pwm1][1] == 0
+    assert BUS.pwm[PINS.pwm2][1] == 0
+    assert BUS.pwm_block.words[0] == 0  # both channels off in CTL
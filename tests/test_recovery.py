@@ -0,0 +1,145 @@
+"""
+fault recovery (control/recovery.py): backoff schedule and giving up
+"""
+
+import pytest
+
+from control.control import ConverterState, FaultCode
+from control.recovery import FaultClass, RecoveryManager, RecoveryPolicy
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+class FaultingConverter:
+    """
+    just what RecoveryManager looks at: state, fault_code and clear_fault()
+    """
+
+    def __init__(self):
+        self.state = ConverterState.NORMAL
+        self.fault_code = FaultCode.NONE
+        self.cleared = 0
+
+    def fault(self, code: FaultCode) -> None:
+        self.state = ConverterState.FAULT
+        self.fault_code = code
+
+    def clear_fault(self) -> None:
+        self.cleared += 1
+        self.state = ConverterState.STANDBY
+        self.fault_code = FaultCode.NONE
+
+
+def retry_delays(recovery: RecoveryManager, converter: FaultingConverter, clock: Clock, code: FaultCode, faults: int) -> list[float]:
+    """
+    faults the converter again right after each retry, returns the waits before the retries
+    """
+    delays = []
+
+    for _ in range(faults):
+        converter.fault(code)
+        recovery.update(converter)
+        if recovery.gave_up:
+            break
+
+        faulted_s = clock.t
+        clock.t = recovery.retry_at
+        recovery.update(converter)
+        assert converter.state == ConverterState.STANDBY
+        delays.append(clock.t - faulted_s)
+
+    return delays
+
+
+def test_transient_backoff_doubles_up_to_the_cap():
+    clock = Clock()
+    converter = FaultingConverter()
+    policy = RecoveryPolicy(transient_delay_s=1.0, max_delay_s=20.0, max_retries=100, retry_window_s=1e9)
+    recovery = RecoveryManager(policy, clock=clock)
+
+    delays = retry_delays(recovery, converter, clock, FaultCode.IIN_OVER, 7)
+
+    assert delays == [1.0, 2.0, 4.0, 8.0, 16.0, 20.0, 20.0]
+    assert recovery.recoveries == 7
+    assert recovery.class_counts[FaultClass.TRANSIENT] == 7
+
+
+def test_no_retry_before_the_delay():
+    clock = Clock()
+    converter = FaultingConverter()
+    recovery = RecoveryManager(RecoveryPolicy(persistent_delay_s=30.0), clock=clock)
+
+    converter.fault(FaultCode.VOUT_OVER)
+    recovery.update(converter)
+    assert recovery.last_class == FaultClass.PERSISTENT
+
+    clock.t = 29.9
+    recovery.update(converter)
+    assert converter.cleared == 0
+    assert recovery.time_to_retry() == pytest.approx(0.1)
+
+    clock.t = 30.0
+    recovery.update(converter)
+    assert converter.cleared == 1
+
+
+def test_gives_up_after_max_retries():
+    clock = Clock()
+    converter = FaultingConverter()
+    recovery = RecoveryManager(RecoveryPolicy(max_retries=3), clock=clock)
+
+    delays = retry_delays(recovery, converter, clock, FaultCode.IOUT_OVER, 10)
+
+    assert len(delays) == 3
+    assert recovery.gave_up
+    assert converter.state == ConverterState.FAULT
+
+    # left in FAULT, no more retries however long it waits
+    clock.t += 1e6
+    recovery.update(converter)
+    assert converter.cleared == 3
+
+
+def test_sensor_faults_give_up_sooner():
+    clock = Clock()
+    converter = FaultingConverter()
+    recovery = RecoveryManager(RecoveryPolicy(sensor_max_retries=2), clock=clock)
+
+    delays = retry_delays(recovery, converter, clock, FaultCode.NON_FINITE, 10)
+
+    assert delays == [5.0, 10.0]
+    assert recovery.gave_up
+
+
+def test_retries_outside_the_window_do_not_count():
+    clock = Clock()
+    converter = FaultingConverter()
+    policy = RecoveryPolicy(max_retries=2, retry_window_s=100.0, max_delay_s=1.0)
+    recovery = RecoveryManager(policy, clock=clock)
+
+    for _ in range(5):
+        assert retry_delays(recovery, converter, clock, FaultCode.IIN_OVER, 1) == [1.0]
+        clock.t += 200.0
+
+    assert not recovery.gave_up
+
+
+def test_stable_running_resets_the_backoff():
+    clock = Clock()
+    converter = FaultingConverter()
+    policy = RecoveryPolicy(transient_delay_s=1.0, stable_reset_s=300.0)
+    recovery = RecoveryManager(policy, clock=clock)
+
+    assert retry_delays(recovery, converter, clock, FaultCode.I2T, 2) == [1.0, 2.0]
+
+    converter.state = ConverterState.NORMAL
+    clock.t += 300.0
+    recovery.update(converter)
+
+    assert retry_delays(recovery, converter, clock, FaultCode.I2T, 1) == [1.0]
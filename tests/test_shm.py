@@ -0,0 +1,186 @@
+"""
+shared memory: the SPSC rings (control/shm_ring.py) and the status segment
+(control/status_segment.py)
+"""
+
+import os
+import struct
+
+import pytest
+
+from control.shm_ring import COMMAND_FMT, HEAD, TAIL, TELEMETRY_FMT, RingError, ShmRing
+from control.status_segment import (
+    STATUS_HEADER_FMT,
+    STATUS_HEADER_SIZE,
+    STATUS_MAGIC,
+    STATUS_SIZE,
+    StatusError,
+    StatusPublisher,
+    StatusReader,
+    encode_reason,
+)
+
+
+@pytest.fixture
+def ring():
+    ring = ShmRing.create(COMMAND_FMT, capacity=8)
+    yield ring
+    ring.close()
+
+
+# -------------- rings --------------
+
+def test_read_after_write_across_mappings(ring):
+    consumer = ShmRing.attach(ring.name, COMMAND_FMT)
+    try:
+        for k in range(20):
+            assert ring.push(1 + k % 3, float(k))
+            assert ring.push(2, -float(k))
+            assert consumer.pop() == [(1 + k % 3, float(k)), (2, -float(k))]
+            assert len(ring) == 0
+    finally:
+        consumer.close()
+
+    assert os.path.exists(ring.path)
+
+
+def test_full_ring_drops_and_counts(ring):
+    for k in range(10):
+        ring.push(1, float(k))
+
+    assert ring.dropped == 2
+    assert [value for _, value in ring.pop(max_records=3)] == [0.0, 1.0, 2.0]
+    assert [value for _, value in ring.pop()] == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert ring.pop() == []
+
+
+def test_head_ahead_of_its_record_is_not_read(ring):
+    # what a weakly ordered cpu may show the consumer: head published, record not yet
+    ring.push(1, 1.0)
+    ring._header[HEAD] += 1
+
+    assert ring.pop() == [(1, 1.0)]
+    assert ring._header[TAIL] == 1
+
+    # the record lands, the next pop takes it
+    ring._header[HEAD] -= 1
+    assert ring.push(2, 2.0)
+    assert ring.pop() == [(2, 2.0)]
+
+
+def test_stale_record_from_the_last_lap_is_not_read(ring):
+    for k in range(8):
+        ring.push(1, float(k))
+    ring.pop()
+
+    # head one past, the slot still holds index 0 from the lap before
+    ring._header[HEAD] += 1
+    assert ring.pop() == []
+
+
+def test_attach_checks_the_record_size(ring):
+    with pytest.raises(RingError):
+        ShmRing.attach(ring.name, TELEMETRY_FMT)
+
+
+def test_capacity_must_be_a_power_of_two():
+    with pytest.raises(RingError):
+        ShmRing.create(COMMAND_FMT, capacity=6)
+
+
+def test_owner_removes_the_file():
+    ring = ShmRing.create(COMMAND_FMT, capacity=4)
+    ring.close()
+
+    assert not os.path.exists(ring.path)
+
+
+# -------------- status segment --------------
+
+def status_values(ticks: int, reason: str = "") -> tuple:
+    return (
+        123.0, ticks,
+        2, 1, 0,
+        0.4, 0.85, 0.4, 48.0, 1.0,
+        30.0, 20.0, 2.0, 2.0, 60.0, 40.0,
+        1, 2, 3, 4,
+        encode_reason(reason),
+    )
+
+
+@pytest.fixture
+def segment(tmp_path):
+    publisher = StatusPublisher(str(tmp_path / "status"))
+    publisher.open()
+    reader = StatusReader(publisher.path, retries=5)
+    yield publisher, reader
+    reader.close()
+    publisher.close()
+
+
+def test_status_read_after_write(segment):
+    publisher, reader = segment
+
+    for ticks in (10, 20, 30):
+        publisher.publish(*status_values(ticks, "input overvoltage"))
+        snapshot = reader.read()
+
+        assert snapshot.pid == os.getpid()
+        assert snapshot.count == publisher.count
+        assert snapshot.ticks == ticks
+        assert snapshot.vin == 30.0
+        assert snapshot.captures == 4
+        assert snapshot.fault_reason == "input overvoltage"
+
+
+def test_status_write_in_progress_is_not_read(segment):
+    publisher, reader = segment
+    publisher.publish(*status_values(10))
+
+    publisher._seq[0] += 1
+    assert reader.read() is None
+
+    publisher._seq[0] += 1
+    assert reader.read().ticks == 10
+
+
+def test_status_torn_payload_is_not_read(segment):
+    # even sequence on both reads, but the payload is not the one the crc covers:
+    # the payload stores seen out of order with the sequence stores
+    publisher, reader = segment
+    publisher.publish(*status_values(10))
+
+    publisher._buf[STATUS_HEADER_SIZE + 24] ^= 0xFF
+    assert reader.read() is None
+
+    publisher.publish(*status_values(11))
+    assert reader.read().ticks == 11
+
+
+def test_status_reader_follows_a_new_segment(segment):
+    publisher, reader = segment
+    publisher.publish(*status_values(10))
+    assert reader.read().count == 1
+
+    publisher.close()
+    assert reader.read() is None
+
+    restarted = StatusPublisher(publisher.path)
+    restarted.open()
+    try:
+        # nothing published into the new segment yet, its zeros fail the crc
+        assert reader.read() is None
+
+        restarted.publish(*status_values(5))
+        snapshot = reader.read()
+        assert (snapshot.count, snapshot.ticks) == (1, 5)
+    finally:
+        restarted.close()
+
+
+def test_status_unknown_layout(tmp_path):
+    path = tmp_path / "status"
+    path.write_bytes(struct.pack(STATUS_HEADER_FMT, STATUS_MAGIC, 1, STATUS_SIZE, 0) + bytes(STATUS_SIZE + 4))
+
+    with pytest.raises(StatusError):
+        StatusReader(str(path)).read()
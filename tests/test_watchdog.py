@@ -0,0 +1,127 @@
+"""
+heartbeat (control/watchdog.py) and the supervisor's kill check
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from control.watchdog import Heartbeat, WatchdogConfig, process_start_time, read_heartbeat
+import supervisor
+
+
+class Clock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+PERIOD_S = 0.001
+
+
+def beats(heartbeat: Heartbeat, clock: Clock, n: int, late_s: float = 0.0) -> None:
+    """
+    n beats one period apart, the first of them late_s late
+    """
+    for k in range(n):
+        clock.t += PERIOD_S + (late_s if k == 0 else 0.0)
+        heartbeat.beat(PERIOD_S)
+
+
+def test_on_time_beats_pet_every_kick_period():
+    clock = Clock()
+    heartbeat = Heartbeat(WatchdogConfig(deadline_s=0.002, kick_period_s=0.010), clock=clock)
+
+    heartbeat.beat(PERIOD_S)
+    beats(heartbeat, clock, 99)
+
+    stats = heartbeat.stats
+    assert stats.count == 99
+    assert stats.late == 0
+    assert stats.missed_pets == 0
+    assert stats.pets == 10
+    assert stats.max_s == pytest.approx(0.0, abs=1e-9)
+
+
+def test_a_late_beat_withholds_the_next_pet():
+    clock = Clock()
+    heartbeat = Heartbeat(WatchdogConfig(deadline_s=0.002, kick_period_s=0.010), clock=clock)
+
+    heartbeat.beat(PERIOD_S)
+    beats(heartbeat, clock, 5)
+    beats(heartbeat, clock, 40, late_s=0.0015)  # inside the deadline
+    assert heartbeat.stats.late == 0
+
+    pets = heartbeat.stats.pets
+    beats(heartbeat, clock, 10, late_s=0.003)
+    stats = heartbeat.stats
+
+    assert stats.late == 1
+    assert stats.max_s == pytest.approx(0.003)
+    assert stats.missed_pets == 1
+    assert stats.pets == pets
+
+    # the window after it is petted again
+    beats(heartbeat, clock, 10)
+    assert stats.pets == pets + 1
+    assert stats.missed_pets == 1
+
+
+def test_pause_is_not_jitter():
+    clock = Clock()
+    heartbeat = Heartbeat(clock=clock)
+
+    heartbeat.beat(PERIOD_S)
+    heartbeat.pause()
+    clock.t += 5.0
+    heartbeat.beat(PERIOD_S)
+
+    assert heartbeat.stats.count == 0
+
+
+def test_record_for_the_supervisor(tmp_path):
+    path = str(tmp_path / "hb")
+    clock = Clock()
+    heartbeat = Heartbeat(WatchdogConfig(heartbeat_path=path, kick_period_s=0.010), clock=clock)
+    heartbeat.open()
+
+    heartbeat.beat(PERIOD_S)
+    pid, seq, t, started = read_heartbeat(path)
+    assert (pid, seq, t) == (os.getpid(), 1, clock.t)
+    assert started == process_start_time(os.getpid())
+
+    beats(heartbeat, clock, 10)
+    assert read_heartbeat(path)[1] == 2
+
+    # a clean exit removes the record, not a stall
+    heartbeat.close()
+    assert read_heartbeat(path) is None
+
+
+def test_stop_process_checks_the_start_time(capsys):
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        started = process_start_time(child.pid)
+        assert started is not None
+
+        supervisor.stop_process(child.pid, started + 1)
+        assert "not the control process" in capsys.readouterr().out
+        assert child.poll() is None
+
+        supervisor.stop_process(child.pid, started)
+        assert child.wait(5.0) == -9
+    finally:
+        if child.poll() is None:
+            child.kill()
+            child.wait()
+
+
+def test_no_start_time_for_a_missing_process():
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+
+    assert process_start_time(child.pid) is None